@@ -31,11 +31,92 @@ class Settings(BaseSettings):
     # CORS Settings - stored as string, parsed to list
     ALLOWED_ORIGINS_STR: str = "http://localhost:3000,http://localhost:3001"
 
-    # Azure Configuration (for future use)
-    AZURE_FOUNDRY_ENDPOINT: str = ""
+    # Azure Configuration
+    AZURE_FOUNDRY_ENDPOINT: str = ""  # Empty uses the in-process stand-in model
     AZURE_FOUNDRY_API_KEY: str = ""
+    AZURE_FOUNDRY_DEPLOYMENT: str = "gpt-4o"
+    AZURE_FOUNDRY_API_VERSION: str = "2024-10-21"
+    # Deployments calls are routed across, as name=context_tokens pairs; empty uses AZURE_FOUNDRY_DEPLOYMENT only
+    MODEL_DEPLOYMENTS: str = ""
     OTEL_EXPORTER_OTLP_ENDPOINT: str = ""
 
+    # Document Processing
+    EXTRACTION_WORKERS: int = 2  # Worker processes for text extraction, 0 extracts in-process
+    EXTRACTION_TOKEN_BUDGET: int = 100000  # Tokens extracted per request beyond the sections the description asks for
+    BOILERPLATE_EDGE_LINES: int = 3  # Lines at the top/bottom of each page checked for boilerplate
+    BOILERPLATE_MIN_PAGE_RATIO: float = 0.5  # Share of pages a line must repeat on to be stripped
+    DEDUP_SIMILARITY_THRESHOLD: float = 0.8  # Estimated Jaccard similarity above which paragraphs are dropped
+    DEDUP_MIN_WORDS: int = 8  # Shorter paragraphs are not deduplicated
+    CHUNK_MIN_BYTES: int = 512
+    CHUNK_AVG_BYTES: int = 2048
+    CHUNK_MAX_BYTES: int = 8192
+    CHUNK_CACHE_MAX_ENTRIES: int = 10000  # Per-chunk results kept for reuse across requests
+    CHUNK_CACHE_MAP_MAX_ENTRIES: int = 2000  # Map notes kept apart from cheaper per-chunk results
+    EMBEDDING_DIMENSIONS: int = 256
+    EMBEDDING_CACHE_DIR: str = ""  # Where chunk vectors are persisted per file hash, defaults to the temp directory
+    EMBEDDING_MAX_VECTORS_PER_FILE: int = 4096  # Chunk vectors kept per file, the least recently used dropped first
+    EMBEDDING_WEIGHT: float = 1.0  # Weight of embedding similarity relative to the normalized BM25 score
+    MODEL_CONTEXT_TOKENS: int = 128000  # Context window of deployments listed without a size in MODEL_DEPLOYMENTS
+    MODEL_OUTPUT_RESERVE_TOKENS: int = 4096  # Context kept free for the generated document
+    PACK_MIN_FILE_SHARE: float = 0.5  # Share of an even per-file split of the context guaranteed to every file
+    SUMMARIZE_OVERSIZE_RATIO: float = 3.0  # Content this many times the context budget is compressed with TextRank
+    SUMMARIZE_TARGET_RATIO: float = 1.5  # Size of compressed content relative to the context budget
+    PROMPT_TEMPLATE_DIR: str = ""  # Directory of *.toml prompt templates, defaults to the bundled templates
+    PROMPT_TEMPLATE_RELOAD_INTERVAL: float = 2.0  # Seconds between checks for edited template files
+    DEFAULT_PROMPT_TEMPLATE: str = "default"
+    MAP_REDUCE_ENABLED: bool = True  # Condense content that does not fit in map calls; off ranks and drops it instead
+    MAP_GROUP_TOKENS: int = 16000  # Input tokens per map call
+    MAP_OUTPUT_TOKENS: int = 1024  # Notes generated per map call
+    MAP_MAX_PARALLEL: int = 8  # Map calls of one request running at once
+    SECTION_PARALLEL_ENABLED: bool = True  # Write long reports section by section in parallel
+    SECTION_MIN_INPUT_TOKENS: int = 8000  # Source tokens from which a report is written by section
+    SECTION_MAX_COUNT: int = 12
+    SECTION_OUTLINE_TOKENS: int = 512
+    SECTION_OUTPUT_TOKENS: int = 1024  # Tokens generated per section
+    SECTION_SOURCE_TOKENS: int = 8000  # Source tokens sent with each section call, the most relevant chunks first
+
+    # Result Cache
+    RESULT_CACHE_MAX_ENTRIES: int = 256
+    RESULT_CACHE_TTL_SECONDS: float = 86400.0  # Cached documents older than this are regenerated
+    SEMANTIC_CACHE_THRESHOLD: float = 0.9  # Description similarity at which a cached result is reused
+
+    # Model Client
+    MODEL_MAX_CONNECTIONS: int = 20
+    MODEL_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    MODEL_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle connection stays open for reuse
+    MODEL_CONNECT_TIMEOUT: float = 5.0
+    MODEL_READ_TIMEOUT: float = 120.0  # Seconds allowed between streamed bytes
+    STREAM_DELTA_INTERVAL: float = 0.05  # Seconds of model output batched into one SSE delta event
+    MODEL_CONCURRENCY_INITIAL: int = 4  # Concurrent model calls before latency and throttling feedback
+    MODEL_CONCURRENCY_MIN: int = 1
+    MODEL_CONCURRENCY_MAX: int = 32
+    MODEL_LATENCY_TARGET: float = 10.0  # Seconds to first token above which the concurrency limit is reduced
+    MODEL_MAX_RETRIES: int = 3  # Retries of a throttled model call
+    MODEL_RETRY_AFTER_DEFAULT: float = 1.0  # Pause after a 429 without a Retry-After header
+    MODEL_NODE_MAX_CONCURRENCY: int = 32  # Model calls at once across all workers on the node, 0 for no limit
+    MODEL_NODE_TOKENS_PER_MINUTE: int = 0  # Node share of the deployment's token quota, 0 for no limit
+    MODEL_BUDGET_FILE: str = ""  # State file shared by the workers, defaults to the temp directory
+    HEDGE_ENABLED: bool = True  # Duplicate model calls that are slow to produce their first token
+    HEDGE_PERCENTILE: float = 95.0  # First-token time percentile after which a call is hedged
+    HEDGE_BUDGET_RATIO: float = 0.05  # Maximum share of calls that may be hedged
+    HEDGE_BUDGET_BURST: float = 5.0  # Hedges that may be saved up and started at once
+    HEDGE_MIN_SAMPLES: int = 20  # First-token times observed per deployment and prompt size before hedging starts
+    CIRCUIT_FAILURE_RATE: float = 0.5  # Share of failed recent model calls that opens the circuit
+    CIRCUIT_WINDOW: int = 20  # Recent model calls considered
+    CIRCUIT_MIN_CALLS: int = 10  # Calls in the window before the circuit may open
+    CIRCUIT_OPEN_SECONDS: float = 30.0  # Seconds new work fails fast before the endpoint is probed again
+    CIRCUIT_HALF_OPEN_PROBES: int = 1
+    ROUTING_LATENCY_SMOOTHING: float = 0.2  # Weight of the newest first-token time in per-deployment averages
+    ROUTING_FAILURE_PENALTY: float = 30.0  # Seconds recorded as the first-token time of a failed or throttled call
+    BATCH_DEPLOYMENT: str = ""  # Deployment non-interactive jobs are batched on, defaults to AZURE_FOUNDRY_DEPLOYMENT
+    BATCH_MAX_REQUESTS: int = 200  # Queued calls that are submitted as a batch right away
+    BATCH_MAX_WAIT: float = 30.0  # Seconds a queued call waits for others to join its batch
+    BATCH_POLL_INTERVAL: float = 60.0  # Seconds between status checks of a running batch
+    BATCH_TIMEOUT: float = 86400.0  # Seconds after which an unfinished batch is abandoned
+    ARTIFACT_DIR: str = ""  # Directory generated documents are served from, defaults to the temp directory
+    ARTIFACT_TTL_SECONDS: float = 604800.0  # Seconds a generated document stays downloadable
+    ARTIFACT_COMPRESS_MIN_BYTES: int = 1024  # Smallest text document stored with a gzip variant
+
     # Feature Flags
     ENABLE_DOCS: bool = True
 
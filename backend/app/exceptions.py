@@ -54,16 +54,29 @@ class FileValidationError(ValidationError):
 class ResourceNotFoundError(BaseAPIException):
     """Raised when a requested resource is not found."""
 
-    def __init__(self, resource_type: str, resource_id: str, message: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        resource_type: str,
+        resource_id: str,
+        message: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> None:
         msg = message or f"{resource_type} with ID '{resource_id}' not found"
         super().__init__(
             message=msg,
             status_code=404,
             error_code="RESOURCE_NOT_FOUND",
-            details={"resource_type": resource_type, "resource_id": resource_id},
+            details={"resource_type": resource_type, "resource_id": resource_id, **(details or {})},
         )
 
 
+class ConflictError(BaseAPIException):
+    """Raised when a resource is not in a state that allows the request."""
+
+    def __init__(self, message: str = "Conflict", details: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(message=message, status_code=409, error_code="CONFLICT", details=details)
+
+
 class ProcessingError(BaseAPIException):
     """Raised when document processing fails."""
 
@@ -79,6 +92,7 @@ class RateLimitError(BaseAPIException):
         message: str = "Rate limit exceeded",
         retry_after: Optional[int] = None,
     ) -> None:
+        self.retry_after = retry_after
         details = {"retry_after": retry_after} if retry_after else {}
         super().__init__(message=message, status_code=429, error_code="RATE_LIMIT_EXCEEDED", details=details)
 
@@ -15,7 +15,8 @@ from app.config import settings
 from app.dependencies.telemetry import init_telemetry, instrument_app, shutdown_telemetry
 from app.error_handlers import register_exception_handlers
 from app.middleware import CorrelationIdMiddleware, LoggingMiddleware
-from app.routes import health_router, test_router, generate_router, stream_router
+from app.routes import health_router, test_router, generate_router, stream_router, metrics_router
+from app.services.document_processor import document_processor
 from app.utils.logging import setup_logging
 
 # Setup logging
@@ -46,6 +47,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Shutdown
     logger.info(f"Shutting down {settings.SERVICE_NAME}")
 
+    # Stop extraction workers and close pooled model connections
+    await document_processor.shutdown()
+
     # Shutdown telemetry
     try:
         shutdown_telemetry()
@@ -100,6 +104,7 @@ app = FastAPI(
         {"name": "health", "description": "Health check endpoints for monitoring service availability"},
         {"name": "generate", "description": "Document generation endpoints for file upload and processing"},
         {"name": "stream", "description": "Server-Sent Events endpoints for real-time progress updates"},
+        {"name": "metrics", "description": "Operational counters and cache statistics"},
         {"name": "test", "description": "Test endpoints for verifying authentication and configuration"},
     ],
     servers=[{"url": "/", "description": "Current server"}],
@@ -137,6 +142,7 @@ app.include_router(health_router.router)
 app.include_router(test_router.router)
 app.include_router(generate_router.router, prefix="/api/v1", tags=["generate"])
 app.include_router(stream_router.router, prefix="/api/v1", tags=["stream"])
+app.include_router(metrics_router.router, prefix="/api/v1", tags=["metrics"])
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 """Routes package."""
 
-from app.routes import health_router, test_router, generate_router, stream_router
+from app.routes import health_router, test_router, generate_router, stream_router, metrics_router
 
-__all__ = ["health_router", "test_router", "generate_router", "stream_router"]
+__all__ = ["health_router", "test_router", "generate_router", "stream_router", "metrics_router"]
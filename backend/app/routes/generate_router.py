@@ -1,17 +1,20 @@
 """Router for document generation endpoints.
 
 Handles file uploads and document generation requests using LLM processing.
-Provides endpoints for submitting generation requests and checking their status.
+Provides endpoints for submitting generation requests, checking their status
+and downloading the generated document.
 """
 
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse
 
 from app.dependencies.auth import verify_password
-from app.exceptions import ValidationError, ProcessingError, ResourceNotFoundError
+from app.exceptions import ConflictError, ExternalServiceError, ValidationError, ProcessingError, ResourceNotFoundError
 from app.schemas.generate_schema import GenerateResponse
+from app.services.artifact_store import choose_encoding, etag_matches
 from app.services.document_processor import document_processor
 from app.utils.file_validation import validate_upload_file, validate_file_size
 from app.utils.logging import get_logger
@@ -77,7 +80,8 @@ router = APIRouter()
         },
         400: {"description": "Invalid request (e.g., unsupported file type, file too large)"},
         401: {"description": "Invalid authentication credentials"},
-        422: {"description": "Validation error (e.g., missing required fields)"},
+        422: {"description": "Validation error (e.g., missing required fields, unknown template)"},
+        502: {"description": "Model endpoint unavailable (circuit breaker open), retry later"},
     },
 )
 async def generate_document(
@@ -89,6 +93,17 @@ async def generate_document(
         pattern="^(markdown|pdf|docx)$",
         description="Desired output format for the generated document",
     ),
+    semantic_cache: bool = Form(
+        default=False, description="Allow reusing a cached result generated for a near-identical description"
+    ),
+    template: Optional[str] = Form(
+        default=None, max_length=100, description="Name of the prompt template, the default template if omitted"
+    ),
+    interactive: bool = Form(
+        default=True,
+        description="Set to false for bulk jobs nobody waits on; they are generated through cheaper provider "
+        "batches and may take hours",
+    ),
     files: List[UploadFile] = File(..., description="One or more files to process (PDF, DOCX, CSV, XLSX)"),
     _: None = Depends(verify_password),
 ) -> GenerateResponse:
@@ -134,7 +149,12 @@ async def generate_document(
     try:
         # Create the generation request
         request_id, file_infos = await document_processor.create_request(
-            files=files, description=description, output_format=output_format
+            files=files,
+            description=description,
+            output_format=output_format,
+            semantic_cache=semantic_cache,
+            template=template,
+            interactive=interactive,
         )
 
         # Check total size after processing
@@ -169,7 +189,7 @@ async def generate_document(
 
         return response
 
-    except (ValidationError, ProcessingError, ResourceNotFoundError):
+    except (ValidationError, ProcessingError, ResourceNotFoundError, ExternalServiceError):
         # Re-raise our custom exceptions
         raise
     except Exception as e:
@@ -205,6 +225,7 @@ async def generate_document(
                         "message": "Analyzing document structure...",
                         "error": None,
                         "completed_at": None,
+                        "cache_status": "miss",
                     }
                 }
             },
@@ -239,3 +260,72 @@ async def get_generation_status(request_id: str, _: None = Depends(verify_passwo
         raise ResourceNotFoundError("Generation request", request_id)
 
     return request_status.model_dump()
+
+
+@router.get(
+    "/generate/{request_id}/result",
+    summary="Download the generated document",
+    description="""Download the document produced by a completed generation request.
+
+    The file is streamed from disk. Responses carry a strong `ETag`, so clients can
+    revalidate with `If-None-Match` and resume interrupted downloads with `Range`
+    and `If-Range`. Clients sending `Accept-Encoding: gzip` receive a precompressed
+    variant of text documents, with its own ETag.
+    """,
+    response_class=FileResponse,
+    responses={
+        200: {"description": "The generated document", "content": {"text/markdown": {}}},
+        206: {"description": "The requested byte range of the document"},
+        304: {"description": "The client's copy, identified by If-None-Match, is current"},
+        401: {"description": "Invalid authentication credentials"},
+        404: {"description": "Request not found, its document expired, or generation failed"},
+        409: {"description": "The request is still being processed"},
+        416: {"description": "The requested range lies outside the document"},
+    },
+    tags=["generate"],
+)
+async def get_generation_result(request_id: str, request: Request, _: None = Depends(verify_password)) -> Response:
+    """Download the generated document of a request.
+
+    Args:
+        request_id: UUID of the generation request
+        request: Incoming request, for its conditional and content negotiation headers
+
+    Returns:
+        The document file, a byte range of it, or an empty 304 response
+    """
+    artifact = document_processor.get_result(request_id)
+    if artifact is None:
+        request_status = await document_processor.get_request_status(request_id)
+        if request_status is not None and request_status.status == "failed":
+            # A failed request will never have a document, so clients must not keep polling for it
+            raise ResourceNotFoundError(
+                "Generation result",
+                request_id,
+                message=f"Generation request failed: {request_status.error or 'unknown error'}",
+                details={"status": "failed", "error": request_status.error},
+            )
+        if request_status is not None and request_status.status != "completed":
+            raise ConflictError(
+                "Generation request has not completed",
+                details={"request_id": request_id, "status": request_status.status},
+            )
+        raise ResourceNotFoundError("Generation result", request_id)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), artifact.encodings)
+    headers = {
+        "etag": artifact.variant_etag(encoding),
+        "vary": "Accept-Encoding",
+        "cache-control": "private, no-cache",
+    }
+    if encoding:
+        headers["content-encoding"] = encoding
+    if etag_matches(request.headers.get("if-none-match"), headers["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(
+        document_processor.result_path(artifact, encoding),
+        media_type=artifact.media_type,
+        filename=artifact.filename,
+        headers=headers,
+    )
@@ -3,12 +3,14 @@
 Provides endpoints for monitoring service health and availability."""
 
 import logging
+from typing import Literal
 
 from fastapi import APIRouter, status
 from opentelemetry import trace
 from pydantic import BaseModel, Field
 
 from app.config import settings
+from app.services.document_processor import document_processor
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,11 @@ class HealthResponse(BaseModel):
     version: str = Field(
         ..., description="Current service version (semantic versioning)", json_schema_extra={"example": "0.1.0"}
     )
+    model_circuit: Literal["closed", "open", "half_open"] = Field(
+        ...,
+        description="Circuit breaker state of the model endpoint. While 'open', new generation requests fail fast.",
+        json_schema_extra={"example": "closed"},
+    )
 
 
 router = APIRouter(
@@ -43,7 +50,9 @@ router = APIRouter(
     responses={
         200: {
             "description": "Service is healthy",
-            "content": {"application/json": {"example": {"status": "ok", "version": "0.1.0"}}},
+            "content": {
+                "application/json": {"example": {"status": "ok", "version": "0.1.0", "model_circuit": "closed"}}
+            },
         }
     },
 )
@@ -72,11 +81,14 @@ async def health_check() -> HealthResponse:
             logger.debug("Health check requested")
 
             # Return the response in the format specified in the plan
-            response = HealthResponse(status="ok", version=settings.VERSION)
+            response = HealthResponse(
+                status="ok", version=settings.VERSION, model_circuit=document_processor.model_circuit_state
+            )
 
             # Add response attributes to span
             span.set_attribute("health.status", response.status)
             span.set_attribute("health.version", response.version)
+            span.set_attribute("health.model_circuit", response.model_circuit)
 
             return response
         except Exception as e:
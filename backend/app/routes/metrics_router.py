@@ -0,0 +1,39 @@
+"""Router exposing operational metrics.
+
+Reports request counters and cache statistics for dashboards and debugging,
+and the model call budget shared by the workers on this node.
+"""
+
+from fastapi import APIRouter, Depends, status
+
+from app.dependencies.auth import verify_password
+from app.schemas.metrics_schema import MetricsResponse, ModelBudgetResponse
+from app.services.document_processor import document_processor
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    response_model=MetricsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get service metrics",
+    description="Return request counters and cache hit/miss statistics for this process.",
+    responses={401: {"description": "Invalid authentication credentials"}},
+)
+async def get_metrics(_: None = Depends(verify_password)) -> MetricsResponse:
+    """Return request counters and cache statistics."""
+    return MetricsResponse(**document_processor.metrics_snapshot())
+
+
+@router.get(
+    "/metrics/model-budget",
+    response_model=ModelBudgetResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get node-wide model budget",
+    description="Return the concurrency slots and token bucket shared by all worker processes on this node.",
+    responses={401: {"description": "Invalid authentication credentials"}},
+)
+async def get_model_budget(_: None = Depends(verify_password)) -> ModelBudgetResponse:
+    """Return the model call budget shared by the workers on this node."""
+    return ModelBudgetResponse(**await document_processor.model_budget_snapshot())
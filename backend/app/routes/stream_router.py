@@ -37,8 +37,12 @@ router = APIRouter()
     - `connected`: Initial connection established
     - `status`: Status change notification  
     - `progress`: Processing step update with current/total steps
+    - `queued`: Position in the queue while waiting for model capacity
+    - `map`: A group of chunks of oversized content was condensed, with `completed`/`total` groups
+    - `delta`: Batch of generated text, in `sequence` order, while the model is writing
     - `complete`: Generation finished successfully
     - `error`: Generation failed with error details
+    - `overflow`: The client fell behind and was disconnected; reconnect, or download the result once complete
     - `heartbeat`: Keep-alive signal
     
     **Client Example (JavaScript)**:
@@ -73,6 +77,18 @@ router = APIRouter()
                             "summary": "Progress update",
                             "value": 'event: progress\ndata: {"step": 3, "total": 10, "message": "Extracting text from documents..."}\n\n',
                         },
+                        "queued": {
+                            "summary": "Waiting for model capacity",
+                            "value": 'event: queued\ndata: {"position": 2, "timestamp": "2025-06-16T12:00:30Z"}\n\n',
+                        },
+                        "map": {
+                            "summary": "Oversized content condensed",
+                            "value": 'event: map\ndata: {"completed": 3, "total": 12, "chunks": ["9f2c41d07ab3e655"], "cached": false}\n\n',
+                        },
+                        "delta": {
+                            "summary": "Generated text",
+                            "value": 'event: delta\ndata: {"sequence": 0, "text": "# Quarterly summary\\n\\nRevenue grew "}\n\n',
+                        },
                         "complete": {
                             "summary": "Completion event",
                             "value": 'event: complete\ndata: {"status": "completed", "timestamp": "2025-06-16T12:05:00Z"}\n\n',
@@ -104,6 +120,9 @@ async def stream_generation_progress(request_id: str, _: None = Depends(verify_p
     - `connected`: Initial connection established
     - `status`: Current status update
     - `progress`: Processing progress update
+    - `queued`: Queue position while waiting for model capacity
+    - `map`: Progress of condensing content that exceeds the context window
+    - `delta`: Batch of generated text while the model is writing
     - `complete`: Generation completed successfully
     - `error`: Generation failed with error
     - `heartbeat`: Keep-alive signal (every 15 seconds)
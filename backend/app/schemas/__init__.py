@@ -7,7 +7,9 @@ from app.schemas.generate_schema import (
     GenerateResponse,
     FileInfo,
     GenerationStatus,
+    SheetInfo,
 )
+from app.schemas.metrics_schema import BudgetLeaseInfo, MetricsResponse, ModelBudgetResponse
 
 __all__ = [
     "AuthenticationInfo",
@@ -18,4 +20,8 @@ __all__ = [
     "GenerateResponse",
     "FileInfo",
     "GenerationStatus",
+    "SheetInfo",
+    "MetricsResponse",
+    "BudgetLeaseInfo",
+    "ModelBudgetResponse",
 ]
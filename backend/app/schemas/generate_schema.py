@@ -16,23 +16,49 @@ class GenerateRequest(BaseModel):
     output_format: Optional[Literal["markdown", "pdf", "docx"]] = Field(
         default="markdown", description="Desired output format for the generated document"
     )
+    semantic_cache: bool = Field(
+        default=False, description="Allow reusing a cached result generated for a near-identical description"
+    )
+    template: Optional[str] = Field(
+        default=None, max_length=100, description="Name of the prompt template, the default template if omitted"
+    )
+    interactive: bool = Field(
+        default=True,
+        description="Set to false for bulk jobs nobody waits on; they are generated through cheaper provider "
+        "batches and may take hours",
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
                 "description": "Generate a comprehensive summary of the quarterly financial report",
                 "output_format": "markdown",
+                "semantic_cache": False,
+                "template": "default",
+                "interactive": True,
             }
         }
     )
 
 
+class SheetInfo(BaseModel):
+    """Dimensions of a spreadsheet worksheet."""
+
+    name: str = Field(..., description="Worksheet name")
+    rows: int = Field(..., ge=0, description="Number of used rows")
+    columns: int = Field(..., ge=0, description="Number of used columns")
+
+
 class FileInfo(BaseModel):
     """Information about an uploaded file."""
 
     filename: str = Field(..., description="Original filename")
     content_type: str = Field(..., description="MIME type of the file")
     size: int = Field(..., ge=0, description="File size in bytes")
+    page_count: Optional[int] = Field(default=None, ge=0, description="Number of pages (worksheets for spreadsheets)")
+    word_count: Optional[int] = Field(default=None, ge=0, description="Estimated number of words")
+    row_count: Optional[int] = Field(default=None, ge=0, description="Number of rows in tabular files")
+    sheets: Optional[List[SheetInfo]] = Field(default=None, description="Worksheet dimensions for spreadsheets")
 
     @field_validator("size")
     @classmethod
@@ -61,7 +87,17 @@ class GenerateResponse(BaseModel):
                 "request_id": "123e4567-e89b-12d3-a456-426614174000",
                 "status": "accepted",
                 "stream_url": "/api/v1/generate/123e4567-e89b-12d3-a456-426614174000/stream",
-                "files_received": [{"filename": "report.pdf", "content_type": "application/pdf", "size": 1048576}],
+                "files_received": [
+                    {
+                        "filename": "report.pdf",
+                        "content_type": "application/pdf",
+                        "size": 1048576,
+                        "page_count": 12,
+                        "word_count": 4200,
+                        "row_count": None,
+                        "sheets": None,
+                    }
+                ],
                 "created_at": "2025-06-16T12:00:00Z",
             }
         }
@@ -78,6 +114,11 @@ class GenerationStatus(BaseModel):
     message: str = Field(default="", description="Current status message")
     error: Optional[str] = Field(default=None, description="Error message if failed")
     completed_at: Optional[datetime] = Field(default=None, description="Completion timestamp")
+    cache_status: Optional[Literal["hit", "semantic_hit", "coalesced", "miss"]] = Field(
+        default=None,
+        description="Whether the result came from the result cache (same or near-identical description), "
+        "from an identical request already in progress, or from a new generation",
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -89,6 +130,7 @@ class GenerationStatus(BaseModel):
                 "message": "Extracting text from documents...",
                 "error": None,
                 "completed_at": None,
+                "cache_status": "miss",
             }
         }
     )
@@ -0,0 +1,73 @@
+"""Schema definitions for the metrics endpoint."""
+
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class MetricsResponse(BaseModel):
+    """Operational counters and cache statistics of this process."""
+
+    counters: Dict[str, int] = Field(..., description="Monotonic counters such as cache hits and misses")
+    caches: Dict[str, Dict[str, int]] = Field(..., description="Statistics per cache")
+    limiter: Dict[str, int] = Field(..., description="Adaptive model concurrency limit, running and queued calls")
+    circuit: Dict[str, Union[str, int]] = Field(
+        ..., description="State and recent outcomes of the model circuit breaker"
+    )
+    deployments: Dict[str, Dict[str, float]] = Field(
+        ..., description="Context window, normalized first-token latency and running calls per deployment"
+    )
+    batch: Dict[str, int] = Field(
+        ..., description="Non-interactive calls waiting for a batch, running batches and the calls they carry"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "counters": {"requests.completed": 12, "result_cache.hits": 4, "result_cache.misses": 9},
+                "caches": {"result": {"entries": 8}, "chunk": {"hits": 310, "misses": 122, "entries": 122}},
+                "limiter": {"limit": 6, "in_flight": 6, "queued": 2},
+                "circuit": {"state": "closed", "recent_calls": 20, "recent_failures": 1, "times_opened": 0},
+                "deployments": {
+                    "gpt-4o-mini": {"context_tokens": 128000, "latency": 0.0412, "in_flight": 3},
+                    "gpt-4.1": {"context_tokens": 1000000, "latency": 0.0187, "in_flight": 2},
+                },
+                "batch": {"queued": 14, "batches": 1, "requests": 200},
+            }
+        }
+    )
+
+
+class BudgetLeaseInfo(BaseModel):
+    """A model call currently holding a slot of the node budget."""
+
+    pid: int = Field(..., description="Worker process holding the slot")
+    tokens: int = Field(..., description="Tokens drawn from the bucket for the call")
+    age_seconds: float = Field(..., description="Seconds since the slot was taken")
+
+
+class ModelBudgetResponse(BaseModel):
+    """Model call budget shared by all worker processes on this node."""
+
+    path: str = Field(..., description="State file shared by the workers")
+    max_concurrency: int = Field(..., description="Model calls allowed at once on the node, 0 for no limit")
+    in_use: int = Field(..., description="Model calls currently running on the node")
+    tokens_per_minute: int = Field(..., description="Token bucket refill rate, 0 for no limit")
+    tokens_available: Optional[int] = Field(None, description="Tokens currently in the bucket")
+    leases: List[BudgetLeaseInfo] = Field(default_factory=list, description="Calls currently holding a slot")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "path": "/tmp/md-decision-maker/model-budget.json",
+                "max_concurrency": 32,
+                "in_use": 2,
+                "tokens_per_minute": 300000,
+                "tokens_available": 271904,
+                "leases": [
+                    {"pid": 41, "tokens": 18311, "age_seconds": 4.2},
+                    {"pid": 43, "tokens": 9785, "age_seconds": 0.8},
+                ],
+            }
+        }
+    )
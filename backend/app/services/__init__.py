@@ -1,5 +1,6 @@
-"""Services package for business logic."""
+"""Services package for business logic.
 
-from app.services.document_processor import document_processor
-
-__all__ = ["document_processor"]
+The package imports nothing on its own: extraction worker processes import
+service modules by name and must not build a ``DocumentProcessor`` of their
+own. Import the shared processor from ``app.services.document_processor``.
+"""
@@ -0,0 +1,229 @@
+"""On-disk store of generated documents served by the result endpoint.
+
+Documents are written once and served straight from disk: the response
+streams the file, or hands it to the server with the ASGI ``pathsend``
+extension where the server supports it, so large outputs are never read
+into memory. Content is stored under its SHA-256 digest, which doubles as
+the strong ETag and lets identical documents, such as cache hits, share one
+file. Compressible documents also get a gzip variant written next to them at
+store time, so compression costs nothing per download. Each request only
+owns a small record pointing at its document.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_COPY_CHUNK = 1024 * 1024
+_PRUNE_INTERVAL = 3600.0
+
+# Output formats by file extension and media type; formats already compressed internally get no gzip variant
+FORMATS: Dict[str, Tuple[str, str, bool]] = {
+    "markdown": ("md", "text/markdown; charset=utf-8", True),
+    "pdf": ("pdf", "application/pdf", False),
+    "docx": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", False),
+}
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A stored document of a request."""
+
+    digest: str
+    filename: str
+    media_type: str
+    size: int
+    encodings: List[str]
+    created_at: float
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag of the identity representation."""
+        return f'"{self.digest}"'
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """Strong ETag of a representation; every encoding has its own bytes and so its own tag."""
+        return f'"{self.digest}-{encoding}"' if encoding else self.etag
+
+
+def choose_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """
+    Pick the stored encoding a client accepts, or None for the identity representation.
+
+    Encodings the client lists with ``q=0`` are refused, and ``*`` accepts any encoding.
+    """
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            accepted[coding.strip().lower()] = quality
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return whether an ``If-None-Match`` header matches an ETag, using the weak comparison it calls for."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class ArtifactStore:
+    """Content-addressed document files with per-request records."""
+
+    def __init__(self, directory: Path, ttl_seconds: float = 604800.0, compress_min_bytes: int = 1024) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding documents and request records
+            ttl_seconds: Seconds a request record is kept; documents no record points at are removed with it
+            compress_min_bytes: Smallest document that gets a gzip variant
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.compress_min_bytes = compress_min_bytes
+        self._blobs = directory / "blobs"
+        self._records = directory / "requests"
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._records.mkdir(parents=True, exist_ok=True)
+        self._pruned_at = 0.0
+
+    def path(self, artifact: Artifact, encoding: Optional[str] = None) -> Path:
+        """Return the file of an artifact, or of one of its encoded variants."""
+        name = artifact.digest + Path(artifact.filename).suffix
+        return self._blobs / (f"{name}.gz" if encoding == "gzip" else name)
+
+    def put_text(self, request_id: str, text: str) -> Artifact:
+        """Store a generated Markdown document for a request."""
+        fd, temp = tempfile.mkstemp(dir=self._blobs, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(text.encode("utf-8"))
+            return self.put_file(request_id, Path(temp), "markdown")
+        finally:
+            Path(temp).unlink(missing_ok=True)
+
+    def put_file(self, request_id: str, source: Path, output_format: str) -> Artifact:
+        """
+        Store a document file for a request, hashing and compressing it in chunks.
+
+        The source file is left in place.
+
+        Raises:
+            ValueError: If the output format is unknown
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        extension, media_type, compressible = FORMATS[output_format]
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            while block := f.read(_COPY_CHUNK):
+                digest.update(block)
+        artifact = Artifact(
+            digest=digest.hexdigest(),
+            filename=f"document.{extension}",
+            media_type=media_type,
+            size=source.stat().st_size,
+            encodings=["gzip"] if compressible and source.stat().st_size >= self.compress_min_bytes else [],
+            created_at=time.time(),
+        )
+
+        target = self.path(artifact)
+        for encoding in [None, *artifact.encodings]:
+            path = self.path(artifact, encoding)
+            if path.exists():
+                # A reused document counts as fresh, so pruning does not remove it before it is linked
+                os.utime(path)
+            else:
+                self._write_atomic(path, source if encoding is None else target, compress=encoding == "gzip")
+        self.link(request_id, artifact)
+        if time.time() - self._pruned_at >= _PRUNE_INTERVAL:
+            self.prune()
+        return artifact
+
+    def _write_atomic(self, target: Path, source: Path, compress: bool) -> None:
+        """Copy a file into place, optionally gzip-compressed, so readers never see a partial file."""
+        fd, temp = tempfile.mkstemp(dir=self._blobs, suffix=".tmp")
+        try:
+            with open(source, "rb") as src, os.fdopen(fd, "wb") as raw:
+                if compress:
+                    # mtime=0 keeps the variant, and with it its ETag, identical for identical content
+                    with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as dst:
+                        shutil.copyfileobj(src, dst, _COPY_CHUNK)
+                else:
+                    shutil.copyfileobj(src, raw, _COPY_CHUNK)
+            os.replace(temp, target)
+        finally:
+            Path(temp).unlink(missing_ok=True)
+
+    def link(self, request_id: str, artifact: Artifact) -> None:
+        """Point a request at an already stored document."""
+        record = self._records / f"{request_id}.json"
+        temp = record.with_suffix(".tmp")
+        temp.write_text(
+            json.dumps(
+                {
+                    "digest": artifact.digest,
+                    "filename": artifact.filename,
+                    "media_type": artifact.media_type,
+                    "size": artifact.size,
+                    "encodings": artifact.encodings,
+                    "created_at": time.time(),
+                }
+            ),
+            encoding="utf-8",
+        )
+        os.replace(temp, record)
+
+    def get(self, request_id: str) -> Optional[Artifact]:
+        """Return the document of a request, or None if it has none or it expired."""
+        try:
+            data = json.loads((self._records / f"{request_id}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        artifact = Artifact(**data)
+        if time.time() - artifact.created_at > self.ttl_seconds or not self.path(artifact).exists():
+            return None
+        return artifact
+
+    def prune(self) -> None:
+        """Remove expired request records and the documents no remaining record points at."""
+        now = self._pruned_at = time.time()
+        live = set()
+        for record in self._records.glob("*.json"):
+            try:
+                if now - record.stat().st_mtime > self.ttl_seconds:
+                    record.unlink()
+                    continue
+                live.add(json.loads(record.read_text(encoding="utf-8"))["digest"])
+            except (OSError, ValueError, KeyError):
+                continue
+        for blob in self._blobs.iterdir():
+            # Temp files of writes still in progress are left alone until they are old
+            if blob.name.split(".", 1)[0] in live or now - blob.stat().st_mtime <= self.ttl_seconds:
+                continue
+            blob.unlink(missing_ok=True)
+            logger.info("Removed expired artifact", extra={"file": blob.name})
@@ -0,0 +1,169 @@
+"""Aggregation of non-interactive model calls into provider batch jobs.
+
+Bulk runs that nobody watches live should not compete with interactive users
+for the real-time quota. Their calls are queued here instead and submitted
+together as one batch job once enough have accumulated or the oldest has
+waited long enough. Batch jobs run against a separate, cheaper quota and
+finish within the completion window; the queue polls each job and resolves
+every caller with its own completion, matched by custom ID.
+
+Running batches are tracked in memory only, like the requests waiting on
+them. A restart abandons them: the provider still runs and bills the jobs,
+but their results are never collected. The batch IDs are logged at
+submission so abandoned jobs can be found and cancelled by hand.
+"""
+
+import asyncio
+import itertools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.exceptions import ExternalServiceError
+from app.services.metrics import metrics
+from app.services.model_client import SERVICE_NAME, ModelClient
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Batch statuses after which a job makes no further progress
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+@dataclass
+class _Pending:
+    """A queued call and the future its caller awaits."""
+
+    custom_id: str
+    messages: List[Dict[str, str]]
+    max_tokens: int
+    future: "asyncio.Future[str]"
+
+
+class BatchQueue:
+    """Collect completions into batch jobs and fan the results back out to their callers."""
+
+    def __init__(
+        self,
+        client: Callable[[], ModelClient],
+        deployment: Optional[str] = None,
+        max_requests: int = 200,
+        max_wait: float = 30.0,
+        poll_interval: float = 60.0,
+        timeout: float = 86400.0,
+    ) -> None:
+        """
+        Initialize the queue.
+
+        Args:
+            client: Returns the model client batches are submitted with
+            deployment: Batch deployment, the client's default deployment if not given
+            max_requests: Calls that trigger a submission without waiting further
+            max_wait: Seconds the oldest queued call waits for others to join its batch
+            poll_interval: Seconds between status checks of a running batch
+            timeout: Seconds after which a batch that has not finished is abandoned
+        """
+        self._client = client
+        self.deployment = deployment
+        self.max_requests = max_requests
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._ids = itertools.count()
+        # Holds running batch tasks so they are not garbage collected
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._running: Dict[str, int] = {}  # Batch id -> calls it carries
+
+    async def complete(self, request_id: str, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        """
+        Queue a completion for the next batch and wait for its text.
+
+        Raises:
+            ExternalServiceError: If the batch or this completion in it failed
+        """
+        loop = asyncio.get_running_loop()
+        item = _Pending(f"{request_id}-{next(self._ids)}", messages, max_tokens, loop.create_future())
+        self._pending.append(item)
+        if len(self._pending) >= self.max_requests:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+        return await item.future
+
+    def flush(self) -> None:
+        """Submit the queued calls as a batch now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items = [item for item in self._pending if not item.future.done()]
+        self._pending = []
+        if not items:
+            return
+        task = asyncio.create_task(self._run(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: List[_Pending]) -> None:
+        """Submit one batch, wait for it to finish and resolve its callers."""
+        batch_id = ""
+        try:
+            client = self._client()
+            batch_id = await client.submit_batch(
+                [(item.custom_id, item.messages, item.max_tokens) for item in items], deployment=self.deployment
+            )
+            self._running[batch_id] = len(items)
+            metrics.increment("batch.submitted")
+            metrics.increment("batch.requests", len(items))
+            logger.info("Submitted model batch", extra={"batch_id": batch_id, "requests": len(items)})
+
+            batch = await self._wait(client, batch_id)
+            # Expired and cancelled jobs still report the completions they finished
+            output_file_id = batch.get("output_file_id")
+            results = await client.batch_results(output_file_id) if output_file_id else {}
+            for item in items:
+                if item.future.done():
+                    continue
+                if item.custom_id in results:
+                    item.future.set_result(results[item.custom_id])
+                else:
+                    item.future.set_exception(
+                        ExternalServiceError(
+                            SERVICE_NAME,
+                            message=f"Batch completion failed (batch status: {batch.get('status')})",
+                            details={"batch_id": batch_id},
+                        )
+                    )
+            logger.info(
+                "Finished model batch",
+                extra={"batch_id": batch_id, "status": batch.get("status"), "completed": len(results)},
+            )
+        except Exception as e:
+            logger.error("Model batch failed", extra={"batch_id": batch_id, "error": str(e)})
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        finally:
+            self._running.pop(batch_id, None)
+
+    async def _wait(self, client: ModelClient, batch_id: str) -> Dict[str, Any]:
+        """Poll a batch until it reaches a terminal status."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            batch = await client.get_batch(batch_id)
+            if batch.get("status") in TERMINAL_STATUSES:
+                return batch
+            if loop.time() >= deadline:
+                raise ExternalServiceError(
+                    SERVICE_NAME, message="Batch did not finish in time", details={"batch_id": batch_id}
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, int]:
+        """Return queued calls, running batches and the calls they carry."""
+        return {
+            "queued": sum(1 for item in self._pending if not item.future.done()),
+            "batches": len(self._running),
+            "requests": sum(self._running.values()),
+        }
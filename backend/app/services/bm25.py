@@ -0,0 +1,91 @@
+"""In-memory BM25 index over the chunks of a single request.
+
+Postings are stored per term in parallel ``array`` columns (chunk position
+and term frequency) rather than as Python objects, so indexing hundreds of
+pages allocates a few arrays per distinct term and scoring is a tight loop
+over machine integers.
+"""
+
+import math
+from array import array
+from collections import Counter
+from typing import Dict, List, Sequence
+
+from app.services.chunking import Chunk
+from app.services.outline import words
+
+
+class BM25Index:
+    """Okapi BM25 ranking over a fixed list of texts."""
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.2, b: float = 0.75) -> None:
+        """
+        Build the index.
+
+        Args:
+            texts: Texts to index; scores are returned in the same order
+            k1: Term frequency saturation
+            b: Strength of document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._lengths = array("I")
+        self._vocabulary: Dict[str, int] = {}
+        self._postings: List["array[int]"] = []
+        self._frequencies: List["array[int]"] = []
+
+        for position, text in enumerate(texts):
+            tokens = words(text)
+            self._lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                term_id = self._vocabulary.get(term)
+                if term_id is None:
+                    term_id = self._vocabulary[term] = len(self._postings)
+                    self._postings.append(array("I"))
+                    self._frequencies.append(array("I"))
+                self._postings[term_id].append(position)
+                self._frequencies[term_id].append(frequency)
+
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    def __len__(self) -> int:
+        """Return the number of indexed texts."""
+        return len(self._lengths)
+
+    @property
+    def vocabulary_size(self) -> int:
+        """Return the number of distinct indexed terms."""
+        return len(self._vocabulary)
+
+    def idf(self, term: str) -> float:
+        """Return the inverse document frequency of a normalized term."""
+        term_id = self._vocabulary.get(term)
+        frequency = len(self._postings[term_id]) if term_id is not None else 0
+        return math.log(1 + (len(self) - frequency + 0.5) / (frequency + 0.5))
+
+    def score(self, query: str) -> List[float]:
+        """
+        Score every indexed text against a query.
+
+        Returns:
+            One score per indexed text, zero for texts sharing no term with the query
+        """
+        scores = [0.0] * len(self)
+        if not self._average_length:
+            return scores
+
+        norms = [self.k1 * (1 - self.b + self.b * length / self._average_length) for length in self._lengths]
+        for term in set(words(query)):
+            term_id = self._vocabulary.get(term)
+            if term_id is None:
+                continue
+            weight = self.idf(term) * (self.k1 + 1)
+            for position, frequency in zip(self._postings[term_id], self._frequencies[term_id]):
+                scores[position] += weight * frequency / (frequency + norms[position])
+        return scores
+
+
+def score_chunks(chunks: Sequence[Chunk], query: str) -> Dict[str, float]:
+    """Return the BM25 score of each chunk against a query, keyed by chunk id."""
+    index = BM25Index([chunk.text for chunk in chunks])
+    return {chunk.chunk_id: score for chunk, score in zip(chunks, index.score(query))}
@@ -0,0 +1,95 @@
+"""Detection of running headers, footers and other per-page boilerplate.
+
+Corporate documents repeat page numbers, running titles and legal notices on
+every page. Lines near the top and bottom of each page are normalized and
+hashed together with their distance from that edge; a line that shows up at
+the same place on a large share of the pages is treated as boilerplate and
+excluded before the content is prepared for the model. Numbers are only
+folded in short lines such as page numbers and dates, so body text that
+differs in its figures is never mistaken for a running header.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Dict, FrozenSet, Set, Tuple
+
+from app.services.text_store import TextStore
+
+_DIGITS = re.compile(r"\d+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Lines up to this length have their numbers folded, which covers page numbers and dates
+SHORT_LINE_CHARS = 40
+
+
+@dataclass(frozen=True)
+class BoilerplateReport:
+    """Paragraphs identified as boilerplate in a single document."""
+
+    paragraphs: FrozenSet[int]
+    bytes_removed: int
+
+
+def _line_hash(text: str) -> int:
+    """Hash a line after folding case, whitespace and, in short lines, numbers (page numbers, dates)."""
+    normalized = _WHITESPACE.sub(" ", text.lower()).strip()
+    if len(normalized) <= SHORT_LINE_CHARS:
+        normalized = _DIGITS.sub("#", normalized)
+    return int.from_bytes(blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def find_boilerplate(
+    store: TextStore,
+    edge_lines: int = 3,
+    min_page_ratio: float = 0.5,
+    min_pages: int = 3,
+) -> BoilerplateReport:
+    """
+    Find paragraphs that repeat at the edges of many pages.
+
+    Args:
+        store: Extracted document
+        edge_lines: Number of paragraphs at the top and bottom of each page to inspect
+        min_page_ratio: Share of pages a line must appear on to count as boilerplate
+        min_pages: Documents with fewer pages are left untouched; so are pages too short to
+            have body text between their top and bottom edge lines
+
+    Returns:
+        Report with the boilerplate paragraph indices and the bytes they occupy
+    """
+    if store.page_count < min_pages:
+        return BoilerplateReport(paragraphs=frozenset(), bytes_removed=0)
+
+    # Table rows legitimately repeat (column headers across sheets), and titles such as default
+    # sheet names (Sheet1, Sheet2, ...) only differ in their numbers, so keep both
+    kept = store.table_paragraphs() | store.title_paragraphs()
+    edge_hashes: Dict[int, Tuple[int, int]] = {}
+    page_frequency: Counter[Tuple[int, int]] = Counter()
+    for page in range(store.page_count):
+        paragraphs = store.page_paragraphs(page)
+        if len(paragraphs) <= 2 * edge_lines:
+            # Head and tail would cover the whole page, body text included
+            continue
+        # Positions count from the top (0, 1, ...) and from the bottom (-1, -2, ...)
+        edges = [(index, position) for position, index in enumerate(paragraphs[:edge_lines])]
+        edges += [(index, position - edge_lines) for position, index in enumerate(paragraphs[-edge_lines:])]
+        seen_on_page: Set[Tuple[int, int]] = set()
+        for index, position in edges:
+            if index in kept:
+                continue
+            key = (position, _line_hash(store.paragraph(index)))
+            edge_hashes[index] = key
+            seen_on_page.add(key)
+        page_frequency.update(seen_on_page)
+
+    threshold = max(min_pages, min_page_ratio * store.page_count)
+    repeated = {key for key, count in page_frequency.items() if count >= threshold}
+    boilerplate = frozenset(index for index, key in edge_hashes.items() if key in repeated)
+
+    bytes_removed = 0
+    for index in boilerplate:
+        start, end = store.paragraph_span(index)
+        bytes_removed += end - start
+    return BoilerplateReport(paragraphs=boilerplate, bytes_removed=bytes_removed)
@@ -0,0 +1,107 @@
+"""Process-wide cache for per-chunk work.
+
+Content-defined chunk identities survive small document edits, so work done
+for a chunk (normalization, embeddings, summaries) can be reused when a
+revised version of the same document is uploaded again.
+
+Kinds of work differ widely in cost: a map note takes a model call, a token
+count a few microseconds. Expensive kinds can therefore be given their own
+bounded LRU, so a stream of cheap entries never evicts them.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_SHARED = ""
+
+
+class ChunkCache:
+    """Thread-safe LRU cache keyed by ``(kind, chunk_id)``."""
+
+    def __init__(self, max_entries: int = 10_000, kind_limits: Optional[Dict[str, int]] = None) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results across all kinds without their own limit
+            kind_limits: Kinds kept in their own LRU, with the maximum number of results of each
+        """
+        self._limits = {_SHARED: max_entries, **(kind_limits or {})}
+        self._entries: Dict[str, "OrderedDict[Tuple[str, Hashable], Any]"] = {
+            partition: OrderedDict() for partition in self._limits
+        }
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _partition(self, kind: str) -> str:
+        return kind if kind in self._limits else _SHARED
+
+    def _store(self, kind: str, key: Hashable, value: Any) -> None:
+        """Store a result and evict the least recently used ones of its partition; the lock must be held."""
+        partition = self._partition(kind)
+        entries = self._entries[partition]
+        entries[(kind, key)] = value
+        entries.move_to_end((kind, key))
+        while len(entries) > self._limits[partition]:
+            entries.popitem(last=False)
+
+    def get_or_compute(self, kind: str, key: Hashable, compute: Callable[[], T]) -> T:
+        """
+        Return the cached result for a chunk, computing and storing it on a miss.
+
+        Args:
+            kind: Kind of work, such as ``"normalized"`` or ``"embedding"``
+            key: Chunk identity, optionally combined with a version
+            compute: Function producing the result on a miss
+        """
+        cache_key = (kind, key)
+        with self._lock:
+            entries = self._entries[self._partition(kind)]
+            if cache_key in entries:
+                entries.move_to_end(cache_key)
+                self.hits += 1
+                return entries[cache_key]  # type: ignore[no-any-return]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._store(kind, key, value)
+        return value
+
+    def get(self, kind: str, key: Hashable) -> Optional[Any]:
+        """Return a cached result, or None on a miss; for results computed asynchronously."""
+        cache_key = (kind, key)
+        with self._lock:
+            entries = self._entries[self._partition(kind)]
+            if cache_key in entries:
+                entries.move_to_end(cache_key)
+                self.hits += 1
+                return entries[cache_key]
+            self.misses += 1
+            return None
+
+    def put(self, kind: str, key: Hashable, value: Any) -> None:
+        """Store a result computed outside ``get_or_compute``."""
+        with self._lock:
+            self._store(kind, key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(entries) for entries in self._entries.values()),
+            }
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+            self.hits = 0
+            self.misses = 0
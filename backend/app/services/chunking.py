@@ -0,0 +1,146 @@
+"""Content-defined chunking of extracted documents.
+
+Chunk boundaries are chosen where a hash of the preceding window of bytes
+hits a target pattern, rather than at fixed offsets. An edit therefore only
+moves the boundaries next to it, and every unchanged region of a revised
+document produces the same chunk identities as before, so per-chunk work can
+be served from the ``ChunkCache``.
+"""
+
+import functools
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import List, Mapping, Optional, Set
+
+from app.services.chunk_cache import ChunkCache
+from app.services.text_store import TextStore
+
+# Bytes hashed before each candidate boundary
+WINDOW_SIZE = 32
+
+# Boundaries are only considered after whitespace so words are never split
+_CANDIDATES = re.compile(rb"\s")
+_SPACES = re.compile(r"[ \t ]+")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A content-addressed slice of a document."""
+
+    chunk_id: str
+    document: str
+    index: int
+    text: str
+
+
+def chunk_boundaries(data: bytes, min_size: int = 512, avg_size: int = 2048, max_size: int = 8192) -> List[int]:
+    """
+    Compute content-defined chunk end offsets for a buffer.
+
+    A whitespace position ends a chunk when the CRC of the ``WINDOW_SIZE``
+    bytes before it is divisible by a divisor derived from ``avg_size``.
+    Newlines use a smaller divisor, so chunks prefer to end on paragraph
+    boundaries. Chunks are never shorter than ``min_size`` (except the last)
+    nor longer than ``max_size``.
+
+    Returns:
+        Sorted end offsets; the last one is ``len(data)``
+    """
+    if not data:
+        return []
+
+    # Roughly one candidate every six bytes of prose
+    divisor = max((avg_size - min_size) // 6, 1)
+    newline_divisor = max(divisor // 8, 1)
+
+    cuts: List[int] = []
+    start = 0
+    for match in _CANDIDATES.finditer(data):
+        position = match.end()
+        while position - start > max_size:
+            start = _forced_cut(data, start, min_size, max_size)
+            cuts.append(start)
+        if position - start < min_size:
+            continue
+        window_hash = zlib.crc32(data[max(position - WINDOW_SIZE, 0) : position])
+        if window_hash % (newline_divisor if match.group() == b"\n" else divisor) == 0:
+            cuts.append(position)
+            start = position
+
+    while len(data) - start > max_size:
+        start = _forced_cut(data, start, min_size, max_size)
+        cuts.append(start)
+    if start < len(data):
+        cuts.append(len(data))
+    return cuts
+
+
+def _forced_cut(data: bytes, start: int, min_size: int, max_size: int) -> int:
+    """Pick a cut for a region without a content-defined boundary."""
+    limit = start + max_size
+    space = data.rfind(b" ", start + min_size, limit)
+    if space >= 0:
+        return space + 1
+    # Never split a UTF-8 sequence
+    while limit > start + 1 and (data[limit] & 0xC0) == 0x80:
+        limit -= 1
+    return limit
+
+
+def normalize_text(text: str) -> str:
+    """Apply Unicode compatibility normalization and collapse runs of spaces."""
+    normalized = unicodedata.normalize("NFKC", text)
+    return "\n".join(_SPACES.sub(" ", line).strip() for line in normalized.split("\n")).strip()
+
+
+def chunk_id(data: bytes) -> str:
+    """Return the content identity of a chunk."""
+    return blake2b(data, digest_size=16).hexdigest()
+
+
+def chunk_documents(
+    documents: Mapping[str, TextStore],
+    excluded: Optional[Mapping[str, Set[int]]] = None,
+    cache: Optional[ChunkCache] = None,
+    min_size: int = 512,
+    avg_size: int = 2048,
+    max_size: int = 8192,
+) -> List[Chunk]:
+    """
+    Split the kept paragraphs of each document into content-defined chunks.
+
+    Args:
+        documents: Extracted documents keyed by filename
+        excluded: Paragraph indices to leave out per document
+        cache: Cache used to reuse normalization of previously seen chunks
+        min_size: Minimum chunk size in bytes
+        avg_size: Target average chunk size in bytes
+        max_size: Maximum chunk size in bytes
+
+    Returns:
+        Chunks of all documents in document order
+    """
+    excluded = excluded or {}
+    chunks: List[Chunk] = []
+    for name, store in documents.items():
+        skipped = excluded.get(name, set())
+        data = "\n".join(
+            store.paragraph(index) for index in range(store.paragraph_count) if index not in skipped
+        ).encode("utf-8")
+
+        start = 0
+        for index, end in enumerate(chunk_boundaries(data, min_size=min_size, avg_size=avg_size, max_size=max_size)):
+            raw = data[start:end]
+            identity = chunk_id(raw)
+            decoded = raw.decode("utf-8", errors="replace")
+            if cache is not None:
+                text = cache.get_or_compute("normalized", identity, functools.partial(normalize_text, decoded))
+            else:
+                text = normalize_text(decoded)
+            if text:
+                chunks.append(Chunk(chunk_id=identity, document=name, index=index, text=text))
+            start = end
+    return chunks
@@ -0,0 +1,136 @@
+"""Circuit breaker for the model endpoint.
+
+During an upstream outage every job would otherwise wait for its own
+timeouts, holding temp files and memory in a background task. The breaker
+tracks the outcome of recent calls and opens once the failure rate in that
+window passes a threshold; while open, calls and new jobs fail immediately
+with ``ExternalServiceError``. After a cooldown it lets a few probe calls
+through (half-open): a successful probe closes it again, a failed one
+reopens it for another cooldown.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Literal, Optional, Union
+
+from app.exceptions import ExternalServiceError
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with half-open probes."""
+
+    def __init__(
+        self,
+        service_name: str,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ) -> None:
+        """
+        Initialize the breaker.
+
+        Args:
+            service_name: Service reported in the raised errors
+            failure_rate: Share of failed calls in the window that opens the circuit
+            window: Number of most recent call outcomes considered
+            min_calls: Outcomes required before the failure rate is evaluated
+            open_seconds: Seconds the circuit stays open before probing
+            half_open_probes: Calls allowed at once while half-open
+        """
+        self.service_name = service_name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True for failures
+        self._opened_at = 0.0
+        self._is_open = False
+        self._probes = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state; an open circuit turns half-open once its cooldown has passed."""
+        if not self._is_open:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.open_seconds:
+            return "half_open"
+        return "open"
+
+    def _error(self) -> ExternalServiceError:
+        retry_in = max(self.open_seconds - (time.monotonic() - self._opened_at), 0.0)
+        return ExternalServiceError(
+            self.service_name,
+            message=f"Model endpoint is unavailable, retry in {retry_in:.0f}s",
+            details={"circuit": self.state, "retry_in_seconds": round(retry_in, 1)},
+        )
+
+    def check(self) -> None:
+        """
+        Fail fast while the circuit is open, without reserving a probe.
+
+        Raises:
+            ExternalServiceError: If the circuit is open
+        """
+        if self.state == "open":
+            raise self._error()
+
+    def before_call(self) -> bool:
+        """
+        Admit a call, reserving a probe while half-open.
+
+        Returns:
+            Whether the call is a probe
+
+        Raises:
+            ExternalServiceError: If the circuit is open or all probes are taken
+        """
+        state = self.state
+        if state == "open" or (state == "half_open" and self._probes >= self.half_open_probes):
+            raise self._error()
+        if state == "half_open":
+            self._probes += 1
+            return True
+        return False
+
+    def record(self, outcome: Optional[bool], probe: bool = False) -> None:
+        """
+        Record the outcome of an admitted call.
+
+        Args:
+            outcome: True if the call failed, False if it succeeded, None if it was abandoned
+            probe: Whether the call was admitted as a probe
+        """
+        if probe:
+            self._probes = max(self._probes - 1, 0)
+        if self._is_open:
+            # Calls admitted before the circuit opened do not decide when it closes
+            if outcome is None or not probe:
+                return
+            if outcome:
+                # A failed probe starts a new cooldown
+                self._opened_at = time.monotonic()
+            else:
+                self._is_open = False
+                self._outcomes.clear()
+            return
+        if outcome is None:
+            return
+        self._outcomes.append(outcome)
+        if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+            self._is_open = True
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+
+    def stats(self) -> Dict[str, Union[str, int]]:
+        """Return the state and recent outcomes."""
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": sum(self._outcomes),
+            "times_opened": self.times_opened,
+        }
@@ -0,0 +1,136 @@
+"""Adaptive concurrency limit for model calls.
+
+A fixed number of parallel model calls either leaves provider quota unused
+or, when set too high, triggers waves of 429 responses that all retry at
+once. The limiter instead adjusts the limit with additive increase and
+multiplicative decrease (AIMD): every call that finishes quickly raises the
+limit by roughly one per "round" of calls, while a throttled call or one
+slower than the latency target cuts it by a constant factor. A
+``Retry-After`` from the provider pauses new calls until it has passed.
+
+Callers that cannot start immediately wait in FIFO order and are told
+their position in the queue whenever it changes.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class _Waiter:
+    """A queued caller and the future it sleeps on until the limiter state changes."""
+
+    __slots__ = ("wake",)
+
+    def __init__(self) -> None:
+        self.wake: Optional["asyncio.Future[None]"] = None
+
+
+class AdaptiveLimiter:
+    """AIMD-controlled semaphore with a FIFO wait queue."""
+
+    def __init__(
+        self,
+        initial_limit: float = 4.0,
+        min_limit: float = 1.0,
+        max_limit: float = 64.0,
+        decrease_factor: float = 0.5,
+        latency_target: float = 10.0,
+    ) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Concurrent calls allowed before any feedback
+            min_limit: Lower bound of the limit
+            max_limit: Upper bound of the limit
+            decrease_factor: Factor applied to the limit on throttling or high latency
+            latency_target: Seconds above which a call counts as a congestion signal
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self._limit = min(max(initial_limit, min_limit), max_limit)
+        self._in_flight = 0
+        self._queue: Deque[_Waiter] = deque()
+        self._resume_at = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed to run concurrently."""
+        return max(int(self._limit), 1)
+
+    def _can_start(self, waiter: _Waiter) -> bool:
+        return self._queue[0] is waiter and self._in_flight < self.limit and time.monotonic() >= self._resume_at
+
+    def _notify(self) -> None:
+        """Wake every waiter so it re-checks its position and the free slots."""
+        for waiter in self._queue:
+            if waiter.wake is not None and not waiter.wake.done():
+                waiter.wake.set_result(None)
+
+    async def acquire(self, on_position: Optional[PositionCallback] = None) -> None:
+        """
+        Wait for a free slot.
+
+        Args:
+            on_position: Awaited with the 1-based queue position whenever it changes while waiting
+        """
+        waiter = _Waiter()
+        self._queue.append(waiter)
+        reported = 0
+        try:
+            while not self._can_start(waiter):
+                position = self._queue.index(waiter) + 1
+                if on_position is not None and position != reported:
+                    reported = position
+                    await on_position(position)
+                    continue
+                waiter.wake = asyncio.get_running_loop().create_future()
+                pause = self._resume_at - time.monotonic()
+                try:
+                    await asyncio.wait_for(waiter.wake, timeout=pause if pause > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._queue.remove(waiter)
+            self._notify()
+            raise
+        self._queue.popleft()
+        self._in_flight += 1
+        self._notify()
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without waiting, unless callers are queued or calls are paused."""
+        if self._queue or self._in_flight >= self.limit or time.monotonic() < self._resume_at:
+            return False
+        self._in_flight += 1
+        return True
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        """
+        Free a slot and adapt the limit.
+
+        Args:
+            latency: Seconds the call took to respond, if it responded
+            throttled: Whether the provider rejected the call with a rate limit
+        """
+        self._in_flight -= 1
+        if throttled or (latency is not None and latency > self.latency_target):
+            self._limit = max(self._limit * self.decrease_factor, self.min_limit)
+        elif latency is not None:
+            # One extra slot per round of successful calls at the current limit
+            self._limit = min(self._limit + 1.0 / self._limit, self.max_limit)
+        self._notify()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back new calls for ``seconds``, as requested by a provider ``Retry-After``."""
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the current limit, running calls and waiting callers."""
+        return {"limit": self.limit, "in_flight": self._in_flight, "queued": len(self._queue)}
@@ -0,0 +1,143 @@
+"""Near-duplicate paragraph elimination across the files of a request.
+
+Multi-version drafts uploaded together share most of their content. Each
+paragraph gets a MinHash signature over its word shingles; LSH banding finds
+candidate pairs without comparing every paragraph to every other one, and
+candidates whose estimated Jaccard similarity clears the threshold are
+dropped in favour of the first (canonical) copy. Table rows are left out:
+rows of a sheet share their layout and most of their values, so distinct
+records would look like near-duplicates of each other.
+"""
+
+import random
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from app.services.text_store import TextStore
+
+_WORD = re.compile(r"\w+")
+
+# Mersenne prime used for the universal hash family
+_PRIME = (1 << 61) - 1
+
+
+@dataclass(frozen=True)
+class ParagraphRef:
+    """Location of a paragraph within the request's documents."""
+
+    document: str
+    paragraph: int
+
+
+@dataclass(frozen=True)
+class DuplicateRecord:
+    """A paragraph dropped as a near-duplicate of an earlier one."""
+
+    duplicate: ParagraphRef
+    canonical: ParagraphRef
+    similarity: float
+
+
+class MinHasher:
+    """Computes MinHash signatures over word shingles."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1) -> None:
+        """
+        Initialize the hasher.
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            shingle_size: Number of consecutive words per shingle
+            seed: Seed for the permutation coefficients
+        """
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> Set[int]:
+        """Return the hashed word shingles of a text."""
+        words = _WORD.findall(text.lower())
+        size = min(self.shingle_size, len(words))
+        return {zlib.crc32(" ".join(words[i : i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """Return the MinHash signature of a text, or None if it has no words."""
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        return tuple(min((a * x + b) % _PRIME for x in shingles) for a, b in self._coefficients)
+
+
+def estimate_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+def find_near_duplicates(
+    documents: Mapping[str, TextStore],
+    excluded: Optional[Mapping[str, Set[int]]] = None,
+    threshold: float = 0.8,
+    min_words: int = 8,
+    num_perm: int = 64,
+    bands: int = 16,
+) -> List[DuplicateRecord]:
+    """
+    Find paragraphs that nearly duplicate an earlier paragraph of the request.
+
+    Documents are scanned in mapping order, so the first occurrence of a
+    passage is kept as the canonical copy. Only prose is compared; table rows
+    are data records and are never dropped.
+
+    Args:
+        documents: Extracted documents keyed by filename
+        excluded: Paragraphs already excluded per document, which are skipped
+        threshold: Minimum estimated Jaccard similarity to count as a duplicate
+        min_words: Paragraphs with fewer words are too short to deduplicate
+        num_perm: MinHash signature length
+        bands: Number of LSH bands; must divide ``num_perm``
+
+    Returns:
+        One record per duplicate paragraph
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be divisible by bands")
+
+    rows = num_perm // bands
+    hasher = MinHasher(num_perm=num_perm)
+    excluded = excluded or {}
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[ParagraphRef]] = {}
+    signatures: Dict[ParagraphRef, Tuple[int, ...]] = {}
+    duplicates: List[DuplicateRecord] = []
+
+    for name, store in documents.items():
+        skipped = excluded.get(name, set()) | store.table_paragraphs()
+        for index in range(store.paragraph_count):
+            if index in skipped:
+                continue
+            text = store.paragraph(index)
+            if len(_WORD.findall(text)) < min_words:
+                continue
+            signature = hasher.signature(text)
+            if signature is None:
+                continue
+
+            ref = ParagraphRef(document=name, paragraph=index)
+            keys = [(band, signature[band * rows : (band + 1) * rows]) for band in range(bands)]
+            best: Optional[Tuple[float, ParagraphRef]] = None
+            for key in keys:
+                for candidate in buckets.get(key, ()):
+                    similarity = estimate_similarity(signature, signatures[candidate])
+                    if best is None or similarity > best[0]:
+                        best = (similarity, candidate)
+
+            if best is not None and best[0] >= threshold:
+                duplicates.append(DuplicateRecord(duplicate=ref, canonical=best[1], similarity=best[0]))
+                continue
+
+            signatures[ref] = signature
+            for key in keys:
+                buckets.setdefault(key, []).append(ref)
+    return duplicates
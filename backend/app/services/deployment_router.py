@@ -0,0 +1,134 @@
+"""Latency-aware routing of model calls across deployments.
+
+A one-page CSV summary should not queue behind 100k-token annual reports on
+the same deployment. Every call is routed to one of the configured
+deployments whose context window fits its prompt and output. Among those,
+the router picks the lowest predicted latency. A deployment's recent
+first-token time is tracked as an exponentially weighted moving average
+(EWMA), normalized by prompt size. The prediction scales that average by the
+call's size and by the calls already running on the deployment. Failed and
+throttled calls count as a fixed, slow sample, so a deployment that errors is
+avoided rather than looking fast for want of successful calls. Ties go to
+the smaller context window, which is the cheaper deployment.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Union
+
+# Prompt tokens per unit of size in the normalized latency
+_TOKENS_PER_UNIT = 1000
+
+
+@dataclass(frozen=True)
+class Deployment:
+    """A model deployment and its context window."""
+
+    name: str
+    context_tokens: int
+
+
+def parse_deployments(spec: str, default_name: str, default_context_tokens: int) -> List[Deployment]:
+    """
+    Parse a ``name=context_tokens`` list such as ``"gpt-4o-mini=128000,gpt-4.1=1000000"``.
+
+    Names without a context size use ``default_context_tokens``; an empty
+    spec yields the single default deployment.
+
+    Raises:
+        ValueError: If a context size is not a positive integer
+    """
+    deployments = []
+    for item in spec.split(","):
+        name, _, context = item.strip().partition("=")
+        if not name:
+            continue
+        context_tokens = int(context) if context.strip() else default_context_tokens
+        if context_tokens <= 0:
+            raise ValueError(f"Context size of deployment {name!r} must be positive")
+        deployments.append(Deployment(name=name.strip(), context_tokens=context_tokens))
+    return deployments or [Deployment(name=default_name, context_tokens=default_context_tokens)]
+
+
+def _size(input_tokens: int) -> float:
+    return 1.0 + input_tokens / _TOKENS_PER_UNIT
+
+
+class DeploymentRouter:
+    """Choose a deployment per call from context fit, recent latency and current load."""
+
+    def __init__(
+        self, deployments: Sequence[Deployment], smoothing: float = 0.2, failure_penalty: float = 30.0
+    ) -> None:
+        """
+        Initialize the router.
+
+        Args:
+            deployments: Deployments calls may be routed to
+            smoothing: Weight of a new latency sample in the moving average
+            failure_penalty: Seconds recorded as the first-token time of a failed call
+        """
+        if not deployments:
+            raise ValueError("At least one deployment is required")
+        self.deployments = list(deployments)
+        self.smoothing = smoothing
+        self.failure_penalty = failure_penalty
+        # Deployments without samples predict zero latency, so each is tried before it is judged
+        self._latency: Dict[str, float] = {deployment.name: 0.0 for deployment in deployments}
+        self._in_flight: Dict[str, int] = {deployment.name: 0 for deployment in deployments}
+
+    @property
+    def context_tokens(self) -> int:
+        """Largest context window of the deployments, the most a single call can use."""
+        return max(deployment.context_tokens for deployment in self.deployments)
+
+    def predicted_latency(self, deployment: Deployment, input_tokens: int) -> float:
+        """Predict the first-token time of a call on a deployment."""
+        return self._latency[deployment.name] * _size(input_tokens) * (1 + self._in_flight[deployment.name])
+
+    def choose(self, input_tokens: int, output_tokens: int) -> Deployment:
+        """
+        Pick the deployment for a call.
+
+        Calls that fit no deployment go to the one with the largest context window.
+        """
+        fitting = [d for d in self.deployments if input_tokens + output_tokens <= d.context_tokens]
+        if not fitting:
+            return max(self.deployments, key=lambda d: d.context_tokens)
+        return min(fitting, key=lambda d: (self.predicted_latency(d, input_tokens), d.context_tokens))
+
+    def started(self, deployment: Deployment) -> None:
+        """Count a call running on a deployment."""
+        self._in_flight[deployment.name] += 1
+
+    def finished(
+        self, deployment: Deployment, input_tokens: int, latency: Union[float, None], failed: bool = False
+    ) -> None:
+        """
+        Record the end of a call.
+
+        Args:
+            deployment: Deployment the call ran on
+            input_tokens: Prompt tokens of the call
+            latency: Seconds to the first token, or None if the call produced none
+            failed: Whether the call failed or was throttled; it then counts as ``failure_penalty``
+        """
+        self._in_flight[deployment.name] -= 1
+        if failed:
+            sample = self.failure_penalty
+        elif latency is None:
+            return
+        else:
+            sample = latency / _size(input_tokens)
+        previous = self._latency[deployment.name]
+        self._latency[deployment.name] = sample if not previous else previous + self.smoothing * (sample - previous)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return per-deployment normalized latency and running calls."""
+        return {
+            deployment.name: {
+                "context_tokens": deployment.context_tokens,
+                "latency": round(self._latency[deployment.name], 4),
+                "in_flight": self._in_flight[deployment.name],
+            }
+            for deployment in self.deployments
+        }
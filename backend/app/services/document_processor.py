@@ -1,20 +1,84 @@
 """Document processing service for handling file uploads and generation."""
 
 import asyncio
+import functools
+import hashlib
 import uuid
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import List, Dict, Optional, AsyncGenerator
+from typing import Any, Awaitable, Callable, List, Dict, Literal, Optional, AsyncGenerator, AsyncIterator, Set, Tuple
 from pathlib import Path
 import tempfile
 import json
 
+import httpx
 from fastapi import UploadFile
 
-from app.schemas.generate_schema import FileInfo, GenerationStatus
+from app.config import settings
+from app.exceptions import ConfigurationError, ExternalServiceError, RateLimitError, ValidationError
+from app.schemas.generate_schema import FileInfo, GenerationStatus, SheetInfo
+from app.services.artifact_store import Artifact, ArtifactStore
+from app.services.batch_queue import BatchQueue
+from app.services.bm25 import score_chunks
+from app.services.boilerplate import find_boilerplate
+from app.services.chunk_cache import ChunkCache
+from app.services.chunking import Chunk, chunk_documents
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+from app.services.concurrency import AdaptiveLimiter
+from app.services.deduplication import DuplicateRecord, find_near_duplicates
+from app.services.deployment_router import Deployment, DeploymentRouter, parse_deployments
+from app.services.embeddings import EmbeddingMatrix, EmbeddingStore, HashingEmbedder, file_hash
+from app.services.hedging import HedgeBudget, LatencyBuckets, hedged
+from app.services.map_reduce import MAP_PROMPT_VERSION, group_chunks, group_key, map_messages, notes_chunk
+from app.services.model_client import SERVICE_NAME as MODEL_SERVICE_NAME, ModelClient, is_outage
+from app.services.metrics import metrics
+from app.services.model_stand_in import create_stand_in_app
+from app.services.node_budget import BudgetLease, NodeBudget
+from app.services.prompt_templates import DEFAULT_TEMPLATE_DIR, PromptTemplate, TemplateRegistry
+from app.services.result_cache import (
+    RequestCacheKey,
+    ResultCache,
+    description_words,
+    embed_description,
+    result_key,
+    scope_key,
+)
+from app.services.sections import format_sources, outline_messages, parse_outline, section_messages, section_sources
+from app.services.summarizer import compress_chunks
+from app.services.text_extraction import ExtractionPool
+from app.services.text_store import TextStore
+from app.services.token_packer import PackingStats, chunk_tokens, count_tokens, pack_chunks
+from app.utils.file_probe import probe_file
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# A server-sent event as queued for subscribers: its ``event`` name and JSON ``data``
+Event = Dict[str, str]
+
+
+@dataclass
+class PipelineContext:
+    """State carried between the processing steps of a single request."""
+
+    request_id: str
+    description: str
+    output_format: str
+    files: List[Path]
+    file_hashes: Dict[str, str] = field(default_factory=dict)  # File name -> SHA-256 of its content
+    documents: Dict[str, TextStore] = field(default_factory=dict)
+    excluded: Dict[str, Set[int]] = field(default_factory=dict)
+    duplicates: List[DuplicateRecord] = field(default_factory=list)
+    chunks: List[Chunk] = field(default_factory=list)
+    scores: Dict[str, float] = field(default_factory=dict)
+    map_groups: List[List[Chunk]] = field(default_factory=list)
+    packed: List[Chunk] = field(default_factory=list)
+    packing: Optional[PackingStats] = None
+    output: str = ""
+    cache: Optional[RequestCacheKey] = None
+    template: Optional[PromptTemplate] = None
+    interactive: bool = True
+
 
 class DocumentProcessor:
     """Service for processing uploaded documents and managing generation requests."""
@@ -23,10 +87,84 @@ class DocumentProcessor:
         """Initialize document processor."""
         self._active_requests: Dict[str, GenerationStatus] = {}
         self._request_files: Dict[str, List[Path]] = {}
-        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._subscribers: Dict[str, List["asyncio.Queue[Event]"]] = {}
+        self._extraction_pool = ExtractionPool(max_workers=settings.EXTRACTION_WORKERS)
+        self._chunk_cache = ChunkCache(
+            max_entries=settings.CHUNK_CACHE_MAX_ENTRIES, kind_limits={"map": settings.CHUNK_CACHE_MAP_MAX_ENTRIES}
+        )
+        self._embedder = HashingEmbedder(dimensions=settings.EMBEDDING_DIMENSIONS)
+        self._embedding_store = EmbeddingStore(
+            Path(settings.EMBEDDING_CACHE_DIR or Path(tempfile.gettempdir()) / "md-decision-maker" / "embeddings"),
+            self._embedder,
+            cache=self._chunk_cache,
+            max_vectors_per_file=settings.EMBEDDING_MAX_VECTORS_PER_FILE,
+        )
+        self._model_client = self._create_model_client()
+        self._model_limiter = AdaptiveLimiter(
+            initial_limit=settings.MODEL_CONCURRENCY_INITIAL,
+            min_limit=settings.MODEL_CONCURRENCY_MIN,
+            max_limit=settings.MODEL_CONCURRENCY_MAX,
+            latency_target=settings.MODEL_LATENCY_TARGET,
+        )
+        self._model_breaker = CircuitBreaker(
+            MODEL_SERVICE_NAME,
+            failure_rate=settings.CIRCUIT_FAILURE_RATE,
+            window=settings.CIRCUIT_WINDOW,
+            min_calls=settings.CIRCUIT_MIN_CALLS,
+            open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+            half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+        )
+        self._deployments = DeploymentRouter(
+            parse_deployments(
+                settings.MODEL_DEPLOYMENTS, settings.AZURE_FOUNDRY_DEPLOYMENT, settings.MODEL_CONTEXT_TOKENS
+            ),
+            smoothing=settings.ROUTING_LATENCY_SMOOTHING,
+            failure_penalty=settings.ROUTING_FAILURE_PENALTY,
+        )
+        self._first_token_latency = LatencyBuckets(min_samples=settings.HEDGE_MIN_SAMPLES)
+        self._hedge_budget = HedgeBudget(ratio=settings.HEDGE_BUDGET_RATIO, burst=settings.HEDGE_BUDGET_BURST)
+        self._node_budget = NodeBudget(
+            Path(settings.MODEL_BUDGET_FILE or Path(tempfile.gettempdir()) / "md-decision-maker" / "model-budget.json"),
+            max_concurrency=settings.MODEL_NODE_MAX_CONCURRENCY,
+            tokens_per_minute=settings.MODEL_NODE_TOKENS_PER_MINUTE,
+        )
+        self._batch_queue = BatchQueue(
+            lambda: self._model_client,
+            deployment=settings.BATCH_DEPLOYMENT or None,
+            max_requests=settings.BATCH_MAX_REQUESTS,
+            max_wait=settings.BATCH_MAX_WAIT,
+            poll_interval=settings.BATCH_POLL_INTERVAL,
+            timeout=settings.BATCH_TIMEOUT,
+        )
+        self._templates = TemplateRegistry(
+            Path(settings.PROMPT_TEMPLATE_DIR) if settings.PROMPT_TEMPLATE_DIR else DEFAULT_TEMPLATE_DIR,
+            reload_interval=settings.PROMPT_TEMPLATE_RELOAD_INTERVAL,
+        )
+        self._artifacts = ArtifactStore(
+            Path(settings.ARTIFACT_DIR or Path(tempfile.gettempdir()) / "md-decision-maker" / "artifacts"),
+            ttl_seconds=settings.ARTIFACT_TTL_SECONDS,
+            compress_min_bytes=settings.ARTIFACT_COMPRESS_MIN_BYTES,
+        )
+        self._result_cache = ResultCache(
+            max_entries=settings.RESULT_CACHE_MAX_ENTRIES, ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+        )
+        self._description_embedder = HashingEmbedder(
+            dimensions=settings.EMBEDDING_DIMENSIONS, tokenize=description_words
+        )
+        self._request_keys: Dict[str, RequestCacheKey] = {}
+        self._request_hashes: Dict[str, Dict[str, str]] = {}
+        self._in_flight: Dict[str, str] = {}  # Result cache key -> request id of the running pipeline
+        self._followers: Dict[str, List[str]] = {}  # Running request id -> identical requests attached to it
+        self._batch_requests: Set[str] = set()  # Running requests whose model calls go through batches
 
     async def create_request(
-        self, files: List[UploadFile], description: str, output_format: str = "markdown"
+        self,
+        files: List[UploadFile],
+        description: str,
+        output_format: str = "markdown",
+        semantic_cache: bool = False,
+        template: Optional[str] = None,
+        interactive: bool = True,
     ) -> tuple[uuid.UUID, List[FileInfo]]:
         """
         Create a new document generation request.
@@ -35,32 +173,51 @@ class DocumentProcessor:
             files: List of uploaded files
             description: What to generate from the documents
             output_format: Desired output format
+            semantic_cache: Whether a cached result for a near-identical description may be reused
+            template: Name of the prompt template, the default template if not given
+            interactive: Whether someone waits for the result; other requests are generated through batches
 
         Returns:
             Tuple of (request_id, file_info_list)
+
+        Raises:
+            ValidationError: If the template does not exist
         """
+        await self._templates.refresh()
+        prompt = self._get_template(template)
         request_id = uuid.uuid4()
         file_infos = []
         temp_files = []
+        file_hashes = []
 
         # Save files temporarily
         temp_dir = Path(tempfile.gettempdir()) / "md-decision-maker" / str(request_id)
         temp_dir.mkdir(parents=True, exist_ok=True)
 
         for file in files:
+            # Upload validation rejects files without a name
+            filename = file.filename or ""
             # Read file content
             content = await file.read()
             file_size = len(content)
+            file_hashes.append(hashlib.sha256(content).hexdigest())
 
             # Save to temp location
-            temp_path = temp_dir / file.filename
-            with open(temp_path, "wb") as f:
-                f.write(content)
+            temp_path = temp_dir / filename
+            await asyncio.to_thread(temp_path.write_bytes, content)
             temp_files.append(temp_path)
 
-            # Create file info
+            # Create file info, with counts probed from headers and ZIP directories only
+            metadata = await asyncio.to_thread(probe_file, filename, content)
             file_info = FileInfo(
-                filename=file.filename, content_type=file.content_type or "application/octet-stream", size=file_size
+                filename=filename,
+                content_type=file.content_type or "application/octet-stream",
+                size=file_size,
+                page_count=metadata.page_count,
+                word_count=metadata.word_count,
+                row_count=metadata.row_count,
+                sheets=[SheetInfo(name=sheet.name, rows=sheet.rows, columns=sheet.columns) for sheet in metadata.sheets]
+                or None,
             )
             file_infos.append(file_info)
 
@@ -69,16 +226,81 @@ class DocumentProcessor:
 
         # Store request information
         self._request_files[str(request_id)] = temp_files
-        self._active_requests[str(request_id)] = GenerationStatus(
-            request_id=request_id,
-            status="processing",
-            current_step=0,
-            total_steps=10,  # Simulated steps
-            message="Request accepted, starting processing...",
+        # Serve identical requests, and requests worded near-identically, from the result cache
+        # Results depend on the deployments calls may be routed to, not on the one a call happened to use
+        deployment = settings.MODEL_DEPLOYMENTS or settings.AZURE_FOUNDRY_DEPLOYMENT
+        cache = RequestCacheKey(
+            key=result_key(file_hashes, description, output_format, prompt.key, deployment),
+            scope=scope_key(file_hashes, output_format, prompt.key, deployment),
+            description=embed_description(self._description_embedder, description),
         )
+        cache_status: Literal["hit", "semantic_hit", "miss"] = "miss"
+        cached = self._result_cache.get(cache.key)
+        if cached is not None:
+            cache_status = "hit"
+        elif semantic_cache:
+            similar = self._result_cache.find_similar(
+                cache.scope, cache.description, threshold=settings.SEMANTIC_CACHE_THRESHOLD
+            )
+            if similar is not None:
+                cached = similar[0]
+                cache_status = "semantic_hit"
+                logger.info(
+                    "Reusing result of a similar request",
+                    extra={"request_id": str(request_id), "similarity": round(similar[1], 3)},
+                )
 
-        # Start processing in background
-        asyncio.create_task(self._process_request(str(request_id), description, output_format))
+        if cached is not None:
+            metrics.increment(f"result_cache.{cache_status}s")
+            await asyncio.to_thread(self._artifacts.put_text, str(request_id), cached.output)
+            self._active_requests[str(request_id)] = GenerationStatus(
+                request_id=request_id,
+                status="completed",
+                current_step=10,
+                total_steps=10,
+                message="Document generation completed successfully!",
+                completed_at=datetime.now(timezone.utc),
+                cache_status=cache_status,
+            )
+            await self._cleanup_request(str(request_id))
+        elif cache.key in self._in_flight and (
+            not interactive or self._in_flight[cache.key] not in self._batch_requests
+        ):
+            # An identical request is already running: mirror its progress instead of starting another,
+            # unless that would make an interactive request wait for a batch
+            leader = self._in_flight[cache.key]
+            metrics.increment("requests.coalesced")
+            self._followers.setdefault(leader, []).append(str(request_id))
+            self._active_requests[str(request_id)] = self._active_requests[leader].model_copy(
+                update={"request_id": request_id, "cache_status": "coalesced"}
+            )
+            await self._cleanup_request(str(request_id))
+            logger.info("Coalesced identical request", extra={"request_id": str(request_id), "leader": leader})
+        else:
+            # Reject new work while the model endpoint is down rather than queueing doomed pipelines
+            try:
+                self._model_breaker.check()
+            except ExternalServiceError:
+                metrics.increment("requests.rejected")
+                await self._cleanup_request(str(request_id))
+                raise
+            metrics.increment("result_cache.misses")
+            self._request_keys[str(request_id)] = cache
+            self._request_hashes[str(request_id)] = {path.name: h for path, h in zip(temp_files, file_hashes)}
+            self._in_flight[cache.key] = str(request_id)
+            if not interactive:
+                self._batch_requests.add(str(request_id))
+            self._active_requests[str(request_id)] = GenerationStatus(
+                request_id=request_id,
+                status="processing",
+                current_step=0,
+                total_steps=10,  # Simulated steps
+                message="Request accepted, starting processing...",
+                cache_status="miss",
+            )
+
+            # Start processing in background
+            asyncio.create_task(self._process_request(str(request_id), description, output_format, prompt, interactive))
 
         logger.info(
             "Created generation request",
@@ -91,13 +313,48 @@ class DocumentProcessor:
 
         return request_id, file_infos
 
-    async def _process_request(self, request_id: str, description: str, output_format: str) -> None:
+    def _get_template(self, name: Optional[str]) -> PromptTemplate:
+        """Return a prompt template by name, or the default template."""
+        name = name or settings.DEFAULT_PROMPT_TEMPLATE
+        try:
+            return self._templates.get(name)
+        except KeyError:
+            raise ValidationError(
+                f"Unknown template '{name}'", details={"template": name, "available": self._templates.names()}
+            ) from None
+
+    async def _process_request(
+        self,
+        request_id: str,
+        description: str,
+        output_format: str,
+        template: PromptTemplate,
+        interactive: bool = True,
+    ) -> None:
         """
-        Process a document generation request (stub implementation).
+        Process a document generation request.
 
-        This simulates the processing steps that would eventually
-        call the LLM service.
+        Steps with a registered handler do real work; the remaining steps
+        are still simulated until the LLM integration lands.
         """
+        context = PipelineContext(
+            request_id=request_id,
+            description=description,
+            output_format=output_format,
+            files=list(self._request_files.get(request_id, [])),
+            file_hashes=self._request_hashes.pop(request_id, {}),
+            cache=self._request_keys.pop(request_id, None),
+            template=template,
+            interactive=interactive,
+        )
+        handlers: Dict[int, Callable[[PipelineContext], Awaitable[None]]] = {
+            2: lambda ctx: self._extract_documents(ctx, (".pdf",)),
+            3: lambda ctx: self._extract_documents(ctx, (".docx",)),
+            4: lambda ctx: self._extract_documents(ctx, (".csv", ".xlsx")),
+            5: self._analyze_structure,
+            6: self._prepare_and_release,
+            7: self._generate_document,
+        }
         steps = [
             (1, "Validating uploaded files..."),
             (2, "Extracting text from PDF documents..."),
@@ -114,29 +371,50 @@ class DocumentProcessor:
         try:
             for step, message in steps:
                 # Update status
-                self._active_requests[request_id] = GenerationStatus(
-                    request_id=uuid.UUID(request_id),
-                    status="processing",
-                    current_step=step,
-                    total_steps=len(steps),
-                    message=message,
+                self._set_status(
+                    GenerationStatus(
+                        request_id=uuid.UUID(request_id),
+                        status="processing",
+                        current_step=step,
+                        total_steps=len(steps),
+                        message=message,
+                        cache_status="miss",
+                    )
                 )
 
                 # Emit progress event
                 await self._emit_progress(request_id, step, len(steps), message)
 
-                # Simulate processing time
-                await asyncio.sleep(2)  # 2 seconds per step
+                handler = handlers.get(step)
+                if handler is not None:
+                    await handler(context)
+                else:
+                    # Simulate processing time
+                    await asyncio.sleep(2)  # 2 seconds per step
+
+            # Store the document before the request is reported complete, so it can be downloaded right away.
+            # Documents are Markdown until PDF and DOCX rendering replaces the simulated formatting step
+            artifact = await asyncio.to_thread(self._artifacts.put_text, request_id, context.output)
+            for follower in self._followers.get(request_id, []):
+                self._artifacts.link(follower, artifact)
 
             # Mark as completed
-            self._active_requests[request_id] = GenerationStatus(
-                request_id=uuid.UUID(request_id),
-                status="completed",
-                current_step=len(steps),
-                total_steps=len(steps),
-                message="Document generation completed successfully!",
-                completed_at=datetime.now(timezone.utc),
+            self._set_status(
+                GenerationStatus(
+                    request_id=uuid.UUID(request_id),
+                    status="completed",
+                    current_step=len(steps),
+                    total_steps=len(steps),
+                    message="Document generation completed successfully!",
+                    completed_at=datetime.now(timezone.utc),
+                    cache_status="miss",
+                )
             )
+            if context.cache is not None:
+                self._result_cache.put(
+                    context.cache.key, context.output, scope=context.cache.scope, description=context.cache.description
+                )
+            metrics.increment("requests.completed", 1 + len(self._followers.get(request_id, [])))
 
             # Emit completion event
             await self._emit_completion(request_id)
@@ -145,61 +423,627 @@ class DocumentProcessor:
             logger.error("Error processing request", extra={"request_id": request_id, "error": str(e)})
 
             # Mark as failed
-            self._active_requests[request_id] = GenerationStatus(
-                request_id=uuid.UUID(request_id),
-                status="failed",
-                current_step=self._active_requests[request_id].current_step,
-                total_steps=len(steps),
-                message="Generation failed",
-                error=str(e),
+            self._set_status(
+                GenerationStatus(
+                    request_id=uuid.UUID(request_id),
+                    status="failed",
+                    current_step=self._active_requests[request_id].current_step,
+                    total_steps=len(steps),
+                    message="Generation failed",
+                    error=str(e),
+                    cache_status="miss",
+                )
             )
+            metrics.increment("requests.failed", 1 + len(self._followers.get(request_id, [])))
 
             # Emit error event
             await self._emit_error(request_id, str(e))
 
         finally:
-            # Cleanup temporary files
-            await self._cleanup_request(request_id)
+            # Later identical requests start their own run (or hit the result cache)
+            if context.cache is not None and self._in_flight.get(context.cache.key) == request_id:
+                del self._in_flight[context.cache.key]
+            self._followers.pop(request_id, None)
+            self._batch_requests.discard(request_id)
+
+            await self._release_inputs(context)
+
+    async def _prepare_and_release(self, context: PipelineContext) -> None:
+        """Prepare the model input, then drop the inputs it was built from."""
+        await self._prepare_content(context)
+        # Generation only needs the packed chunks, and a batched one can wait hours for its batch
+        await self._release_inputs(context)
+
+    async def _release_inputs(self, context: PipelineContext) -> None:
+        """Release extracted text and clean up the temporary upload files of a request."""
+        for store in context.documents.values():
+            store.release()
+        context.documents.clear()
+        await self._cleanup_request(context.request_id)
+
+    async def _extract_documents(self, context: PipelineContext, extensions: Tuple[str, ...]) -> None:
+        """Extract the text of all request files with the given extensions in parallel."""
+        paths = [path for path in context.files if path.suffix.lower() in extensions]
+        if not paths:
+            return
+
+        # Every file gets an equal share of the budget for sections it was not asked about
+        token_budget = settings.EXTRACTION_TOKEN_BUDGET // max(len(context.files), 1)
+        results = await asyncio.gather(
+            *(
+                self._extraction_pool.extract(path, description=context.description, token_budget=token_budget)
+                for path in paths
+            ),
+            return_exceptions=True,
+        )
+        errors: List[BaseException] = []
+        for path, result in zip(paths, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                context.documents[path.name] = result
+        if errors:
+            raise errors[0]
+
+        logger.info(
+            "Extracted documents",
+            extra={
+                "request_id": context.request_id,
+                "file_count": len(paths),
+                "paragraphs": sum(context.documents[path.name].paragraph_count for path in paths),
+            },
+        )
+
+    async def _analyze_structure(self, context: PipelineContext) -> None:
+        """Mark page boilerplate and near-duplicate paragraphs for exclusion."""
+        removed = 0
+        for name, store in context.documents.items():
+            report = find_boilerplate(
+                store,
+                edge_lines=settings.BOILERPLATE_EDGE_LINES,
+                min_page_ratio=settings.BOILERPLATE_MIN_PAGE_RATIO,
+            )
+            context.excluded.setdefault(name, set()).update(report.paragraphs)
+            removed += report.bytes_removed
+
+        context.duplicates = await asyncio.to_thread(
+            find_near_duplicates,
+            context.documents,
+            context.excluded,
+            threshold=settings.DEDUP_SIMILARITY_THRESHOLD,
+            min_words=settings.DEDUP_MIN_WORDS,
+        )
+        for record in context.duplicates:
+            context.excluded.setdefault(record.duplicate.document, set()).add(record.duplicate.paragraph)
+
+        logger.info(
+            "Analyzed document structure",
+            extra={
+                "request_id": context.request_id,
+                "boilerplate_bytes_removed": removed,
+                "duplicate_paragraphs": len(context.duplicates),
+            },
+        )
+
+    async def _prepare_content(self, context: PipelineContext) -> None:
+        """
+        Chunk the kept content, compress it if oversized and fit it into the context window.
+
+        Content that fits is passed on whole, in document order. Content that does not fit goes to
+        map-reduce when it is enabled, which condenses every chunk instead of dropping any; only
+        with map-reduce disabled are the chunks ranked against the description and packed, so
+        ranking and the per-file quotas decide what is left out. Ranking runs only on that path.
+        """
+        context.chunks = await asyncio.to_thread(
+            chunk_documents,
+            context.documents,
+            context.excluded,
+            cache=self._chunk_cache,
+            min_size=settings.CHUNK_MIN_BYTES,
+            avg_size=settings.CHUNK_AVG_BYTES,
+            max_size=settings.CHUNK_MAX_BYTES,
+        )
+
+        # Inputs several times the context window are compressed locally, so fewer map calls or less dropping is needed
+        prompt_tokens = self._template(context).prompt_tokens(context.description)
+        budget = self._deployments.context_tokens - settings.MODEL_OUTPUT_RESERVE_TOKENS - prompt_tokens
+        total_tokens = sum(chunk_tokens(chunk, self._chunk_cache) for chunk in context.chunks)
+        if total_tokens > budget * settings.SUMMARIZE_OVERSIZE_RATIO:
+            ratio = budget * settings.SUMMARIZE_TARGET_RATIO / total_tokens
+            context.chunks = await asyncio.to_thread(compress_chunks, context.chunks, ratio)
+            total_tokens = sum(chunk_tokens(chunk, self._chunk_cache) for chunk in context.chunks)
+            logger.info(
+                "Compressed oversized content",
+                extra={"request_id": context.request_id, "input_tokens": total_tokens, "ratio": round(ratio, 3)},
+            )
+
+        if total_tokens > budget and settings.MAP_REDUCE_ENABLED:
+            context.map_groups = group_chunks(context.chunks, settings.MAP_GROUP_TOKENS, self._chunk_cache)
+            logger.info(
+                "Content exceeds the context window, using map-reduce",
+                extra={
+                    "request_id": context.request_id,
+                    "input_tokens": total_tokens,
+                    "map_groups": len(context.map_groups),
+                },
+            )
+            return
+
+        # Scores only matter when the packer has to drop chunks; embedding content that all fits is wasted work
+        if total_tokens > budget:
+            context.scores = await asyncio.to_thread(self._score_chunks, context)
+
+        packed = await asyncio.to_thread(
+            pack_chunks,
+            context.chunks,
+            context_tokens=self._deployments.context_tokens,
+            output_reserve=settings.MODEL_OUTPUT_RESERVE_TOKENS,
+            prompt_tokens=prompt_tokens,
+            scores=context.scores,
+            min_file_share=settings.PACK_MIN_FILE_SHARE,
+            cache=self._chunk_cache,
+        )
+        context.packed = packed.chunks
+        context.packing = packed.stats
+
+        logger.info(
+            "Prepared content chunks",
+            extra={
+                "request_id": context.request_id,
+                "chunk_count": len(context.chunks),
+                "packed_chunks": len(context.packed),
+                "packed_tokens": packed.stats.used_tokens,
+                "dropped_tokens": packed.stats.dropped_tokens,
+                "file_coverage": packed.stats.coverage,
+                "chunk_cache": self._chunk_cache.stats(),
+            },
+        )
+
+    def _score_chunks(self, context: PipelineContext) -> Dict[str, float]:
+        """Combine BM25 scores with embedding similarity to the description."""
+        lexical = score_chunks(context.chunks, context.description)
+        top = max(lexical.values(), default=0.0) or 1.0
+
+        paths = {path.name: path for path in context.files}
+        matrix = EmbeddingMatrix(self._embedder.dimensions)
+        for name in dict.fromkeys(chunk.document for chunk in context.chunks):
+            chunks = [chunk for chunk in context.chunks if chunk.document == name]
+            # Uploads were hashed when they were received; only contexts built without them hash here
+            digest = context.file_hashes.get(name) or file_hash(paths[name])
+            vectors = self._embedding_store.embed_file(digest, chunks)
+            for chunk, vector in zip(chunks, vectors):
+                matrix.add(chunk.chunk_id, vector)
+
+        similarities = matrix.similarities(self._embedder.embed(context.description))
+        return {
+            key: lexical[key] / top + settings.EMBEDDING_WEIGHT * similarity
+            for key, similarity in zip(matrix.keys, similarities)
+        }
+
+    @staticmethod
+    def _create_model_client() -> ModelClient:
+        """
+        Create the pooled model client, served by the in-process stand-in when no endpoint is set.
+
+        Raises:
+            ConfigurationError: If no endpoint is set outside development and tests
+        """
+        endpoint = settings.AZURE_FOUNDRY_ENDPOINT
+        transport = None
+        if not endpoint:
+            if settings.APP_ENV not in ("development", "test"):
+                raise ConfigurationError(
+                    "AZURE_FOUNDRY_ENDPOINT must be set outside development",
+                    details={"app_env": settings.APP_ENV},
+                )
+            logger.warning("No model endpoint configured, using the local stand-in")
+            endpoint = "http://model-stand-in"
+            transport = httpx.ASGITransport(app=create_stand_in_app())
+        return ModelClient(
+            endpoint=endpoint,
+            api_key=settings.AZURE_FOUNDRY_API_KEY,
+            deployment=settings.AZURE_FOUNDRY_DEPLOYMENT,
+            api_version=settings.AZURE_FOUNDRY_API_VERSION,
+            max_connections=settings.MODEL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MODEL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.MODEL_KEEPALIVE_EXPIRY,
+            connect_timeout=settings.MODEL_CONNECT_TIMEOUT,
+            read_timeout=settings.MODEL_READ_TIMEOUT,
+            transport=transport,
+        )
+
+    def _template(self, context: PipelineContext) -> PromptTemplate:
+        """Return the template of a request."""
+        return context.template or self._get_template(None)
+
+    def _build_messages(self, context: PipelineContext) -> List[Dict[str, str]]:
+        """Build the chat messages for a request from its template and packed chunks."""
+        return self._template(context).render(
+            context.description, context.output_format, format_sources(context.packed)
+        )
+
+    async def _stream_model(
+        self, request_id: str, messages: List[Dict[str, str]], max_tokens: int
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion under the adaptive concurrency limit.
+
+        Each call also holds a slot and its estimated tokens from the budget
+        shared by all workers on the node, is routed to the deployment with
+        the lowest predicted latency that fits it, and passes the circuit breaker,
+        which fails it immediately during an outage. A call without a first token by
+        the configured percentile of recent first-token times of its deployment and
+        prompt size is hedged with a duplicate, if a limiter slot and a node budget
+        lease are free for it. Calls throttled before producing any output are
+        retried once the provider's ``Retry-After`` has passed; the time to the
+        first token and any throttling feed back into the limit.
+        """
+        loop = asyncio.get_running_loop()
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+        requested = prompt_tokens + max_tokens
+        for attempt in range(settings.MODEL_MAX_RETRIES + 1):
+            # Fail fast during an outage instead of queueing for a slot
+            self._model_breaker.check()
+            await self._model_limiter.acquire(lambda position: self._emit_queued(request_id, position))
+            lease: Optional[BudgetLease] = None
+            deployment: Optional[Deployment] = None
+            latency: Optional[float] = None
+            throttled = False
+            probe = False
+            failed: Optional[bool] = None
+            try:
+                probe = self._model_breaker.before_call()
+                # The per-process limit is checked first so only admitted calls poll the shared node budget
+                lease = await self._node_budget.acquire(requested)
+                deployment = self._deployments.choose(prompt_tokens, max_tokens)
+                self._deployments.started(deployment)
+                started = loop.time()
+                delay = (
+                    self._first_token_latency.percentile(deployment.name, prompt_tokens, settings.HEDGE_PERCENTILE)
+                    if settings.HEDGE_ENABLED
+                    else None
+                )
+                async for delta in hedged(
+                    functools.partial(
+                        self._model_client.stream, messages, max_tokens=max_tokens, deployment=deployment.name
+                    ),
+                    delay,
+                    self._hedge_budget,
+                    lambda: self._admit_hedge(requested),
+                ):
+                    if latency is None:
+                        latency = loop.time() - started
+                        self._first_token_latency.record(deployment.name, prompt_tokens, latency)
+                    yield delta
+                failed = False
+                return
+            except ExternalServiceError as e:
+                failed = is_outage(e)
+                raise
+            except RateLimitError as e:
+                # Throttling is handled by the concurrency limit; the endpoint itself is up
+                failed = False
+                throttled = True
+                metrics.increment("model.throttled")
+                self._model_limiter.pause(e.retry_after or settings.MODEL_RETRY_AFTER_DEFAULT)
+                if latency is not None or attempt == settings.MODEL_MAX_RETRIES:
+                    raise
+                logger.warning("Model call throttled, retrying", extra={"request_id": request_id, "attempt": attempt})
+            finally:
+                self._model_breaker.record(failed, probe)
+                if deployment is not None:
+                    self._deployments.finished(deployment, prompt_tokens, latency, failed=bool(failed) or throttled)
+                self._model_limiter.release(latency, throttled)
+                if lease is not None:
+                    # The shared state file is locked and rewritten, which must not block the event loop
+                    await asyncio.to_thread(self._node_budget.release, lease)
+
+    async def _admit_hedge(self, requested: int) -> Optional[Callable[[], Awaitable[None]]]:
+        """Reserve a limiter slot and a node budget lease for a hedge without waiting for either."""
+        if not self._model_limiter.try_acquire():
+            return None
+        lease = await asyncio.to_thread(self._node_budget.try_acquire, requested)
+        if lease is None:
+            self._model_limiter.release()
+            return None
+
+        async def release() -> None:
+            self._model_limiter.release()
+            await asyncio.to_thread(self._node_budget.release, lease)
+
+        return release
+
+    async def _complete_model(
+        self, request_id: str, messages: List[Dict[str, str]], max_tokens: int, interactive: bool = True
+    ) -> str:
+        """
+        Return a whole completion, with the same limits and retries as streamed calls.
+
+        Non-interactive calls are queued for the next provider batch instead,
+        outside the real-time limits.
+        """
+        if not interactive:
+            return await self._batch_queue.complete(request_id, messages, max_tokens)
+        return "".join([delta async for delta in self._stream_model(request_id, messages, max_tokens)])
+
+    async def _map_chunks(self, context: PipelineContext) -> None:
+        """Condense each chunk group into notes in parallel and pack the notes for the reduce call."""
+        # Batched calls are all queued at once so they can share a batch
+        semaphore = asyncio.Semaphore(settings.MAP_MAX_PARALLEL if context.interactive else len(context.map_groups))
+        total = len(context.map_groups)
+        completed = 0
+
+        async def condense(group: List[Chunk]) -> Chunk:
+            nonlocal completed
+            key = group_key(group, MAP_PROMPT_VERSION)
+            notes = self._chunk_cache.get("map", key)
+            cached = notes is not None
+            if notes is None:
+                async with semaphore:
+                    notes = await self._complete_model(
+                        context.request_id, map_messages(group), settings.MAP_OUTPUT_TOKENS, context.interactive
+                    )
+                self._chunk_cache.put("map", key, notes)
+            completed += 1
+            metrics.increment("map.cached" if cached else "map.generated")
+            await self._emit_map_progress(
+                context.request_id, completed, total, [chunk.chunk_id for chunk in group], cached
+            )
+            return notes_chunk(group, key, notes)
+
+        tasks = [asyncio.create_task(condense(group)) for group in context.map_groups]
+        try:
+            notes = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        packed = pack_chunks(
+            notes,
+            context_tokens=self._deployments.context_tokens,
+            output_reserve=settings.MODEL_OUTPUT_RESERVE_TOKENS,
+            prompt_tokens=self._template(context).prompt_tokens(context.description),
+            min_file_share=settings.PACK_MIN_FILE_SHARE,
+            cache=self._chunk_cache,
+        )
+        context.packed = packed.chunks
+        context.packing = packed.stats
+
+    async def _stream_sections(self, context: PipelineContext) -> AsyncIterator[str]:
+        """
+        Plan an outline, write its sections concurrently and yield them in outline order.
+
+        The outline call sees all sources; each section call only the chunks
+        most relevant to its title. The section at the head of the outline is
+        forwarded as it is written; later sections buffer until every section
+        before them is complete. Outlines with fewer than two sections fall
+        back to a single call.
+        """
+        request_id = context.request_id
+        template = self._template(context)
+        reply = await self._complete_model(
+            request_id,
+            outline_messages(
+                context.description,
+                context.output_format,
+                format_sources(context.packed),
+                template.instructions,
+                template.system,
+            ),
+            settings.SECTION_OUTLINE_TOKENS,
+        )
+        outline = parse_outline(reply, settings.SECTION_MAX_COUNT)
+        if len(outline.sections) < 2:
+            async for delta in self._stream_model(
+                request_id, self._build_messages(context), max_tokens=settings.MODEL_OUTPUT_RESERVE_TOKENS
+            ):
+                yield delta
+            return
+
+        sources = await asyncio.to_thread(
+            section_sources,
+            context.packed,
+            outline,
+            context.description,
+            settings.SECTION_SOURCE_TOKENS,
+            lambda chunk: chunk_tokens(chunk, self._chunk_cache),
+        )
+        buffers: List["asyncio.Queue[Optional[str]]"] = [asyncio.Queue() for _ in outline.sections]
+
+        async def write(index: int) -> None:
+            messages = section_messages(
+                context.description,
+                context.output_format,
+                format_sources(sources[index]),
+                outline,
+                index,
+                template.instructions,
+                template.system,
+            )
+            try:
+                async for delta in self._stream_model(request_id, messages, max_tokens=settings.SECTION_OUTPUT_TOKENS):
+                    buffers[index].put_nowait(delta)
+            finally:
+                buffers[index].put_nowait(None)
+
+        tasks = [asyncio.create_task(write(index)) for index in range(len(outline.sections))]
+        try:
+            if outline.title:
+                yield f"# {outline.title}\n\n"
+            for index, buffer in enumerate(buffers):
+                if index:
+                    yield "\n\n"
+                while (part := await buffer.get()) is not None:
+                    yield part
+                # Surfaces the error of a failed section
+                await tasks[index]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _batched_document(self, context: PipelineContext) -> AsyncIterator[str]:
+        """Generate the document of a non-interactive request through the batch queue."""
+        yield await self._complete_model(
+            context.request_id,
+            self._build_messages(context),
+            settings.MODEL_OUTPUT_RESERVE_TOKENS,
+            interactive=False,
+        )
+
+    async def _generate_document(self, context: PipelineContext) -> None:
+        """Stream the generated document from the model, forwarding it to subscribers as delta events."""
+        if context.map_groups:
+            await self._map_chunks(context)
+
+        parts: List[str] = []
+        pending: List[str] = []
+        sequence = 0
+
+        # Long inputs make long reports, which are written section by section in parallel unless the template
+        # asks for a short document
+        source_tokens = sum(chunk_tokens(chunk, self._chunk_cache) for chunk in context.packed)
+        if not context.interactive:
+            # Nobody watches a non-interactive job, so its document is one batched call delivered whole
+            deltas = self._batched_document(context)
+        elif (
+            settings.SECTION_PARALLEL_ENABLED
+            and self._template(context).sectioned
+            and source_tokens >= settings.SECTION_MIN_INPUT_TOKENS
+        ):
+            deltas = self._stream_sections(context)
+        else:
+            deltas = self._stream_model(
+                context.request_id, self._build_messages(context), max_tokens=settings.MODEL_OUTPUT_RESERVE_TOKENS
+            )
+
+        async def flush() -> None:
+            nonlocal sequence
+            if pending:
+                text = "".join(pending)
+                pending.clear()
+                await self._emit_delta(context.request_id, sequence, text)
+                sequence += 1
+
+        async def flush_periodically() -> None:
+            # Batch tokens per time window so event overhead does not grow with the token rate,
+            # and text written just before a pause in the output is not held back until it ends
+            while True:
+                await asyncio.sleep(settings.STREAM_DELTA_INTERVAL)
+                await flush()
+
+        flusher = asyncio.create_task(flush_periodically())
+        try:
+            async for delta in deltas:
+                parts.append(delta)
+                pending.append(delta)
+        finally:
+            flusher.cancel()
+        await flush()
+        context.output = "".join(parts)
+
+        logger.info(
+            "Generated document",
+            extra={"request_id": context.request_id, "output_chars": len(context.output)},
+        )
+
+    def _set_status(self, status: GenerationStatus) -> None:
+        """Record the status of a running request and mirror it to attached identical requests."""
+        request_id = str(status.request_id)
+        self._active_requests[request_id] = status
+        for follower in self._followers.get(request_id, []):
+            self._active_requests[follower] = status.model_copy(
+                update={"request_id": uuid.UUID(follower), "cache_status": "coalesced"}
+            )
+
+    def _subscriber_queues(self, request_id: str) -> List[Tuple[str, "asyncio.Queue[Event]"]]:
+        """Return the queues of everyone subscribed to a request or to identical requests attached to it."""
+        recipients = [request_id, *self._followers.get(request_id, [])]
+        return [(recipient, queue) for recipient in recipients for queue in self._subscribers.get(recipient, [])]
+
+    def _publish(self, request_id: str, build: Callable[[str], Event]) -> None:
+        """
+        Queue an event for every subscriber of a request without waiting.
+
+        ``build`` makes the event for each recipient request id. A subscriber
+        whose queue is full has fallen behind: it is disconnected with an
+        ``overflow`` event rather than stalling the pipeline, which holds
+        model capacity, and every request attached to it.
+        """
+        for recipient, queue in self._subscriber_queues(request_id):
+            try:
+                queue.put_nowait(build(recipient))
+            except asyncio.QueueFull:
+                self._disconnect(recipient, queue)
+
+    def _disconnect(self, request_id: str, queue: "asyncio.Queue[Event]") -> None:
+        """Stop feeding a subscriber and replace its backlog with a final ``overflow`` event."""
+        queues = self._subscribers.get(request_id, [])
+        if queue in queues:
+            queues.remove(queue)
+            if not queues:
+                del self._subscribers[request_id]
+        while not queue.empty():
+            queue.get_nowait()
+        event_data = {
+            "error": "Subscriber fell behind; reconnect or download the result",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        queue.put_nowait({"event": "overflow", "data": json.dumps(event_data)})
+        metrics.increment("stream.overflows")
+        logger.warning("Disconnected slow subscriber", extra={"request_id": request_id})
 
     async def _emit_progress(self, request_id: str, current_step: int, total_steps: int, message: str) -> None:
         """Emit progress event to all subscribers."""
-        if request_id in self._subscribers:
-            event_data = {
-                "step": current_step,
-                "total": total_steps,
-                "message": message,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-            }
-
-            for queue in self._subscribers[request_id]:
-                try:
-                    await queue.put({"event": "progress", "data": json.dumps(event_data)})
-                except asyncio.QueueFull:
-                    logger.warning(f"Queue full for subscriber of request {request_id}")
+        event_data = {
+            "step": current_step,
+            "total": total_steps,
+            "message": message,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+
+        self._publish(request_id, lambda _: {"event": "progress", "data": json.dumps(event_data)})
+
+    async def _emit_queued(self, request_id: str, position: int) -> None:
+        """Emit the queue position while a request waits for model capacity."""
+        event_data = {"position": position, "timestamp": datetime.now(timezone.utc).isoformat()}
+
+        self._publish(request_id, lambda _: {"event": "queued", "data": json.dumps(event_data)})
+
+    async def _emit_map_progress(
+        self, request_id: str, completed: int, total: int, chunk_ids: List[str], cached: bool
+    ) -> None:
+        """Emit progress of the map calls condensing oversized content."""
+        event_data = {"completed": completed, "total": total, "chunks": chunk_ids, "cached": cached}
+
+        self._publish(request_id, lambda _: {"event": "map", "data": json.dumps(event_data)})
+
+    async def _emit_delta(self, request_id: str, sequence: int, text: str) -> None:
+        """Emit a batch of generated text to all subscribers."""
+        event_data = {"sequence": sequence, "text": text}
+
+        self._publish(request_id, lambda _: {"event": "delta", "data": json.dumps(event_data)})
 
     async def _emit_completion(self, request_id: str) -> None:
         """Emit completion event to all subscribers."""
-        if request_id in self._subscribers:
-            event_data = {"status": "completed", "timestamp": datetime.now(timezone.utc).isoformat()}
+        self._publish(request_id, self._completion_event)
 
-            for queue in self._subscribers[request_id]:
-                try:
-                    await queue.put({"event": "complete", "data": json.dumps(event_data)})
-                except asyncio.QueueFull:
-                    pass
+    def _completion_event(self, request_id: str) -> Event:
+        """Build the SSE event announcing that a request completed."""
+        status = self._active_requests.get(request_id)
+        event_data = {
+            "status": "completed",
+            "cache_status": status.cache_status if status else None,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        return {"event": "complete", "data": json.dumps(event_data)}
 
     async def _emit_error(self, request_id: str, error: str) -> None:
         """Emit error event to all subscribers."""
-        if request_id in self._subscribers:
-            event_data = {"error": error, "timestamp": datetime.now(timezone.utc).isoformat()}
+        event_data = {"error": error, "timestamp": datetime.now(timezone.utc).isoformat()}
 
-            for queue in self._subscribers[request_id]:
-                try:
-                    await queue.put({"event": "error", "data": json.dumps(event_data)})
-                except asyncio.QueueFull:
-                    pass
+        self._publish(request_id, lambda _: {"event": "error", "data": json.dumps(event_data)})
 
-    async def subscribe_to_request(self, request_id: str) -> AsyncGenerator[dict, None]:
+    async def subscribe_to_request(self, request_id: str) -> AsyncGenerator[Event, None]:
         """
         Subscribe to progress updates for a request.
 
@@ -207,7 +1051,7 @@ class DocumentProcessor:
             SSE event dictionaries
         """
         # Create queue for this subscriber
-        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=100)
 
         # Add to subscribers
         if request_id not in self._subscribers:
@@ -218,7 +1062,7 @@ class DocumentProcessor:
             # Send current status immediately
             if request_id in self._active_requests:
                 status = self._active_requests[request_id]
-                await queue.put(
+                queue.put_nowait(
                     {
                         "event": "status",
                         "data": json.dumps(
@@ -232,6 +1076,13 @@ class DocumentProcessor:
                     }
                 )
 
+                # Requests that already finished will not emit further events
+                if status.status == "completed":
+                    queue.put_nowait(self._completion_event(request_id))
+                elif status.status == "failed":
+                    event_data = {"error": status.error, "timestamp": datetime.now(timezone.utc).isoformat()}
+                    queue.put_nowait({"event": "error", "data": json.dumps(event_data)})
+
             # Yield events from queue
             while True:
                 try:
@@ -240,7 +1091,7 @@ class DocumentProcessor:
                     yield event
 
                     # Check if this was the final event
-                    if event.get("event") in ["complete", "error"]:
+                    if event.get("event") in ["complete", "error", "overflow"]:
                         break
 
                 except asyncio.TimeoutError:
@@ -251,8 +1102,8 @@ class DocumentProcessor:
                     }
 
         finally:
-            # Remove from subscribers
-            if request_id in self._subscribers:
+            # Remove from subscribers, unless it was disconnected for falling behind
+            if queue in self._subscribers.get(request_id, []):
                 self._subscribers[request_id].remove(queue)
                 if not self._subscribers[request_id]:
                     del self._subscribers[request_id]
@@ -261,6 +1112,19 @@ class DocumentProcessor:
         """Get current status of a request."""
         return self._active_requests.get(request_id)
 
+    def get_result(self, request_id: str) -> Optional[Artifact]:
+        """Return the stored document of a request, if it has one."""
+        try:
+            # Only well-formed IDs reach the file system
+            request_id = str(uuid.UUID(request_id))
+        except ValueError:
+            return None
+        return self._artifacts.get(request_id)
+
+    def result_path(self, artifact: Artifact, encoding: Optional[str] = None) -> Path:
+        """Return the file of a stored document, or of one of its encoded variants."""
+        return self._artifacts.path(artifact, encoding)
+
     async def _cleanup_request(self, request_id: str) -> None:
         """Clean up temporary files and data for a request."""
         # Clean up temp files
@@ -286,6 +1150,31 @@ class DocumentProcessor:
         # For now, just log
         logger.info(f"Cleaned up request {request_id}")
 
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Return request counters, cache statistics and the model concurrency limit."""
+        return {
+            "counters": metrics.snapshot(),
+            "caches": {"result": self._result_cache.stats(), "chunk": self._chunk_cache.stats()},
+            "limiter": self._model_limiter.stats(),
+            "circuit": self._model_breaker.stats(),
+            "deployments": self._deployments.stats(),
+            "batch": self._batch_queue.stats(),
+        }
+
+    @property
+    def model_circuit_state(self) -> CircuitState:
+        """State of the circuit breaker guarding the model endpoint."""
+        return self._model_breaker.state
+
+    async def model_budget_snapshot(self) -> Dict[str, Any]:
+        """Return the model call budget shared by the workers on this node, read off the event loop."""
+        return await asyncio.to_thread(self._node_budget.snapshot)
+
+    async def shutdown(self) -> None:
+        """Stop background workers and close connections owned by the processor."""
+        self._extraction_pool.shutdown()
+        await self._model_client.aclose()
+
 
 # Global instance
 document_processor = DocumentProcessor()
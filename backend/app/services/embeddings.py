@@ -0,0 +1,210 @@
+"""Local hashed embeddings for semantic chunk retrieval.
+
+Words and character trigrams are hashed into a sparse feature space and
+mapped to a dense vector by a sparse random projection: every feature adds
+its weight to a few pseudo-random coordinates with pseudo-random signs. No
+model is downloaded and no external service is called, yet texts that share
+vocabulary or word stems land close together. Vectors are persisted per
+uploaded file hash, so documents that are uploaded repeatedly are embedded
+only once. Each file keeps a bounded number of vectors, the most recently
+used last, because requests for different parts of a document add chunks.
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import tempfile
+from array import array
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services.chunk_cache import ChunkCache
+from app.services.chunking import Chunk
+from app.services.outline import words
+
+# Bump when the feature extraction changes so persisted vectors are not reused
+EMBEDDING_VERSION = 1
+
+# Coordinates each hashed feature is projected onto
+PROJECTION_NONZEROS = 2
+
+# Character trigrams count less than whole words
+TRIGRAM_WEIGHT = 0.5
+
+
+@lru_cache(maxsize=1 << 16)
+def _projection(feature: str, dimensions: int) -> Tuple[Tuple[int, float], ...]:
+    """Return the signed coordinates a feature is projected onto."""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    coordinates = []
+    for _ in range(PROJECTION_NONZEROS):
+        coordinates.append((digest % dimensions, 1.0 if digest & (1 << 40) else -1.0))
+        digest = (digest >> 21) | ((digest & 0x1FFFFF) << 43)
+    return tuple(coordinates)
+
+
+class HashingEmbedder:
+    """Embed texts into fixed-size, L2-normalized float32 vectors."""
+
+    def __init__(self, dimensions: int = 256, tokenize: Callable[[str], List[str]] = words) -> None:
+        """
+        Initialize the embedder.
+
+        Args:
+            dimensions: Size of the produced vectors
+            tokenize: Function splitting a text into normalized words
+        """
+        self.dimensions = dimensions
+        self.tokenize = tokenize
+
+    def embed(self, text: str) -> "array[float]":
+        """Return the embedding of a text; empty texts map to the zero vector."""
+        features: Counter[str] = Counter()
+        for word in self.tokenize(text):
+            features[word] += 1
+            padded = f"<{word}>"
+            for start in range(len(padded) - 2):
+                features["#" + padded[start : start + 3]] += 1
+
+        vector = [0.0] * self.dimensions
+        for feature, count in features.items():
+            weight = 1.0 + math.log(count)
+            if feature.startswith("#"):
+                weight *= TRIGRAM_WEIGHT
+            for coordinate, sign in _projection(feature, self.dimensions):
+                vector[coordinate] += sign * weight
+
+        norm = math.sqrt(math.sumprod(vector, vector))
+        return array("f", (value / norm for value in vector) if norm else vector)
+
+
+class EmbeddingMatrix:
+    """Row-major float32 matrix of normalized vectors with cosine queries."""
+
+    def __init__(self, dimensions: int) -> None:
+        """Create an empty matrix with rows of ``dimensions`` values."""
+        self.dimensions = dimensions
+        self.keys: List[str] = []
+        self._data = array("f")
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self.keys)
+
+    def add(self, key: str, vector: "array[float]") -> None:
+        """Append a normalized vector."""
+        if len(vector) != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions} dimensions, got {len(vector)}")
+        self.keys.append(key)
+        self._data.extend(vector)
+
+    def similarities(self, query: Sequence[float]) -> List[float]:
+        """Return the cosine similarity of every row with a normalized query vector."""
+        data, size = self._data, self.dimensions
+        return [math.sumprod(data[row * size : (row + 1) * size], query) for row in range(len(self.keys))]
+
+    def top_k(self, queries: Sequence[Sequence[float]], k: int) -> List[List[Tuple[str, float]]]:
+        """
+        Return the ``k`` most similar rows for each query.
+
+        Returns:
+            Per query, ``(key, similarity)`` pairs in descending similarity
+        """
+        results = []
+        for query in queries:
+            best = heapq.nlargest(k, enumerate(self.similarities(query)), key=lambda item: item[1])
+            results.append([(self.keys[row], similarity) for row, similarity in best])
+        return results
+
+
+class EmbeddingStore:
+    """Persist chunk vectors per uploaded file so unchanged files are embedded once."""
+
+    def __init__(
+        self,
+        directory: Path,
+        embedder: HashingEmbedder,
+        cache: Optional[ChunkCache] = None,
+        max_vectors_per_file: int = 4096,
+    ) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding one vector file per file hash
+            embedder: Embedder used for chunks without a stored vector
+            cache: Cache used to share vectors between files in the process
+            max_vectors_per_file: Vectors kept per file; the least recently stored are dropped first
+        """
+        self.directory = directory
+        self.embedder = embedder
+        self.cache = cache
+        self.max_vectors_per_file = max_vectors_per_file
+
+    def _path(self, file_hash: str) -> Path:
+        return self.directory / f"{file_hash}-v{EMBEDDING_VERSION}-{self.embedder.dimensions}.vec"
+
+    def _load(self, path: Path) -> Dict[str, "array[float]"]:
+        """Read a vector file: a JSON header line of chunk ids followed by float32 rows."""
+        try:
+            with open(path, "rb") as f:
+                keys = json.loads(f.readline())
+                data = array("f")
+                data.frombytes(f.read())
+        except (OSError, ValueError):
+            return {}
+        size = self.embedder.dimensions
+        if len(data) != len(keys) * size:
+            return {}
+        return {key: data[row * size : (row + 1) * size] for row, key in enumerate(keys)}
+
+    def _save(self, path: Path, vectors: Dict[str, "array[float]"]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # A unique temp file per write, so concurrent saves of the same file never share one
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(list(vectors)).encode("utf-8") + b"\n")
+                for vector in vectors.values():
+                    vector.tofile(f)
+            os.replace(temp_path, path)
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+
+    def _embed(self, chunk: Chunk) -> "array[float]":
+        if self.cache is None:
+            return self.embedder.embed(chunk.text)
+        key = (chunk.chunk_id, self.embedder.dimensions)
+        return self.cache.get_or_compute("embedding", key, lambda: self.embedder.embed(chunk.text))
+
+    def embed_file(self, file_hash: str, chunks: Sequence[Chunk]) -> List["array[float]"]:
+        """
+        Return the vectors of a file's chunks, embedding and persisting only new chunks.
+
+        Args:
+            file_hash: Content hash of the uploaded file
+            chunks: Chunks of that file
+        """
+        path = self._path(file_hash)
+        vectors = self._load(path)
+        missing = [chunk for chunk in chunks if chunk.chunk_id not in vectors]
+        for chunk in missing:
+            vectors[chunk.chunk_id] = self._embed(chunk)
+        result = [vectors[chunk.chunk_id] for chunk in chunks]
+        if missing:
+            # Move this request's chunks to the end and keep the newest vectors within the cap
+            for chunk in chunks:
+                if chunk.chunk_id in vectors:
+                    vectors[chunk.chunk_id] = vectors.pop(chunk.chunk_id)
+            self._save(path, dict(list(vectors.items())[-self.max_vectors_per_file :]))
+        return result
+
+
+def file_hash(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
@@ -0,0 +1,200 @@
+"""Hedged model calls to cut tail latency.
+
+A few upstream calls take far longer to produce their first token than the
+rest, and they dominate the slowest jobs. When a call has not produced its
+first token by a high percentile of the first-token times recently observed
+for the same deployment and prompt size, a duplicate call is started and
+whichever answers first is kept; the other is cancelled. A token bucket caps
+hedges at a fraction of recent calls with a small burst, so an upstream
+slowdown that affects every call cannot double the load, and each hedge must
+be admitted by the same capacity limits as an ordinary call.
+"""
+
+import asyncio
+import contextlib
+import math
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.services.metrics import metrics
+
+T = TypeVar("T")
+
+# Admits a hedge against the caller's capacity limits; returns the function releasing it, or None if there is no room
+HedgeAdmission = Callable[[], Awaitable[Optional[Callable[[], Awaitable[None]]]]]
+
+
+class LatencyTracker:
+    """Percentiles over a sliding window of latency samples."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of most recent samples kept
+            min_samples: Samples required before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample."""
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return the nearest-rank percentile, or None while there are too few samples."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+
+class LatencyBuckets:
+    """Latency trackers per deployment and prompt size, so large prompts are judged against their peers."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20, bucket_tokens: int = 1024) -> None:
+        """
+        Initialize the trackers.
+
+        Args:
+            window: Number of most recent samples kept per bucket
+            min_samples: Samples a bucket needs before it reports percentiles
+            bucket_tokens: Prompt size of the smallest bucket; each further bucket doubles it
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.bucket_tokens = bucket_tokens
+        self._trackers: Dict[Tuple[str, int], LatencyTracker] = {}
+
+    def _tracker(self, deployment: str, prompt_tokens: int) -> LatencyTracker:
+        key = (deployment, max(prompt_tokens // self.bucket_tokens, 1).bit_length())
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            tracker = self._trackers[key] = LatencyTracker(self.window, self.min_samples)
+        return tracker
+
+    def record(self, deployment: str, prompt_tokens: int, seconds: float) -> None:
+        """Add a latency sample of a call to a deployment."""
+        self._tracker(deployment, prompt_tokens).record(seconds)
+
+    def percentile(self, deployment: str, prompt_tokens: int, percent: float) -> Optional[float]:
+        """Return the percentile of calls of similar size to a deployment, or None while there are too few."""
+        return self._tracker(deployment, prompt_tokens).percentile(percent)
+
+
+class HedgeBudget:
+    """Token bucket allowing hedges for a fixed share of recent calls."""
+
+    def __init__(self, ratio: float = 0.05, burst: float = 5.0) -> None:
+        """
+        Initialize the budget.
+
+        Args:
+            ratio: Hedges earned per call
+            burst: Most hedges that can be saved up and spent at once
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+
+    def record_call(self) -> None:
+        """Earn a share of a hedge for a call that may be hedged."""
+        self.tokens = min(self.tokens + self.ratio, self.burst)
+
+    def try_spend(self) -> bool:
+        """Take one hedge from the budget if a whole one has been earned."""
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+async def _discard(task: "asyncio.Task[T]", stream: AsyncIterator[T]) -> None:
+    """Cancel a pending first-item read and close its stream."""
+    task.cancel()
+    with contextlib.suppress(BaseException):
+        await task
+    with contextlib.suppress(Exception):
+        await stream.aclose()  # type: ignore[attr-defined]
+
+
+async def hedged(
+    start: Callable[[], AsyncIterator[T]],
+    delay: Optional[float],
+    budget: HedgeBudget,
+    admit: Optional[HedgeAdmission] = None,
+) -> AsyncIterator[T]:
+    """
+    Yield the items of whichever of a call and its hedge produces an item first.
+
+    Args:
+        start: Function starting the call and returning its item stream
+        delay: Seconds without a first item after which a hedge is started, None to never hedge
+        budget: Budget a hedge is taken from
+        admit: Reserves capacity for the hedge, which is skipped if there is none; the
+            reservation is released once the hedge is cancelled or its stream is finished
+
+    Raises:
+        Exception: The error of the call, or of the hedge if both fail
+    """
+    budget.record_call()
+    primary = start()
+    attempts: Dict["asyncio.Task[T]", AsyncIterator[T]] = {}
+    attempts[asyncio.create_task(anext(primary))] = primary  # type: ignore[arg-type]
+    release: Optional[Callable[[], Awaitable[None]]] = None
+    hedge: Optional[AsyncIterator[T]] = None
+    deadline_passed = delay is None
+    winner = None
+    try:
+        while winner is None:
+            done, _ = await asyncio.wait(
+                attempts, timeout=None if deadline_passed else delay, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                deadline_passed = True
+                if budget.try_spend():
+                    if admit is not None:
+                        release = await admit()
+                        if release is None:
+                            metrics.increment("model.hedges_skipped")
+                            continue
+                    metrics.increment("model.hedges")
+                    hedge = start()
+                    attempts[asyncio.create_task(anext(hedge))] = hedge  # type: ignore[arg-type]
+                continue
+            for task in done:
+                stream = attempts.pop(task)
+                failed = task.exception() is not None and not isinstance(task.exception(), StopAsyncIteration)
+                # A failed attempt is only reported once no other attempt is left
+                if failed and attempts:
+                    await _discard(task, stream)
+                    continue
+                if stream is not primary:
+                    metrics.increment("model.hedge_wins")
+                winner = (task, stream)
+                break
+    finally:
+        for task, stream in list(attempts.items()):
+            await _discard(task, stream)
+        # A lost hedge gives its capacity back at once; a winning one keeps it until its stream ends
+        if release is not None and (winner is None or winner[1] is not hedge):
+            await release()
+            release = None
+
+    task, stream = winner
+    try:
+        try:
+            first = task.result()
+        except StopAsyncIteration:
+            return
+        yield first
+        async for item in stream:
+            yield item
+    finally:
+        try:
+            await stream.aclose()  # type: ignore[attr-defined]
+        finally:
+            if release is not None:
+                await release()
@@ -0,0 +1,70 @@
+"""Map-reduce generation for inputs larger than the model context.
+
+When the kept content does not fit in one call, consecutive chunks of each
+document are grouped into map inputs that do, every group is condensed into
+notes by its own model call, and the final document is generated from the
+notes. Map prompts do not depend on the request description, so the notes
+of a group are keyed only by its chunk identities and the prompt version and
+can be reused by any later job that uploads the same content.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Sequence
+
+from app.services.chunk_cache import ChunkCache
+from app.services.chunking import Chunk
+from app.services.token_packer import chunk_tokens
+
+MAP_SYSTEM_PROMPT = (
+    "You condense source excerpts into concise, factual notes for a later writing step. "
+    "Keep figures, names and dates exactly as written and do not add information."
+)
+MAP_TASK = "Condense the excerpts into notes"
+
+# Bump whenever the map prompt changes so cached notes are not reused across versions
+MAP_PROMPT_VERSION = "1"
+
+
+def group_chunks(chunks: Sequence[Chunk], max_tokens: int, cache: Optional[ChunkCache] = None) -> List[List[Chunk]]:
+    """
+    Group consecutive chunks of each document into map inputs.
+
+    Groups never span documents, so the groups of a document, and with them
+    the cached notes, do not change when it is uploaded with other files.
+
+    Args:
+        chunks: Chunks in document order
+        max_tokens: Token limit of a group; larger chunks form a group of their own
+        cache: Cache used for token counts
+    """
+    groups: List[List[Chunk]] = []
+    used = 0
+    for chunk in chunks:
+        tokens = chunk_tokens(chunk, cache)
+        if not groups or groups[-1][-1].document != chunk.document or used + tokens > max_tokens:
+            groups.append([])
+            used = 0
+        groups[-1].append(chunk)
+        used += tokens
+    return groups
+
+
+def group_key(group: Sequence[Chunk], prompt_version: str) -> str:
+    """Return the cache key of the notes of a group."""
+    material = [prompt_version, [chunk.chunk_id for chunk in group]]
+    return hashlib.sha256(json.dumps(material).encode("utf-8")).hexdigest()
+
+
+def map_messages(group: Sequence[Chunk]) -> List[Dict[str, str]]:
+    """Build the chat messages condensing one group."""
+    sources = "\n\n".join(f"### {chunk.document} (part {chunk.index + 1})\n{chunk.text}" for chunk in group)
+    return [
+        {"role": "system", "content": MAP_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Task: {MAP_TASK}\n\nSources:\n\n{sources}"},
+    ]
+
+
+def notes_chunk(group: Sequence[Chunk], key: str, notes: str) -> Chunk:
+    """Wrap the notes of a group as a chunk, so the reduce call is packed like any other input."""
+    return Chunk(chunk_id=key, document=group[0].document, index=group[0].index, text=notes)
@@ -0,0 +1,38 @@
+"""Process-wide counters for operational metrics."""
+
+from collections import Counter
+from threading import Lock
+from typing import Dict
+
+
+class Metrics:
+    """Named monotonic counters, safe to update from worker threads."""
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self._counters: Counter[str] = Counter()
+        self._lock = Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> int:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters[name]
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return a copy of all counters."""
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def reset(self) -> None:
+        """Reset all counters."""
+        with self._lock:
+            self._counters.clear()
+
+
+# Global instance
+metrics = Metrics()
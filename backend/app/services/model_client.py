@@ -0,0 +1,278 @@
+"""Async client for chat completions on Azure AI Foundry.
+
+A single ``httpx.AsyncClient`` is shared by all requests so TCP and TLS
+connections are kept alive and reused instead of being set up for every
+generation. The pool size is bounded and connect and read timeouts are
+separate, so a slow generation never looks like an unreachable endpoint.
+
+Jobs that do not need an answer in real time can instead go through the
+batch API: their requests are uploaded as one JSONL file, run as a batch job
+against the deployment's batch quota, and read back from its output file.
+"""
+
+import json
+import math
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.exceptions import ExternalServiceError, RateLimitError
+
+SERVICE_NAME = "azure-ai-foundry"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[int]:
+    """
+    Parse a ``Retry-After`` header given either as seconds or as an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or unreadable
+    """
+    if not value:
+        return None
+    try:
+        return max(math.ceil(float(value)), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(math.ceil((retry_at - datetime.now(timezone.utc)).total_seconds()), 0)
+
+
+def is_outage(error: ExternalServiceError) -> bool:
+    """
+    Return whether a model error means the endpoint is unhealthy.
+
+    Server errors, timeouts and connection failures do; client errors such as
+    400, 401 or 404 are answered by a working endpoint and concern a single
+    request or the configuration, so they must not open the circuit breaker.
+    """
+    status_code = error.details.get("status_code")
+    return status_code is None or status_code >= 500
+
+
+class ModelClient:
+    """Pooled chat completions client with streaming support."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: str,
+        deployment: str,
+        api_version: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        """
+        Initialize the client.
+
+        Args:
+            endpoint: Base URL of the Foundry resource
+            api_key: API key sent in the ``api-key`` header
+            deployment: Model deployment name
+            api_version: Azure OpenAI API version
+            max_connections: Maximum concurrent connections in the pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Seconds allowed between received bytes
+            transport: Alternative transport, such as an in-process stand-in app
+        """
+        self.deployment = deployment
+        self.api_version = api_version
+        self._client = httpx.AsyncClient(
+            base_url=endpoint,
+            headers={"api-key": api_key},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout),
+            transport=transport,
+        )
+
+    def _path(self, deployment: Optional[str]) -> str:
+        return f"/openai/deployments/{deployment or self.deployment}/chat/completions"
+
+    def _payload(
+        self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, stream: bool
+    ) -> Dict[str, Any]:
+        return {"messages": messages, "max_tokens": max_tokens, "temperature": temperature, "stream": stream}
+
+    def _check(self, response: httpx.Response) -> None:
+        """Translate error responses into API exceptions."""
+        if response.status_code == 429:
+            raise RateLimitError(
+                message="Model rate limit exceeded", retry_after=parse_retry_after(response.headers.get("retry-after"))
+            )
+        if response.status_code >= 400:
+            raise ExternalServiceError(
+                SERVICE_NAME,
+                message=f"Model request failed with status {response.status_code}",
+                details={"status_code": response.status_code},
+            )
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Send a request to a non-streaming endpoint and check its status."""
+        try:
+            response = await self._client.request(method, path, params={"api-version": self.api_version}, **kwargs)
+        except httpx.HTTPError as e:
+            raise ExternalServiceError(SERVICE_NAME, message=f"Model request failed: {e}") from e
+        self._check(response)
+        return response
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 4096,
+        temperature: float = 0.2,
+        deployment: Optional[str] = None,
+    ) -> str:
+        """
+        Run a chat completion and return the generated text.
+
+        Args:
+            messages: Chat messages
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            deployment: Deployment to call instead of the default one
+
+        Raises:
+            RateLimitError: If the deployment is throttling requests
+            ExternalServiceError: If the request fails
+        """
+        response = await self._request(
+            "POST", self._path(deployment), json=self._payload(messages, max_tokens, temperature, stream=False)
+        )
+        return str(response.json()["choices"][0]["message"]["content"] or "")
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 4096,
+        temperature: float = 0.2,
+        deployment: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Run a streaming chat completion, yielding text deltas as they arrive.
+
+        Args:
+            messages: Chat messages
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            deployment: Deployment to call instead of the default one
+
+        Raises:
+            RateLimitError: If the deployment is throttling requests
+            ExternalServiceError: If the request fails
+        """
+        try:
+            async with self._client.stream(
+                "POST",
+                self._path(deployment),
+                params={"api-version": self.api_version},
+                json=self._payload(messages, max_tokens, temperature, stream=True),
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                self._check(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    for choice in json.loads(data).get("choices", []):
+                        content = (choice.get("delta") or {}).get("content")
+                        if content:
+                            yield content
+        except httpx.HTTPError as e:
+            raise ExternalServiceError(SERVICE_NAME, message=f"Model stream failed: {e}") from e
+
+    async def submit_batch(
+        self,
+        requests: Sequence[Tuple[str, List[Dict[str, str]], int]],
+        temperature: float = 0.2,
+        deployment: Optional[str] = None,
+    ) -> str:
+        """
+        Upload chat completions as an input file and start a batch job on it.
+
+        Args:
+            requests: ``(custom_id, messages, max_tokens)`` of every completion
+            temperature: Sampling temperature
+            deployment: Batch deployment to run on instead of the default one
+
+        Returns:
+            ID of the batch job
+
+        Raises:
+            RateLimitError: If the batch quota is exhausted
+            ExternalServiceError: If the upload or the job creation fails
+        """
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/chat/completions",
+                    "body": {
+                        "model": deployment or self.deployment,
+                        **self._payload(messages, max_tokens, temperature, stream=False),
+                    },
+                }
+            )
+            for custom_id, messages, max_tokens in requests
+        ]
+        upload = await self._request(
+            "POST",
+            "/openai/files",
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+        )
+        batch = await self._request(
+            "POST",
+            "/openai/batches",
+            json={"input_file_id": upload.json()["id"], "endpoint": "/chat/completions", "completion_window": "24h"},
+        )
+        return str(batch.json()["id"])
+
+    async def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Return a batch job, including its ``status`` and ``output_file_id``."""
+        response = await self._request("GET", f"/openai/batches/{batch_id}")
+        batch: Dict[str, Any] = response.json()
+        return batch
+
+    async def batch_results(self, output_file_id: str) -> Dict[str, str]:
+        """
+        Read the output file of a batch job.
+
+        Returns:
+            Generated text by custom ID; completions that failed are left out
+        """
+        response = await self._request("GET", f"/openai/files/{output_file_id}/content")
+        results = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            result = item.get("response") or {}
+            if item.get("error") or result.get("status_code") != 200:
+                continue
+            results[str(item["custom_id"])] = str(result["body"]["choices"][0]["message"]["content"] or "")
+        return results
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        await self._client.aclose()
@@ -0,0 +1,219 @@
+"""Local stand-in for the Azure AI Foundry chat completions API.
+
+The stand-in accepts the same requests as a Foundry deployment and answers
+with a deterministic document assembled from the prompt, streamed token by
+token when asked to. It lets the generation pipeline be tested and
+benchmarked without network access or credentials. The batch API (file
+upload, batch jobs and their output files) is emulated as well, with jobs
+completing a configurable delay after submission. It runs in-process when
+no endpoint is configured, or standalone::
+
+    python -m app.services.model_stand_in --port 8081 --token-delay 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+_TOKENS = re.compile(r"\S+\s*")
+_SOURCE = re.compile(r"^### (.+)$", re.MULTILINE)
+
+
+def _key_points(prompt: str, document: Optional[str] = None) -> List[str]:
+    """Return a bullet with the first sentence or line of each source, optionally of one document only."""
+    points = []
+    for match in _SOURCE.finditer(prompt):
+        header = match.group(1).strip()
+        if document is not None and not header.startswith(f"{document} (part "):
+            continue
+        body = prompt[match.end() :].lstrip("\n").split("\n### ", 1)[0]
+        first_line = body.strip().split("\n", 1)[0]
+        sentence = re.split(r"(?<=[.!?])\s", first_line, maxsplit=1)[0].strip()
+        if sentence:
+            points.append(f"- **{header}**: {sentence}")
+    return points or ["- No source material was provided."]
+
+
+def _generate(messages: List[Dict[str, Any]]) -> str:
+    """
+    Assemble a document from the task and the first sentence or line of each source.
+
+    Outline steps are answered with an overview section plus one section per
+    source document; section steps with the key points of that document.
+    """
+    prompt = "\n".join(str(message.get("content", "")) for message in messages if message.get("role") == "user")
+    task = re.search(r"^Task: (.+)$", prompt, re.MULTILINE)
+    title = task.group(1).strip() if task else "Generated document"
+    step = re.search(r"^Step: (?:outline|section \d+ of \d+: (.+))$", prompt, re.MULTILINE)
+
+    if step and step.group(1) is None:
+        documents = dict.fromkeys(match.group(1).rsplit(" (part ", 1)[0] for match in _SOURCE.finditer(prompt))
+        return "\n".join([f"# {title}", "Overview", *documents]) + "\n"
+    if step:
+        section = step.group(1).strip()
+        return "\n".join([f"## {section}", "", *_key_points(prompt, None if section == "Overview" else section)])
+    return "\n".join([f"# {title}", "", "## Key points", "", *_key_points(prompt)]) + "\n"
+
+
+def _completion(deployment: str, body: Dict[str, Any], completion_id: str, created: int) -> Dict[str, Any]:
+    """Build a non-streaming chat completion response body."""
+    prompt_tokens = sum(len(_TOKENS.findall(str(m.get("content", "")))) for m in body.get("messages", []))
+    tokens = _TOKENS.findall(_generate(body.get("messages", [])))[: body.get("max_tokens") or None]
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": deployment,
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        },
+    }
+
+
+def _batch_view(batch: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the public fields of a stand-in batch job and its current status."""
+    view = {key: value for key, value in batch.items() if not key.startswith("_")}
+    done = time.monotonic() >= batch["_ready_at"]
+    view["status"] = "completed" if done else "in_progress"
+    view["output_file_id"] = batch["_output_file_id"] if done else None
+    view["error_file_id"] = None
+    return view
+
+
+def create_stand_in_app(token_delay: float = 0.0, batch_delay: float = 0.0) -> FastAPI:
+    """
+    Create the stand-in application.
+
+    Args:
+        token_delay: Seconds to wait between streamed tokens, to mimic generation speed
+        batch_delay: Seconds a batch job stays in progress after it is created
+    """
+    app = FastAPI(title="Azure AI Foundry stand-in")
+    files: Dict[str, bytes] = {}
+    batches: Dict[str, Dict[str, Any]] = {}
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request) -> Any:
+        body = await request.json()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            return JSONResponse(_completion(deployment, body, completion_id, created))
+
+        content = _generate(body.get("messages", []))
+        tokens = _TOKENS.findall(content)[: body.get("max_tokens") or None]
+
+        async def events() -> AsyncIterator[str]:
+            for token in tokens:
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": deployment,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/openai/files")
+    async def upload_file(request: Request) -> Any:
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="A file is required")
+        content = await upload.read()
+        file_id = f"file-{uuid.uuid4().hex}"
+        files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "purpose": form.get("purpose", "batch"),
+            "filename": upload.filename,
+            "bytes": len(content),
+            "status": "processed",
+        }
+
+    @app.get("/openai/files/{file_id}/content")
+    async def file_content(file_id: str) -> Response:
+        if file_id not in files:
+            raise HTTPException(status_code=404, detail="File not found")
+        return Response(files[file_id], media_type="application/jsonl")
+
+    @app.post("/openai/batches")
+    async def create_batch(request: Request) -> Any:
+        body = await request.json()
+        if body.get("input_file_id") not in files:
+            raise HTTPException(status_code=400, detail="Unknown input file")
+        created = int(time.time())
+        # Jobs are answered at submission and reported in progress until the delay has passed
+        output = []
+        for line in files[body["input_file_id"]].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item_body = item.get("body", {})
+            completion = _completion(item_body.get("model", ""), item_body, f"chatcmpl-{uuid.uuid4().hex}", created)
+            output.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": item.get("custom_id"),
+                        "response": {"status_code": 200, "body": completion},
+                        "error": None,
+                    }
+                )
+            )
+        output_file_id = f"file-{uuid.uuid4().hex}"
+        files[output_file_id] = "\n".join(output).encode("utf-8")
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "created_at": created,
+            "request_counts": {"total": len(output), "completed": len(output), "failed": 0},
+            "_ready_at": time.monotonic() + batch_delay,
+            "_output_file_id": output_file_id,
+        }
+        return _batch_view(batches[batch_id])
+
+    @app.get("/openai/batches/{batch_id}")
+    async def get_batch(batch_id: str) -> Any:
+        if batch_id not in batches:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        return _batch_view(batches[batch_id])
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--batch-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_stand_in_app(token_delay=args.token_delay, batch_delay=args.batch_delay), host=args.host, port=args.port
+    )
@@ -0,0 +1,153 @@
+"""Model call budget shared by all worker processes on a node.
+
+Each uvicorn worker runs its own adaptive limiter, so with several workers
+per container their combined concurrency can exceed the provider quota. The
+node budget keeps one small state file that every worker updates under an
+exclusive ``flock``: a set of leases bounds the concurrent calls on the node
+and a token bucket bounds the tokens requested per minute. Leases record the
+owning process, so slots held by a worker that crashed are reclaimed.
+
+Every operation takes a blocking ``flock`` and does file I/O, so callers on
+the event loop run them in a thread; ``acquire`` does so itself.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+
+@dataclass(frozen=True)
+class BudgetLease:
+    """A slot and tokens drawn from the node budget."""
+
+    lease_id: str
+    tokens: int
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class NodeBudget:
+    """File-locked semaphore and token bucket shared across processes."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_concurrency: int = 32,
+        tokens_per_minute: int = 0,
+        lease_ttl: float = 600.0,
+        poll_interval: float = 0.05,
+    ) -> None:
+        """
+        Initialize the budget.
+
+        Args:
+            path: State file shared by the workers, created on first use
+            max_concurrency: Model calls allowed at once on the node, 0 for no limit
+            tokens_per_minute: Tokens that may be requested per minute on the node, 0 for no limit
+            lease_ttl: Seconds after which a lease is considered abandoned
+            poll_interval: Seconds between attempts while the budget is exhausted
+        """
+        self.path = path
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        """Yield the shared state under an exclusive lock and write it back afterwards."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                state.setdefault("leases", {})
+                self._refresh(state, time.time())
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self, state: Dict[str, Any], now: float) -> None:
+        """Drop abandoned leases and refill the token bucket."""
+        state["leases"] = {
+            lease_id: lease
+            for lease_id, lease in state["leases"].items()
+            if now - lease["acquired_at"] < self.lease_ttl and _process_alive(lease["pid"])
+        }
+        if self.tokens_per_minute:
+            elapsed = max(now - state.get("refilled_at", now), 0.0)
+            tokens = state.get("tokens", float(self.tokens_per_minute))
+            state["tokens"] = min(tokens + elapsed * self.tokens_per_minute / 60.0, float(self.tokens_per_minute))
+            state["refilled_at"] = now
+
+    def try_acquire(self, tokens: int = 0) -> Optional[BudgetLease]:
+        """
+        Take a slot and ``tokens`` from the budget if both are available.
+
+        Requests larger than the whole bucket wait for a full bucket instead of forever.
+        """
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        with self._state() as state:
+            if self.max_concurrency and len(state["leases"]) >= self.max_concurrency:
+                return None
+            if self.tokens_per_minute:
+                if state["tokens"] < tokens:
+                    return None
+                state["tokens"] -= tokens
+            lease = BudgetLease(lease_id=uuid.uuid4().hex, tokens=tokens)
+            state["leases"][lease.lease_id] = {"pid": os.getpid(), "tokens": tokens, "acquired_at": time.time()}
+            return lease
+
+    async def acquire(self, tokens: int = 0) -> BudgetLease:
+        """Wait until a slot and ``tokens`` are available on the node."""
+        while True:
+            lease = await asyncio.to_thread(self.try_acquire, tokens)
+            if lease is not None:
+                return lease
+            await asyncio.sleep(self.poll_interval)
+
+    def release(self, lease: BudgetLease) -> None:
+        """Return a slot to the budget; spent tokens refill with time."""
+        with self._state() as state:
+            state["leases"].pop(lease.lease_id, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the configured limits and the current usage of the node."""
+        with self._state() as state:
+            now = time.time()
+            leases = [
+                {"pid": lease["pid"], "tokens": lease["tokens"], "age_seconds": round(now - lease["acquired_at"], 3)}
+                for lease in state["leases"].values()
+            ]
+            return {
+                "path": str(self.path),
+                "max_concurrency": self.max_concurrency,
+                "in_use": len(leases),
+                "tokens_per_minute": self.tokens_per_minute,
+                "tokens_available": int(state["tokens"]) if self.tokens_per_minute else None,
+                "leases": leases,
+            }
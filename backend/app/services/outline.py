@@ -0,0 +1,143 @@
+"""Outline-driven selection of the document sections worth extracting.
+
+A cheap section index (PDF bookmarks, DOCX heading styles) is matched against
+the request description. Sections whose titles share terms with it are
+extracted in full; the remaining sections are pulled in, in document order,
+only while the extraction token budget allows. Documents without an outline,
+or descriptions that match no section, are extracted completely.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Rough UTF-8 bytes per model token, used until content is actually tokenized
+BYTES_PER_TOKEN = 4
+
+_WORD = re.compile(r"[^\W\d_]{3,}")
+_STOPWORDS = frozenset(
+    {
+        "about", "all", "and", "any", "are", "based", "but", "can", "chapter", "create", "describe", "document",
+        "documents", "each", "for", "from", "generate", "give", "has", "have", "how", "into", "its", "list", "make",
+        "not", "our", "part", "please", "report", "section", "sections", "summarise", "summarize", "summary",
+        "that", "the", "their", "them", "then", "these", "this", "those", "what", "when", "which", "with", "write",
+        "you", "your",
+    }
+)  # fmt: skip
+
+
+@dataclass(frozen=True)
+class Section:
+    """An outline entry covering units ``[start, end)`` including its subsections."""
+
+    title: str
+    level: int
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class ExtractionPlan:
+    """Units to extract unconditionally and optional spans in document order."""
+
+    relevant: FrozenSet[int]
+    optional: Tuple[range, ...]
+    matched: Tuple[str, ...]
+
+
+def words(text: str) -> List[str]:
+    """Return the normalized content words of a text in order, with repeats."""
+    return [
+        word[:-1] if word.endswith("s") and len(word) > 4 else word
+        for word in _WORD.findall(text.lower())
+        if word not in _STOPWORDS
+    ]
+
+
+def terms(text: str) -> Set[str]:
+    """Return the distinct normalized content words of a text."""
+    return set(words(text))
+
+
+def build_sections(entries: Sequence[Tuple[str, int, int]], unit_count: int) -> List[Section]:
+    """
+    Turn ``(title, level, start unit)`` outline entries into sections.
+
+    A section extends until the next entry at the same or a higher level, so
+    it covers its own subsections.
+    """
+    ordered = sorted((entry for entry in entries if 0 <= entry[2] < unit_count), key=lambda entry: entry[2])
+    sections: List[Section] = []
+    for index, (title, level, start) in enumerate(ordered):
+        end = unit_count
+        for _, next_level, next_start in ordered[index + 1 :]:
+            if next_level <= level and next_start > start:
+                end = next_start
+                break
+        sections.append(Section(title=title, level=level, start=start, end=end))
+    return sections
+
+
+def plan_extraction(sections: Sequence[Section], unit_count: int, description: str) -> Optional[ExtractionPlan]:
+    """
+    Decide which units of a document to extract for a description.
+
+    Returns:
+        A plan, or None when the whole document should be extracted
+    """
+    wanted = terms(description)
+    matched = [section for section in sections if wanted & terms(section.title)]
+    if not matched:
+        return None
+
+    relevant: Set[int] = set()
+    for section in matched:
+        relevant.update(range(section.start, section.end))
+
+    # Remaining units, grouped by the section that starts them
+    starts = sorted({0, *(section.start for section in sections)})
+    optional: List[range] = []
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else unit_count
+        # Matched sections cover whole spans, so a span is either fully relevant or not at all
+        if start not in relevant and start < end:
+            optional.append(range(start, end))
+    return ExtractionPlan(
+        relevant=frozenset(relevant),
+        optional=tuple(optional),
+        matched=tuple(section.title for section in matched),
+    )
+
+
+def extract_within_budget(
+    plan: ExtractionPlan,
+    extract_unit: Callable[[int], T],
+    unit_tokens: Callable[[T], int],
+    token_budget: int,
+) -> Dict[int, T]:
+    """
+    Extract the relevant units, then optional spans while the budget allows.
+
+    The cost of an optional span is estimated from the average token count of
+    the units extracted so far, so spans that would overflow the budget are
+    never parsed.
+
+    Returns:
+        Extracted units keyed by unit index
+    """
+    extracted: Dict[int, T] = {}
+    used = 0
+    for unit in sorted(plan.relevant):
+        extracted[unit] = extract_unit(unit)
+        used += unit_tokens(extracted[unit])
+
+    for span in plan.optional:
+        average = used / len(extracted) if extracted else 0
+        if used + average * len(span) > token_budget:
+            continue
+        for unit in span:
+            extracted[unit] = extract_unit(unit)
+            used += unit_tokens(extracted[unit])
+    return extracted
@@ -0,0 +1,179 @@
+"""Registry of versioned generation prompt templates.
+
+Templates are TOML files with a name, a version, a system prompt, static
+instructions and whether long documents may be written section by section.
+They are compiled once: the static segments are rendered and their token
+counts computed up front, and every prompt is laid out with the static text
+first, then the sources, then the request. Jobs with the same template
+therefore share a byte-identical prefix, and jobs on the same files share it
+up to the request, so provider-side prompt caching can reuse it.
+
+The template version and a digest of its text are part of the result cache
+key, so an edit invalidates cached documents even if the version was not
+bumped. The directory is rescanned for changed files in a worker thread at
+most every few seconds, so templates can be edited without a restart and
+without blocking the event loop. A file that fails to compile is logged and
+the previously loaded version of it stays in use.
+"""
+
+import asyncio
+import hashlib
+import time
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app.services.token_packer import count_tokens
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Templates shipped with the service
+DEFAULT_TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "prompt_templates"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A compiled generation template."""
+
+    name: str
+    version: int
+    description: str
+    system: str
+    instructions: str
+    prefix_tokens: int
+    sectioned: bool = True  # Whether long inputs may be written section by section
+    digest: str = ""  # Hash of the prompt text, so edits without a version bump change the key
+
+    @property
+    def key(self) -> str:
+        """Identity of the template text, used in cache keys."""
+        return f"{self.name}@{self.version}+{self.digest}" if self.digest else f"{self.name}@{self.version}"
+
+    def prompt_tokens(self, description: str) -> int:
+        """Estimate the prompt tokens of a request, excluding its sources."""
+        return self.prefix_tokens + count_tokens(description)
+
+    def render(self, description: str, output_format: str, sources: str) -> List[Dict[str, str]]:
+        """Build the chat messages of a request, static prefix first."""
+        return [
+            {"role": "system", "content": self.system},
+            {
+                "role": "user",
+                "content": f"{self.instructions}\n\nSources:\n\n{sources}\n\n"
+                f"Task: {description}\nOutput format: {output_format}",
+            },
+        ]
+
+
+def compile_template(path: Path) -> PromptTemplate:
+    """
+    Load and compile a template file.
+
+    Raises:
+        ValueError: If the file is not valid TOML or misses required fields
+    """
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+    version = data.get("version")
+    if not isinstance(version, int) or isinstance(version, bool) or version < 1:
+        raise ValueError(f"{path.name}: 'version' must be a positive integer")
+    fields = {}
+    for field in ("system", "instructions"):
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"{path.name}: '{field}' must be a non-empty string")
+        fields[field] = value.strip()
+    sectioned = data.get("sections", True)
+    if not isinstance(sectioned, bool):
+        raise ValueError(f"{path.name}: 'sections' must be true or false")
+    digest = hashlib.sha256(
+        "\0".join((fields["system"], fields["instructions"], str(sectioned))).encode("utf-8")
+    ).hexdigest()[:12]
+    return PromptTemplate(
+        name=str(data.get("name") or path.stem),
+        version=version,
+        description=str(data.get("description", "")),
+        system=fields["system"],
+        instructions=fields["instructions"],
+        prefix_tokens=count_tokens(fields["system"]) + count_tokens(fields["instructions"]),
+        sectioned=sectioned,
+        digest=digest,
+    )
+
+
+class TemplateRegistry:
+    """Named templates loaded from a directory and reloaded when their files change."""
+
+    def __init__(self, directory: Path = DEFAULT_TEMPLATE_DIR, reload_interval: float = 2.0) -> None:
+        """
+        Initialize the registry and load the templates.
+
+        Args:
+            directory: Directory of ``*.toml`` template files
+            reload_interval: Minimum seconds between checks for changed files
+        """
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._files: Dict[Path, Tuple[int, str]] = {}  # path -> (mtime_ns, template name)
+        self._checked_at = 0.0
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Compile new and changed template files and drop templates whose file was removed.
+
+        The new state is built aside and swapped in at once, so lookups running
+        alongside a reload in a worker thread see either the old or the new set.
+        """
+        self._checked_at = time.monotonic()
+        templates = dict(self._templates)
+        files = dict(self._files)
+        paths = set(self.directory.glob("*.toml"))
+        for path in set(files) - paths:
+            _, name = files.pop(path)
+            templates.pop(name, None)
+        for path in sorted(paths):
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            previous = files.get(path, (0, ""))
+            if previous[0] == mtime:
+                continue
+            try:
+                template = compile_template(path)
+            except (OSError, ValueError) as e:
+                # Remember the broken revision so it is reported once, and keep serving the previous one
+                files[path] = (mtime, previous[1])
+                logger.warning("Failed to load prompt template", extra={"path": str(path), "error": str(e)})
+                continue
+            if previous[1] and previous[1] != template.name:
+                templates.pop(previous[1], None)
+            files[path] = (mtime, template.name)
+            templates[template.name] = template
+            logger.info("Loaded prompt template", extra={"template": template.key})
+        self._templates, self._files = templates, files
+
+    async def refresh(self) -> None:
+        """Reload changed files in a worker thread if the reload interval has passed since the last check."""
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        # Claim the check up front so concurrent callers do not rescan the directory as well
+        self._checked_at = time.monotonic()
+        await asyncio.to_thread(self.reload)
+
+    def get(self, name: str) -> PromptTemplate:
+        """
+        Return a loaded template by name.
+
+        Raises:
+            KeyError: If no template has that name
+        """
+        return self._templates[name]
+
+    def names(self) -> List[str]:
+        """Return the names of all loaded templates."""
+        return sorted(self._templates)
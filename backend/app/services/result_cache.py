@@ -0,0 +1,202 @@
+"""Cache of generated documents keyed on everything that determines the output.
+
+Scheduled report jobs often resubmit byte-identical requests. The cache key
+combines the sorted hashes of the uploaded files, the normalized description,
+the output format, the prompt version and the model deployment, so an exact
+hit is only possible when a fresh generation would see exactly the same input.
+
+Requests against the same files whose descriptions are merely worded
+differently ("Summarize Q3 report", "Give me a summary of the Q3 report") can
+also reuse a result when the caller opts in: descriptions are embedded
+locally and compared within the scope of identical files, format, prompt
+version and deployment. A bag-of-words similarity barely moves when a long
+description gains a few words, although "in French", "technical" instead of
+"executive" or a leading "do not" change what is asked for. So besides the
+similarity, both descriptions must have the same content words (after
+stemming and dropping conversational filler), including numbers and
+negations; only filler and word forms may differ.
+"""
+
+import hashlib
+import json
+import math
+import re
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.services.embeddings import HashingEmbedder
+
+_SPACES = re.compile(r"\s+")
+_DESCRIPTION_WORD = re.compile(r"\w+")
+# Longest first, so "summarization", "summarize" and "summary" share a stem
+_SUFFIXES = (
+    "izations", "ization", "isation", "izes", "ises", "ized", "ised", "ize", "ise", "ing", "ies", "ed", "es", "s", "y",
+)  # fmt: skip
+_FILLER = frozenset(
+    {
+        "a", "an", "and", "about", "as", "based", "can", "could", "for", "from", "give", "i", "in", "into", "is",
+        "it", "me", "my", "of", "on", "our", "please", "the", "this", "to", "us", "want", "with", "would", "you",
+    }
+)  # fmt: skip
+
+
+def normalize_description(description: str) -> str:
+    """Normalize a description so formatting-only differences map to the same key."""
+    normalized = unicodedata.normalize("NFKC", description).casefold()
+    return _SPACES.sub(" ", normalized).strip().rstrip(".!?").strip()
+
+
+def result_key(
+    file_hashes: Iterable[str], description: str, output_format: str, prompt_version: str, deployment: str
+) -> str:
+    """Return the cache key of a generation request."""
+    material = [sorted(file_hashes), normalize_description(description), output_format, prompt_version, deployment]
+    return hashlib.sha256(json.dumps(material).encode("utf-8")).hexdigest()
+
+
+def scope_key(file_hashes: Iterable[str], output_format: str, prompt_version: str, deployment: str) -> str:
+    """Return the key of everything but the description, within which descriptions are compared."""
+    material = [sorted(file_hashes), output_format, prompt_version, deployment]
+    return hashlib.sha256(json.dumps(material).encode("utf-8")).hexdigest()
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[: -len(suffix)]
+    return word
+
+
+def description_words(description: str) -> List[str]:
+    """Split a description into stemmed words, dropping conversational filler."""
+    return [
+        _stem(word) for word in _DESCRIPTION_WORD.findall(normalize_description(description)) if word not in _FILLER
+    ]
+
+
+def description_anchors(description: str) -> FrozenSet[str]:
+    """Return the content words of a description, which must match exactly for a semantic hit."""
+    return frozenset(description_words(description))
+
+
+@dataclass(frozen=True)
+class DescriptionVector:
+    """Embedding of a description with the content words that must match exactly."""
+
+    vector: "array[float]"
+    anchors: FrozenSet[str]
+
+
+def embed_description(embedder: HashingEmbedder, description: str) -> DescriptionVector:
+    """Embed a description for semantic lookups."""
+    return DescriptionVector(vector=embedder.embed(description), anchors=description_anchors(description))
+
+
+@dataclass(frozen=True)
+class RequestCacheKey:
+    """Everything needed to look up and store the result of one request."""
+
+    key: str
+    scope: str
+    description: DescriptionVector
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """A generated document and when it was produced."""
+
+    output: str
+    created_at: float
+
+
+class ResultCache:
+    """LRU cache of generated documents with a time-to-live."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 86400.0) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached documents
+            ttl_seconds: Seconds after which a cached document is no longer served
+        """
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._scopes: Dict[str, Dict[str, DescriptionVector]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of cached documents."""
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        """Return the cached document for a key, if present and fresh."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.created_at > self._ttl_seconds:
+            del self._entries[key]
+            self._forget(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def find_similar(
+        self, scope: str, description: DescriptionVector, threshold: float
+    ) -> Optional[Tuple[CachedResult, float]]:
+        """
+        Return the cached document whose description is most similar within a scope.
+
+        Args:
+            scope: Scope key of the request
+            description: Embedded description of the request
+            threshold: Minimum cosine similarity for a match
+
+        Returns:
+            The document and its similarity, or None when nothing is close enough
+        """
+        best: Optional[Tuple[str, float]] = None
+        for key, candidate in self._scopes.get(scope, {}).items():
+            if candidate.anchors != description.anchors:
+                continue
+            similarity = math.sumprod(candidate.vector, description.vector)
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        if best is None:
+            return None
+        entry = self.get(best[0])
+        return (entry, best[1]) if entry is not None else None
+
+    def put(
+        self, key: str, output: str, scope: Optional[str] = None, description: Optional[DescriptionVector] = None
+    ) -> None:
+        """
+        Store a generated document.
+
+        Args:
+            key: Exact cache key
+            output: Generated document
+            scope: Scope key, to make the document available to similar descriptions
+            description: Embedded description, required together with ``scope``
+        """
+        self._entries[key] = CachedResult(output=output, created_at=time.time())
+        self._entries.move_to_end(key)
+        if scope is not None and description is not None:
+            self._scopes.setdefault(scope, {})[key] = description
+        while len(self._entries) > self._max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._forget(evicted)
+
+    def _forget(self, key: str) -> None:
+        """Drop a key from the semantic index."""
+        for scope, descriptions in list(self._scopes.items()):
+            if descriptions.pop(key, None) is not None and not descriptions:
+                del self._scopes[scope]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the current size."""
+        return {"entries": len(self._entries), "scopes": len(self._scopes)}
@@ -0,0 +1,147 @@
+"""Section-parallel generation of long documents.
+
+A single call writes a long report token by token, so its duration is the
+sum of all sections. Instead the model is first asked for an outline, then
+every section is written by its own call, all running concurrently under the
+model concurrency limit. Sections are streamed in outline order: the
+section at the head is forwarded live while later ones buffer, so a report
+takes roughly as long as its slowest section.
+
+Only the outline call sees all sources. Each section call gets the chunks
+ranking highest for its title under a token budget, so writing a report by
+section does not multiply the input tokens by the number of sections.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+from app.services.bm25 import BM25Index
+from app.services.chunking import Chunk
+
+OUTLINE_SYSTEM_PROMPT = (
+    "You plan documents grounded only in the provided source material. Reply with the document title as a "
+    "'# ' heading on the first line, then one section title per line and nothing else."
+)
+SECTION_SYSTEM_PROMPT = (
+    "You write one section of a larger document, grounded only in the provided source material. Start with "
+    "the section title as a '## ' heading and do not write other sections. Answer in Markdown."
+)
+
+_LIST_MARKER = re.compile(r"^(?:#+|[-*+]|\d+[.)])\s*")
+
+
+@dataclass(frozen=True)
+class Outline:
+    """Title and section titles of a planned document."""
+
+    title: str
+    sections: List[str]
+
+
+def format_sources(chunks: Sequence[Chunk]) -> str:
+    """Render chunks as the sources block of a prompt."""
+    return "\n\n".join(f"### {chunk.document} (part {chunk.index + 1})\n{chunk.text}" for chunk in chunks)
+
+
+def _system_prompt(system: str, step_prompt: str) -> str:
+    return f"{system}\n\n{step_prompt}" if system else step_prompt
+
+
+def outline_messages(
+    description: str, output_format: str, sources: str, guidance: str = "", system: str = ""
+) -> List[Dict[str, str]]:
+    """Build the chat messages asking for an outline, with the template's system prompt and instructions."""
+    return [
+        {"role": "system", "content": _system_prompt(system, OUTLINE_SYSTEM_PROMPT)},
+        {
+            "role": "user",
+            "content": f"{guidance}\n\nSources:\n\n{sources}\n\n"
+            f"Task: {description}\nOutput format: {output_format}\nStep: outline",
+        },
+    ]
+
+
+def parse_outline(text: str, max_sections: int) -> Outline:
+    """
+    Parse an outline reply.
+
+    Markdown heading, bullet and numbering markers are stripped and
+    repeated titles dropped; at most ``max_sections`` sections are kept.
+    """
+    title = ""
+    sections: List[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not title and not sections and line.startswith("# "):
+            title = line[2:].strip()
+            continue
+        section = _LIST_MARKER.sub("", line).strip().strip("*").strip()
+        if section and section not in sections:
+            sections.append(section)
+    return Outline(title=title, sections=sections[:max_sections])
+
+
+def section_sources(
+    chunks: Sequence[Chunk],
+    outline: Outline,
+    description: str,
+    token_budget: int,
+    tokens: Callable[[Chunk], int],
+) -> List[List[Chunk]]:
+    """
+    Pick the sources of every section of an outline.
+
+    Chunks are ranked by their BM25 score against the section title, ties
+    broken by their score against the description, and taken while they fit
+    ``token_budget``; every section gets at least one chunk. The selected
+    chunks keep their original order.
+
+    Args:
+        chunks: Packed chunks of the request
+        outline: Planned document
+        description: Request description
+        token_budget: Source tokens per section
+        tokens: Returns the token count of a chunk
+
+    Returns:
+        The chunks of each section, in outline order
+    """
+    index = BM25Index([chunk.text for chunk in chunks])
+    baseline = index.score(description)
+    selected = []
+    for section in outline.sections:
+        scores = index.score(section)
+        ranked = sorted(range(len(chunks)), key=lambda i: (scores[i], baseline[i]), reverse=True)
+        picked: List[int] = []
+        used = 0
+        for position in ranked:
+            cost = tokens(chunks[position])
+            if picked and used + cost > token_budget:
+                continue
+            picked.append(position)
+            used += cost
+        selected.append([chunks[position] for position in sorted(picked)])
+    return selected
+
+
+def section_messages(
+    description: str,
+    output_format: str,
+    sources: str,
+    outline: Outline,
+    index: int,
+    guidance: str = "",
+    system: str = "",
+) -> List[Dict[str, str]]:
+    """Build the chat messages writing section ``index`` of an outline, with the template's prompts."""
+    plan = "\n".join(f"{number}. {section}" for number, section in enumerate(outline.sections, start=1))
+    step = f"section {index + 1} of {len(outline.sections)}: {outline.sections[index]}"
+    return [
+        {"role": "system", "content": _system_prompt(system, SECTION_SYSTEM_PROMPT)},
+        {
+            "role": "user",
+            "content": f"{guidance}\n\nSources:\n\n{sources}\n\n"
+            f"Task: {description}\nOutput format: {output_format}\nStep: {step}\nOutline:\n{plan}",
+        },
+    ]
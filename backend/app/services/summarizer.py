@@ -0,0 +1,161 @@
+"""Extractive TextRank compression for inputs far larger than the context window.
+
+Sentences of a document form a graph weighted by shared content words; a
+PageRank power iteration over that graph ranks them, and every chunk keeps
+only its best sentences in their original order. It is a cheap local
+alternative to summarizing oversized inputs with several model round-trips.
+"""
+
+import math
+import re
+from typing import Dict, List, Sequence
+
+from app.services.chunking import Chunk, chunk_id
+from app.services.outline import words
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\n+")
+_LINE_END = re.compile(r"[.!?:;]['\")\]]*$")
+_LIST_ITEM = re.compile(r"^(?:[-*+•]|\d+[.)])\s")
+
+# Lines at least this long that run on without terminal punctuation are taken to wrap at the page width
+WRAPPED_LINE_CHARS = 40
+
+
+def _continues(previous: str, line: str) -> bool:
+    """Return whether ``line`` continues the paragraph ending with ``previous``."""
+    if _LINE_END.search(previous) or _LIST_ITEM.match(line):
+        return False
+    return line[0].islower() or len(previous) >= WRAPPED_LINE_CHARS
+
+
+def unwrap_lines(text: str) -> str:
+    """
+    Rejoin the visual lines of wrapped paragraphs.
+
+    PDF extraction yields one line per line on the page. A line break is kept
+    after terminal punctuation and before list items; otherwise a line is
+    joined to the next when the next starts in lower case or the line is long
+    enough to have wrapped. Words hyphenated across lines are joined whole.
+    """
+    paragraphs: List[str] = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if paragraphs and _continues(paragraphs[-1], line):
+            previous = paragraphs[-1]
+            if previous.endswith("-") and line[0].islower():
+                paragraphs[-1] = previous[:-1] + line
+            else:
+                paragraphs[-1] = f"{previous} {line}"
+        else:
+            paragraphs.append(line)
+    return "\n".join(paragraphs)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on terminal punctuation and paragraph breaks, after unwrapping lines."""
+    return [sentence.strip() for sentence in _SENTENCE_END.split(unwrap_lines(text)) if sentence.strip()]
+
+
+def textrank(
+    sentences: Sequence[str],
+    damping: float = 0.85,
+    max_iterations: int = 50,
+    tolerance: float = 1e-6,
+    max_term_share: float = 0.1,
+) -> List[float]:
+    """
+    Rank sentences by centrality.
+
+    The similarity of two sentences is the number of content words they share
+    divided by the log of their lengths. Only pairs sharing a term are ever
+    compared, and terms present in more than ``max_term_share`` of the
+    sentences are ignored, which keeps the similarity matrix sparse.
+
+    Returns:
+        One score per sentence; scores sum to one
+    """
+    count = len(sentences)
+    if count == 0:
+        return []
+
+    tokens = [set(words(sentence)) for sentence in sentences]
+    postings: Dict[str, List[int]] = {}
+    for position, terms in enumerate(tokens):
+        for term in terms:
+            postings.setdefault(term, []).append(position)
+
+    max_postings = max(int(count * max_term_share), 2)
+    overlaps: List[Dict[int, int]] = [{} for _ in range(count)]
+    for positions in postings.values():
+        if len(positions) > max_postings:
+            continue
+        for i, first in enumerate(positions):
+            for second in positions[i + 1 :]:
+                overlaps[first][second] = overlaps[first].get(second, 0) + 1
+                overlaps[second][first] = overlaps[second].get(first, 0) + 1
+
+    edges: List[Dict[int, float]] = []
+    for position, neighbours in enumerate(overlaps):
+        weights = {
+            other: shared / (math.log(len(tokens[position]) + 1) + math.log(len(tokens[other]) + 1))
+            for other, shared in neighbours.items()
+        }
+        total = sum(weights.values())
+        edges.append({other: weight / total for other, weight in weights.items()} if total else {})
+
+    scores = [1.0 / count] * count
+    for _ in range(max_iterations):
+        dangling = sum(score for score, out in zip(scores, edges) if not out)
+        updated = [(1 - damping + damping * dangling) / count] * count
+        for position, out in enumerate(edges):
+            share = damping * scores[position]
+            for other, weight in out.items():
+                updated[other] += share * weight
+        converged = sum(abs(new - old) for new, old in zip(updated, scores)) < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def compress_chunks(chunks: Sequence[Chunk], ratio: float) -> List[Chunk]:
+    """
+    Keep roughly ``ratio`` of the sentences of every chunk.
+
+    Sentences are ranked across their whole document so that a chunk keeps
+    the sentences most central to the file, not just to itself. Each chunk
+    keeps at least one sentence.
+
+    Returns:
+        Compressed chunks in the original order, with new content identities
+    """
+    if ratio >= 1:
+        return list(chunks)
+
+    by_document: Dict[str, List[int]] = {}
+    for position, chunk in enumerate(chunks):
+        by_document.setdefault(chunk.document, []).append(position)
+
+    compressed: List[Chunk] = list(chunks)
+    for positions in by_document.values():
+        sentences: List[str] = []
+        spans = []
+        for position in positions:
+            start = len(sentences)
+            sentences.extend(split_sentences(chunks[position].text))
+            spans.append((position, start, len(sentences)))
+
+        scores = textrank(sentences)
+        for position, start, end in spans:
+            if end - start <= 1:
+                continue
+            keep = max(1, round((end - start) * ratio))
+            best = sorted(sorted(range(start, end), key=lambda i: -scores[i])[:keep])
+            text = " ".join(sentences[i] for i in best)
+            chunk = chunks[position]
+            compressed[position] = Chunk(
+                chunk_id=chunk_id(text.encode("utf-8")), document=chunk.document, index=chunk.index, text=text
+            )
+    return compressed
@@ -0,0 +1,692 @@
+"""Text extraction from uploaded documents.
+
+Extractors turn PDF, DOCX, CSV and XLSX files into ``TextStore`` instances
+using only the standard library. Extraction is CPU bound, so the API process
+runs it on an ``ExtractionPool`` of worker processes; workers publish their
+results in shared memory and only a small handle crosses the process boundary.
+"""
+
+import asyncio
+import csv
+import io
+import re
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from app.exceptions import ProcessingError
+from app.services.outline import BYTES_PER_TOKEN, build_sections, extract_within_budget, plan_extraction
+from app.services.text_store import SharedTextHandle, TextStore, TextStoreBuilder
+from app.utils.archive import MAX_UNCOMPRESSED_BYTES, read_member
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+# --- ZIP based formats -------------------------------------------------------
+
+
+def _docx_text(element: ElementTree.Element) -> str:
+    """Collect the visible text of a WordprocessingML element."""
+    parts: List[str] = []
+    for node in element.iter():
+        if node.tag == f"{_W}t" and node.text:
+            parts.append(node.text)
+        elif node.tag == f"{_W}tab":
+            parts.append("\t")
+        elif node.tag in (f"{_W}br", f"{_W}cr"):
+            parts.append(" ")
+    return "".join(parts).strip()
+
+
+def _docx_has_page_break(paragraph: ElementTree.Element) -> bool:
+    """Check whether a paragraph starts or contains a page break."""
+    for node in paragraph.iter():
+        if node.tag == f"{_W}lastRenderedPageBreak":
+            return True
+        if node.tag == f"{_W}br" and node.get(f"{_W}type") == "page":
+            return True
+    return False
+
+
+def _iter_docx_blocks(container: ElementTree.Element) -> Iterator[ElementTree.Element]:
+    """Yield paragraphs and tables in body order, unwrapping content controls."""
+    for child in container:
+        if child.tag in (f"{_W}p", f"{_W}tbl"):
+            yield child
+        elif child.tag == f"{_W}sdt":
+            content = child.find(f"{_W}sdtContent")
+            if content is not None:
+                yield from _iter_docx_blocks(content)
+
+
+_HEADING_STYLE = re.compile(r"^heading\s*(\d)$", re.IGNORECASE)
+
+
+def _docx_heading_styles(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Map paragraph style IDs to outline levels using ``word/styles.xml``."""
+    if "word/styles.xml" not in archive.namelist():
+        return {}
+    styles: Dict[str, int] = {}
+    for style in ElementTree.fromstring(read_member(archive, "word/styles.xml")).iter(f"{_W}style"):
+        style_id = style.get(f"{_W}styleId")
+        name_node = style.find(f"{_W}name")
+        name = name_node.get(f"{_W}val", "") if name_node is not None else ""
+        level_node = style.find(f"{_W}pPr/{_W}outlineLvl")
+        heading = _HEADING_STYLE.match(name)
+        if not style_id:
+            continue
+        if level_node is not None and level_node.get(f"{_W}val", "").isdigit():
+            styles[style_id] = int(level_node.get(f"{_W}val", "0"))
+        elif heading:
+            styles[style_id] = int(heading.group(1)) - 1
+        elif name.lower() == "title":
+            styles[style_id] = 0
+    return styles
+
+
+def _docx_heading_level(paragraph: ElementTree.Element, styles: Dict[str, int]) -> Optional[int]:
+    """Return the outline level of a heading paragraph, or None for body text."""
+    outline = paragraph.find(f"{_W}pPr/{_W}outlineLvl")
+    if outline is not None and outline.get(f"{_W}val", "").isdigit():
+        level = int(outline.get(f"{_W}val", "0"))
+        # Level 9 means "body text" in WordprocessingML
+        return level if level < 9 else None
+    style = paragraph.find(f"{_W}pPr/{_W}pStyle")
+    if style is None:
+        return None
+    style_id = style.get(f"{_W}val", "")
+    if style_id in styles:
+        return styles[style_id]
+    heading = _HEADING_STYLE.match(style_id)
+    return int(heading.group(1)) - 1 if heading else None
+
+
+def _build_docx_store(blocks: Iterable[ElementTree.Element]) -> TextStore:
+    """Build a text store from body blocks in document order."""
+    builder = TextStoreBuilder()
+    builder.start_page()
+    table_index = 0
+    for block in blocks:
+        if block.tag == f"{_W}tbl":
+            for row_index, row in enumerate(block.iter(f"{_W}tr")):
+                cells = [_docx_text(cell) for cell in row.findall(f"{_W}tc")]
+                if any(cells):
+                    builder.add_table_row(cells, table=table_index, row=row_index)
+            table_index += 1
+            continue
+
+        if _docx_has_page_break(block) and builder.paragraph_count:
+            builder.start_page()
+        text = _docx_text(block)
+        if text:
+            builder.add_paragraph(text)
+    return builder.build()
+
+
+def extract_docx(path: Path, description: Optional[str] = None, token_budget: Optional[int] = None) -> TextStore:
+    """
+    Extract paragraphs and tables from a Word document.
+
+    When a description and token budget are given, heading styles form the
+    section index and only the sections relevant to the description (plus
+    whatever else fits the budget) are extracted.
+    """
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(read_member(archive, "word/document.xml"))
+        styles = _docx_heading_styles(archive) if description else {}
+
+    body = root.find(f"{_W}body")
+    blocks = list(_iter_docx_blocks(body)) if body is not None else []
+    if description is None or token_budget is None:
+        return _build_docx_store(blocks)
+
+    entries: List[Tuple[str, int, int]] = []
+    for index, block in enumerate(blocks):
+        level = _docx_heading_level(block, styles) if block.tag == f"{_W}p" else None
+        if level is not None:
+            entries.append((_docx_text(block), level, index))
+    plan = plan_extraction(build_sections(entries, len(blocks)), len(blocks), description)
+    if plan is None:
+        return _build_docx_store(blocks)
+
+    selected = extract_within_budget(
+        plan,
+        extract_unit=lambda index: blocks[index],
+        unit_tokens=lambda block: len(_docx_text(block).encode("utf-8")) // BYTES_PER_TOKEN,
+        token_budget=token_budget,
+    )
+    return _build_docx_store(selected[index] for index in sorted(selected))
+
+
+def _column_index(reference: str) -> int:
+    """Convert a cell reference such as ``AB12`` to a zero-based column index."""
+    column = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        column = column * 26 + (ord(char.upper()) - ord("A") + 1)
+    return max(column - 1, 0)
+
+
+def _xlsx_sheets(archive: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """Return ``(sheet name, archive path)`` pairs in workbook order."""
+    workbook = ElementTree.fromstring(read_member(archive, "xl/workbook.xml"))
+    rels = ElementTree.fromstring(read_member(archive, "xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target", "") for rel in rels.iter(f"{_PKG_REL}Relationship")}
+
+    sheets: List[Tuple[str, str]] = []
+    for sheet in workbook.iter(f"{_S}sheet"):
+        target = targets.get(sheet.get(f"{_R}id"), "")
+        if not target:
+            continue
+        member = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+        sheets.append((sheet.get("name", ""), member))
+    return sheets
+
+
+def extract_xlsx(path: Path) -> TextStore:
+    """Extract every worksheet of an Excel workbook as one page per sheet."""
+    builder = TextStoreBuilder()
+    with zipfile.ZipFile(path) as archive:
+        shared: List[str] = []
+        if "xl/sharedStrings.xml" in archive.namelist():
+            strings = ElementTree.fromstring(read_member(archive, "xl/sharedStrings.xml"))
+            shared = ["".join(t.text or "" for t in item.iter(f"{_S}t")) for item in strings.iter(f"{_S}si")]
+
+        for table_index, (name, member) in enumerate(_xlsx_sheets(archive)):
+            builder.start_page()
+            if name:
+                builder.add_title(name)
+            sheet = ElementTree.fromstring(read_member(archive, member))
+            for row_index, row in enumerate(sheet.iter(f"{_S}row")):
+                values: Dict[int, str] = {}
+                for cell in row.iter(f"{_S}c"):
+                    kind = cell.get("t")
+                    if kind == "inlineStr":
+                        value = "".join(t.text or "" for t in cell.iter(f"{_S}t"))
+                    else:
+                        raw = cell.findtext(f"{_S}v") or ""
+                        value = shared[int(raw)] if kind == "s" and raw.isdigit() and int(raw) < len(shared) else raw
+                    if value:
+                        values[_column_index(cell.get("r", ""))] = value
+                if values:
+                    cells = [values.get(column, "") for column in range(max(values) + 1)]
+                    builder.add_table_row(cells, table=table_index, row=row_index)
+    return builder.build()
+
+
+def extract_csv(path: Path) -> TextStore:
+    """Extract a CSV file as a single table on one page."""
+    text = path.read_bytes().decode("utf-8-sig", errors="replace")
+    try:
+        dialect: type[csv.Dialect] | csv.Dialect = csv.Sniffer().sniff(text[:8192], delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+
+    builder = TextStoreBuilder()
+    builder.start_page()
+    for row_index, row in enumerate(csv.reader(io.StringIO(text), dialect)):
+        if any(cell.strip() for cell in row):
+            builder.add_table_row(row, table=0, row=row_index)
+    return builder.build()
+
+
+# --- PDF ---------------------------------------------------------------------
+
+_PDF_OBJECT = re.compile(rb"(\d+)\s+(\d+)\s+obj\b")
+_PDF_REF = re.compile(rb"(\d+)\s+\d+\s+R\b")
+_PDF_WHITESPACE = b" \t\r\n\f\x00"
+_PDF_DELIMITERS = b"()<>[]{}/%"
+
+
+def _pdf_stream(body: bytes) -> Optional[bytes]:
+    """Return the decoded stream of an object body, if it has a supported one."""
+    start = body.find(b"stream")
+    if start < 0:
+        return None
+    data_start = start + len(b"stream")
+    if body[data_start : data_start + 2] == b"\r\n":
+        data_start += 2
+    elif body[data_start : data_start + 1] in (b"\n", b"\r"):
+        data_start += 1
+    end = body.rfind(b"endstream")
+    data = body[data_start:end].rstrip(b"\r\n")
+
+    header = body[:start]
+    if b"/Filter" not in header:
+        return data
+    if b"/FlateDecode" not in header or re.search(rb"/Filter\s*\[[^\]]*/\w+[^\]]*/\w+", header):
+        # Only single-stage Flate streams are supported
+        return None
+    inflater = zlib.decompressobj()
+    try:
+        decoded = inflater.decompress(data, MAX_UNCOMPRESSED_BYTES)
+    except zlib.error:
+        return None
+    return decoded
+
+
+def _pdf_objects(data: bytes) -> Dict[int, bytes]:
+    """Index the top-level and object-stream objects of a PDF by number."""
+    objects: Dict[int, bytes] = {}
+    pos = 0
+    while match := _PDF_OBJECT.search(data, pos):
+        end = data.find(b"endobj", match.end())
+        stream_at = data.find(b"stream", match.end())
+        if 0 <= stream_at < end or (end < 0 and stream_at >= 0):
+            # Skip binary stream data so it cannot be mistaken for object syntax
+            end = data.find(b"endobj", data.find(b"endstream", stream_at))
+        if end < 0:
+            end = len(data)
+        objects[int(match.group(1))] = data[match.end() : end]
+        pos = end + len(b"endobj")
+
+    for body in list(objects.values()):
+        if b"/ObjStm" not in body[: body.find(b"stream")]:
+            continue
+        stream = _pdf_stream(body)
+        first = re.search(rb"/First\s+(\d+)", body)
+        if stream is None or first is None:
+            continue
+        offset = int(first.group(1))
+        numbers = [int(n) for n in stream[:offset].split()]
+        pairs = list(zip(numbers[::2], numbers[1::2]))
+        for index, (number, position) in enumerate(pairs):
+            end = pairs[index + 1][1] if index + 1 < len(pairs) else len(stream) - offset
+            objects.setdefault(number, stream[offset + position : offset + end])
+    return objects
+
+
+def _pdf_page_order(objects: Dict[int, bytes]) -> List[int]:
+    """Return page object numbers in document order."""
+    is_page = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+    pages = [number for number, body in sorted(objects.items()) if is_page.search(body)]
+    roots = [
+        number for number, body in objects.items() if re.search(rb"/Type\s*/Pages\b", body) and b"/Parent" not in body
+    ]
+    if not roots:
+        return pages
+
+    ordered: List[int] = []
+    seen: set[int] = set()
+
+    def walk(number: int) -> None:
+        if number in seen or number not in objects:
+            return
+        seen.add(number)
+        body = objects[number]
+        kids = re.search(rb"/Kids\s*\[([^\]]*)\]", body)
+        if kids:
+            for ref in _PDF_REF.finditer(kids.group(1)):
+                walk(int(ref.group(1)))
+        elif is_page.search(body):
+            ordered.append(number)
+
+    walk(roots[0])
+    return ordered or pages
+
+
+def _pdf_page_contents(objects: Dict[int, bytes], page: int) -> bytes:
+    """Concatenate the decoded content streams of a page."""
+    body = objects[page]
+    match = re.search(rb"/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R)", body)
+    if not match:
+        return b""
+    chunks: List[bytes] = []
+    for ref in _PDF_REF.finditer(match.group(1)):
+        number = int(ref.group(1))
+        target = objects.get(number, b"")
+        if target.lstrip().startswith(b"[") and b"stream" not in target:
+            # Indirect array of content streams
+            for inner in _PDF_REF.finditer(target):
+                chunks.append(_pdf_stream(objects.get(int(inner.group(1)), b"")) or b"")
+        else:
+            chunks.append(_pdf_stream(target) or b"")
+    return b"\n".join(chunks)
+
+
+def _pdf_literal(data: bytes, pos: int) -> Tuple[bytes, int]:
+    """Parse a literal string starting after its opening parenthesis."""
+    out = bytearray()
+    depth = 1
+    escapes = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+    while pos < len(data):
+        char = data[pos]
+        if char == 0x5C:  # backslash
+            pos += 1
+            if pos >= len(data):
+                break
+            nxt = data[pos]
+            if nxt in escapes:
+                out += escapes[nxt]
+            elif 0x30 <= nxt <= 0x37:
+                digits = data[pos : pos + 3]
+                count = 1
+                while count < len(digits) and 0x30 <= digits[count] <= 0x37:
+                    count += 1
+                out.append(int(digits[:count], 8) & 0xFF)
+                pos += count - 1
+            elif nxt in b"\r\n":
+                if nxt == 0x0D and data[pos + 1 : pos + 2] == b"\n":
+                    pos += 1
+            else:
+                out.append(nxt)
+        elif char == 0x28:
+            depth += 1
+            out.append(char)
+        elif char == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), pos + 1
+            out.append(char)
+        else:
+            out.append(char)
+        pos += 1
+    return bytes(out), pos
+
+
+def _pdf_decode(raw: bytes) -> str:
+    """Decode a PDF text string (UTF-16 with BOM or PDFDocEncoding approximation)."""
+    if raw.startswith(b"\xfe\xff"):
+        return raw[2:].decode("utf-16-be", errors="replace")
+    return raw.decode("latin-1")
+
+
+def _pdf_content_lines(content: bytes) -> List[str]:
+    """Turn a page content stream into text lines using the text operators."""
+    lines: List[str] = []
+    current: List[str] = []
+    operands: List[object] = []
+    array_stack: List[List[object]] = []
+
+    def newline() -> None:
+        text = "".join(current).strip()
+        if text:
+            lines.append(" ".join(text.split()))
+        current.clear()
+
+    pos = 0
+    length = len(content)
+    while pos < length:
+        char = content[pos]
+        if char in _PDF_WHITESPACE:
+            pos += 1
+        elif char == 0x25:  # comment
+            while pos < length and content[pos] not in b"\r\n":
+                pos += 1
+        elif char == 0x28:  # literal string
+            value, pos = _pdf_literal(content, pos + 1)
+            (array_stack[-1] if array_stack else operands).append(value)
+        elif char == 0x3C and content[pos + 1 : pos + 2] == b"<":  # dictionary
+            end = content.find(b">>", pos)
+            pos = end + 2 if end >= 0 else length
+        elif char == 0x3C:  # hex string
+            end = content.find(b">", pos)
+            end = end if end >= 0 else length
+            hexdigits = re.sub(rb"[^0-9a-fA-F]", b"", content[pos + 1 : end])
+            if len(hexdigits) % 2:
+                hexdigits += b"0"
+            (array_stack[-1] if array_stack else operands).append(bytes.fromhex(hexdigits.decode()))
+            pos = end + 1
+        elif char == 0x5B:  # array start
+            array_stack.append([])
+            pos += 1
+        elif char == 0x5D:  # array end
+            pos += 1
+            if array_stack:
+                finished = array_stack.pop()
+                (array_stack[-1] if array_stack else operands).append(finished)
+        elif char == 0x2F:  # name
+            end = pos + 1
+            while end < length and content[end] not in _PDF_WHITESPACE and content[end] not in _PDF_DELIMITERS:
+                end += 1
+            operands.append(content[pos:end])
+            pos = end
+        else:
+            end = pos
+            while end < length and content[end] not in _PDF_WHITESPACE and content[end] not in _PDF_DELIMITERS:
+                end += 1
+            end = max(end, pos + 1)
+            token = content[pos:end]
+            pos = end
+            try:
+                number = float(token)
+            except ValueError:
+                number = None
+            if number is not None:
+                (array_stack[-1] if array_stack else operands).append(number)
+                continue
+
+            if token == b"Tj" and operands and isinstance(operands[-1], bytes):
+                current.append(_pdf_decode(operands[-1]))
+            elif token in (b"'", b'"'):
+                newline()
+                if operands and isinstance(operands[-1], bytes):
+                    current.append(_pdf_decode(operands[-1]))
+            elif token == b"TJ" and operands and isinstance(operands[-1], list):
+                for item in operands[-1]:
+                    if isinstance(item, bytes):
+                        current.append(_pdf_decode(item))
+                    elif isinstance(item, float) and item < -200:
+                        current.append(" ")
+            elif token in (b"Td", b"TD") and len(operands) >= 2 and operands[-1] != 0:
+                newline()
+            elif token in (b"T*", b"ET", b"Tm"):
+                newline()
+            elif token == b"BI":
+                # Skip inline image data
+                end_image = content.find(b"EI", pos)
+                pos = end_image + 2 if end_image >= 0 else length
+            operands.clear()
+    newline()
+    return lines
+
+
+def _pdf_string_value(body: bytes, key: bytes) -> Optional[str]:
+    """Read a literal or hex string value of a dictionary key."""
+    match = re.search(rb"/" + key + rb"\s*([(<])", body)
+    if not match:
+        return None
+    if match.group(1) == b"(":
+        raw, _ = _pdf_literal(body, match.end())
+    else:
+        end = body.find(b">", match.end())
+        hexdigits = re.sub(rb"[^0-9a-fA-F]", b"", body[match.end() : end])
+        raw = bytes.fromhex((hexdigits + b"0" * (len(hexdigits) % 2)).decode())
+    return " ".join(_pdf_decode(raw).split())
+
+
+def _pdf_outline_entries(objects: Dict[int, bytes], pages: List[int]) -> List[Tuple[str, int, int]]:
+    """Return ``(title, level, page index)`` entries from the document outline (bookmarks)."""
+    catalog = next((body for body in objects.values() if re.search(rb"/Type\s*/Catalog\b", body)), None)
+    outlines = re.search(rb"/Outlines\s+(\d+)\s+\d+\s+R", catalog or b"")
+    if not outlines:
+        return []
+
+    page_index = {number: index for index, number in enumerate(pages)}
+    entries: List[Tuple[str, int, int]] = []
+    seen: set[int] = set()
+
+    def destination(body: bytes) -> Optional[int]:
+        match = re.search(rb"/(?:Dest|D)\s*(\[\s*(\d+)\s+\d+\s+R|(\d+)\s+\d+\s+R)", body)
+        if not match:
+            return None
+        if match.group(2):
+            return page_index.get(int(match.group(2)))
+        target = re.match(rb"\s*\[\s*(\d+)\s+\d+\s+R", objects.get(int(match.group(3)), b""))
+        return page_index.get(int(target.group(1))) if target else None
+
+    def walk(first: Optional[re.Match[bytes]], level: int) -> None:
+        number = int(first.group(1)) if first else None
+        while number is not None and number not in seen and number in objects and len(seen) < 10_000:
+            seen.add(number)
+            body = objects[number]
+            title = _pdf_string_value(body, b"Title")
+            page = destination(body)
+            if title and page is not None:
+                entries.append((title, level, page))
+            walk(re.search(rb"/First\s+(\d+)\s+\d+\s+R", body), level + 1)
+            following = re.search(rb"/Next\s+(\d+)\s+\d+\s+R", body)
+            number = int(following.group(1)) if following else None
+
+    root = objects.get(int(outlines.group(1)), b"")
+    walk(re.search(rb"/First\s+(\d+)\s+\d+\s+R", root), 0)
+    return entries
+
+
+def extract_pdf(path: Path, description: Optional[str] = None, token_budget: Optional[int] = None) -> TextStore:
+    """
+    Extract text lines from the pages of a PDF.
+
+    When a description and token budget are given, the bookmark outline forms
+    the section index and only the pages of relevant sections (plus whatever
+    else fits the budget) have their content streams parsed.
+    """
+    objects = _pdf_objects(path.read_bytes())
+    pages = _pdf_page_order(objects)
+
+    def page_lines(index: int) -> List[str]:
+        return _pdf_content_lines(_pdf_page_contents(objects, pages[index]))
+
+    plan = None
+    if description is not None and token_budget is not None:
+        sections = build_sections(_pdf_outline_entries(objects, pages), len(pages))
+        plan = plan_extraction(sections, len(pages), description)
+
+    if plan is None:
+        selected = {index: page_lines(index) for index in range(len(pages))}
+    else:
+        selected = extract_within_budget(
+            plan,
+            extract_unit=page_lines,
+            unit_tokens=lambda lines: sum(len(line.encode("utf-8")) for line in lines) // BYTES_PER_TOKEN,
+            token_budget=token_budget or 0,
+        )
+
+    builder = TextStoreBuilder()
+    for index in sorted(selected):
+        builder.start_page()
+        for line in selected[index]:
+            builder.add_paragraph(line)
+    return builder.build()
+
+
+# --- Dispatch and worker pool ------------------------------------------------
+
+EXTRACTORS: Dict[str, Callable[..., TextStore]] = {
+    ".pdf": extract_pdf,
+    ".docx": extract_docx,
+    ".csv": extract_csv,
+    ".xlsx": extract_xlsx,
+}
+
+# Formats with a section index that supports outline-driven lazy extraction
+OUTLINE_FORMATS = frozenset({".pdf", ".docx"})
+
+
+def extract_text(path: Path, description: Optional[str] = None, token_budget: Optional[int] = None) -> TextStore:
+    """
+    Extract the text of a document, choosing the extractor by file extension.
+
+    Args:
+        path: File to extract
+        description: Generation request description used to pick relevant sections
+        token_budget: Token budget for sections beyond the relevant ones
+
+    Raises:
+        ProcessingError: If the file type is unsupported or the file is malformed
+    """
+    extension = path.suffix.lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        raise ProcessingError("Unsupported file type for extraction", details={"filename": path.name})
+    options: Dict[str, Any] = {}
+    if extension in OUTLINE_FORMATS:
+        options = {"description": description, "token_budget": token_budget}
+    try:
+        return extractor(path, **options)
+    except ProcessingError:
+        raise
+    except Exception as e:
+        raise ProcessingError(
+            f"Failed to extract text from {path.name}",
+            details={"filename": path.name, "error_type": type(e).__name__, "error_message": str(e)},
+        )
+
+
+def _extract_to_shared_memory(path: str, description: Optional[str], token_budget: Optional[int]) -> SharedTextHandle:
+    """Worker entry point: extract a file and publish the result in shared memory."""
+    return extract_text(Path(path), description=description, token_budget=token_budget).to_shared_memory()
+
+
+def _discard_shared_memory(future: "asyncio.Future[SharedTextHandle]") -> None:
+    """Unlink the block of an extraction whose caller went away."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    TextStore.attach(future.result()).release()
+
+
+class ExtractionPool:
+    """Runs text extraction in worker processes and attaches the results."""
+
+    def __init__(self, max_workers: int) -> None:
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers: Number of worker processes; 0 extracts in a thread of
+                the API process instead
+        """
+        self._max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=get_context("spawn"))
+        return self._executor
+
+    async def extract(
+        self, path: Path, description: Optional[str] = None, token_budget: Optional[int] = None
+    ) -> TextStore:
+        """
+        Extract a document without blocking the event loop.
+
+        Stores returned from worker processes are backed by shared memory and
+        must be released with ``TextStore.release`` once no longer needed.
+
+        Args:
+            path: File to extract
+            description: Request description for outline-driven lazy extraction
+            token_budget: Token budget for sections beyond the relevant ones
+        """
+        if self._max_workers <= 0:
+            return await asyncio.to_thread(extract_text, path, description, token_budget)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_executor(), _extract_to_shared_memory, str(path), description, token_budget
+        )
+        try:
+            handle = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The worker may still publish a block nobody attaches to; unlink it once it arrives
+            future.add_done_callback(_discard_shared_memory)
+            raise
+        return TextStore.attach(handle)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,334 @@
+"""Compact storage for extracted document text.
+
+Extracted content is kept as one contiguous UTF-8 buffer plus array-backed
+offset tables for pages, paragraphs, titles and table cells, so a document costs a
+handful of objects instead of one Python string per paragraph. The same layout
+can be written into a shared memory block, letting extraction workers hand
+their results to the API process without pickling the text.
+"""
+
+import struct
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Sequence, Set, Tuple, Union, cast
+
+# Layout header: magic, text bytes, paragraph count, page count, title count, cell count
+_HEADER = struct.Struct("<8sQQQQQ")
+_MAGIC = b"TFSTORE2"
+
+# Table cells are stored as flattened (start, end, table, row, column) records
+_CELL_FIELDS = 5
+
+# Separator used between the cells of a table row inside the text buffer
+CELL_SEPARATOR = " | "
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+@dataclass(frozen=True)
+class TableCell:
+    """A single table cell resolved from a text store."""
+
+    table: int
+    row: int
+    column: int
+    text: str
+
+
+@dataclass(frozen=True)
+class SharedTextHandle:
+    """Picklable reference to a text store living in shared memory."""
+
+    name: str
+    size: int
+
+
+class TextStore:
+    """Read-only view over extracted text and its offset tables.
+
+    Paragraphs are stored back to back, each followed by a newline, so
+    paragraph ``i`` spans ``[starts[i], starts[i + 1] - 1)`` in the buffer.
+    Pages are recorded as the index of their first paragraph, and titles the
+    extractor took from the document structure, such as sheet names, as the
+    index of their paragraph.
+    """
+
+    __slots__ = ("_text", "_paragraphs", "_pages", "_titles", "_cells", "_shm")
+
+    def __init__(
+        self,
+        text: Buffer,
+        paragraphs: Sequence[int],
+        pages: Sequence[int],
+        titles: Sequence[int],
+        cells: Sequence[int],
+        shm: Optional[shared_memory.SharedMemory] = None,
+    ) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            text: UTF-8 text buffer
+            paragraphs: Paragraph start offsets including the end sentinel
+            pages: Index of the first paragraph of every page
+            titles: Indices of the paragraphs holding structural titles
+            cells: Flattened table cell records
+            shm: Shared memory block backing the buffers, if any
+        """
+        self._text = text
+        self._paragraphs = paragraphs
+        self._pages = pages
+        self._titles = titles
+        self._cells = cells
+        self._shm = shm
+
+    @property
+    def paragraph_count(self) -> int:
+        """Number of paragraphs in the store."""
+        return len(self._paragraphs) - 1
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages in the store."""
+        return len(self._pages)
+
+    @property
+    def cell_count(self) -> int:
+        """Number of table cells in the store."""
+        return len(self._cells) // _CELL_FIELDS
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the text buffer in bytes."""
+        return len(self._text)
+
+    def paragraph_span(self, index: int) -> Tuple[int, int]:
+        """Return the byte span of a paragraph within the buffer."""
+        if not 0 <= index < self.paragraph_count:
+            raise IndexError(f"paragraph index {index} out of range")
+        return self._paragraphs[index], self._paragraphs[index + 1] - 1
+
+    def paragraph(self, index: int) -> str:
+        """Return the text of a paragraph."""
+        start, end = self.paragraph_span(index)
+        return self.slice(start, end)
+
+    def iter_paragraphs(self) -> Iterator[str]:
+        """Iterate over all paragraphs in document order."""
+        for index in range(self.paragraph_count):
+            yield self.paragraph(index)
+
+    def page_paragraphs(self, page: int) -> range:
+        """Return the paragraph indices belonging to a page."""
+        if not 0 <= page < self.page_count:
+            raise IndexError(f"page index {page} out of range")
+        end = self._pages[page + 1] if page + 1 < self.page_count else self.paragraph_count
+        return range(self._pages[page], end)
+
+    def page_of(self, paragraph: int) -> int:
+        """Return the page index containing a paragraph."""
+        return max(bisect_right(self._pages, paragraph) - 1, 0)
+
+    def page(self, page: int) -> str:
+        """Return the full text of a page."""
+        paragraphs = self.page_paragraphs(page)
+        if not paragraphs:
+            return ""
+        start = self._paragraphs[paragraphs.start]
+        return self.slice(start, self._paragraphs[paragraphs.stop] - 1)
+
+    def cell(self, index: int) -> TableCell:
+        """Return a table cell by index."""
+        if not 0 <= index < self.cell_count:
+            raise IndexError(f"cell index {index} out of range")
+        start, end, table, row, column = self._cells[index * _CELL_FIELDS : (index + 1) * _CELL_FIELDS]
+        return TableCell(table=table, row=row, column=column, text=self.slice(start, end))
+
+    def paragraph_at(self, offset: int) -> int:
+        """Return the index of the paragraph containing a byte offset."""
+        return max(bisect_right(self._paragraphs, offset) - 1, 0)
+
+    def table_paragraphs(self) -> Set[int]:
+        """Return the indices of paragraphs that hold table rows."""
+        return {self.paragraph_at(self._cells[i]) for i in range(0, len(self._cells), _CELL_FIELDS)}
+
+    def title_paragraphs(self) -> Set[int]:
+        """Return the indices of paragraphs that hold structural titles."""
+        return set(self._titles)
+
+    def slice(self, start: int, end: int) -> str:
+        """Decode a byte range of the buffer."""
+        return bytes(self._text[start:end]).decode("utf-8")
+
+    def text(self) -> str:
+        """Return the whole document text, one paragraph per line."""
+        return bytes(self._text[: max(self._paragraphs[-1] - 1, 0)]).decode("utf-8")
+
+    def layout_size(self) -> int:
+        """Number of bytes needed to serialize the store."""
+        tables = len(self._paragraphs) + len(self._pages) + len(self._titles) + len(self._cells)
+        return _HEADER.size + 8 * tables + len(self._text)
+
+    def write_into(self, target: memoryview) -> None:
+        """Serialize the store into a writable buffer of ``layout_size()`` bytes."""
+        _HEADER.pack_into(
+            target,
+            0,
+            _MAGIC,
+            len(self._text),
+            self.paragraph_count,
+            self.page_count,
+            len(self._titles),
+            self.cell_count,
+        )
+        offset = _HEADER.size
+        for table in (self._paragraphs, self._pages, self._titles, self._cells):
+            data = array("Q", table).tobytes()
+            target[offset : offset + len(data)] = data
+            offset += len(data)
+        target[offset : offset + len(self._text)] = self._text
+
+    @classmethod
+    def from_buffer(cls, source: memoryview, shm: Optional[shared_memory.SharedMemory] = None) -> "TextStore":
+        """Build a zero-copy store over a buffer written by ``write_into``."""
+        magic, text_len, paragraph_count, page_count, title_count, cell_count = _HEADER.unpack_from(source, 0)
+        if magic != _MAGIC:
+            raise ValueError("Buffer does not contain a text store")
+
+        offset = _HEADER.size
+        tables: List[memoryview] = []
+        for count in (paragraph_count + 1, page_count, title_count, cell_count * _CELL_FIELDS):
+            tables.append(source[offset : offset + 8 * count].cast("Q"))
+            offset += 8 * count
+        text = source[offset : offset + text_len]
+        return cls(text, tables[0], tables[1], tables[2], tables[3], shm=shm)
+
+    def to_shared_memory(self) -> SharedTextHandle:
+        """
+        Copy the store into a new shared memory block.
+
+        The block is not tracked by this process, so it survives the worker
+        that created it; the receiving process owns it and must ``unlink`` it.
+
+        Returns:
+            Handle that can be sent to another process to attach the store
+        """
+        size = self.layout_size()
+        shm = shared_memory.SharedMemory(create=True, size=size, track=False)
+        try:
+            self.write_into(cast(memoryview, shm.buf))
+        finally:
+            shm.close()
+        return SharedTextHandle(name=shm.name, size=size)
+
+    @classmethod
+    def attach(cls, handle: SharedTextHandle) -> "TextStore":
+        """Attach to a store published with ``to_shared_memory`` without copying it."""
+        shm = shared_memory.SharedMemory(name=handle.name)
+        return cls.from_buffer(cast(memoryview, shm.buf)[: handle.size], shm=shm)
+
+    def release(self, unlink: bool = True) -> None:
+        """
+        Release the shared memory backing this store, if any.
+
+        The store must not be used afterwards.
+
+        Args:
+            unlink: Also remove the shared memory block from the system
+        """
+        if self._shm is None:
+            return
+        for view in (self._text, self._paragraphs, self._pages, self._titles, self._cells):
+            if isinstance(view, memoryview):
+                view.release()
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
+
+class TextStoreBuilder:
+    """Incrementally assembles a ``TextStore`` from extracted content."""
+
+    def __init__(self) -> None:
+        """Initialize an empty builder."""
+        self._text = bytearray()
+        self._paragraphs = array("Q")
+        self._pages = array("Q")
+        self._titles = array("Q")
+        self._cells = array("Q")
+
+    @property
+    def paragraph_count(self) -> int:
+        """Number of paragraphs added so far."""
+        return len(self._paragraphs)
+
+    def start_page(self) -> None:
+        """Begin a new page; following paragraphs belong to it."""
+        self._pages.append(len(self._paragraphs))
+
+    def add_paragraph(self, text: str) -> int:
+        """
+        Append a paragraph to the current page.
+
+        Newlines inside the paragraph are folded into spaces so the
+        one-paragraph-per-line layout stays intact.
+
+        Returns:
+            Index of the new paragraph
+        """
+        if not self._pages:
+            self.start_page()
+        self._paragraphs.append(len(self._text))
+        self._text += text.replace("\n", " ").encode("utf-8")
+        self._text += b"\n"
+        return len(self._paragraphs) - 1
+
+    def add_title(self, text: str) -> int:
+        """
+        Append a paragraph holding a structural title, such as a sheet name.
+
+        Titles name the content that follows rather than repeating on every
+        page, so boilerplate detection leaves them alone.
+
+        Returns:
+            Index of the new paragraph
+        """
+        index = self.add_paragraph(text)
+        self._titles.append(index)
+        return index
+
+    def add_table_row(self, cells: Sequence[str], table: int, row: int) -> int:
+        """
+        Append a table row as a single paragraph and record its cells.
+
+        Returns:
+            Index of the paragraph holding the row
+        """
+        if not self._pages:
+            self.start_page()
+        index = len(self._paragraphs)
+        self._paragraphs.append(len(self._text))
+        separator = CELL_SEPARATOR.encode("utf-8")
+        for column, value in enumerate(cells):
+            if column:
+                self._text += separator
+            start = len(self._text)
+            self._text += value.replace("\n", " ").encode("utf-8")
+            self._cells.extend((start, len(self._text), table, row, column))
+        self._text += b"\n"
+        return index
+
+    def build(self) -> TextStore:
+        """Finish the store; the builder should not be reused afterwards."""
+        paragraphs = array("Q", self._paragraphs)
+        paragraphs.append(len(self._text))
+        return TextStore(
+            bytes(self._text),
+            paragraphs,
+            array("Q", self._pages),
+            array("Q", self._titles),
+            array("Q", self._cells),
+        )
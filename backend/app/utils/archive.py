@@ -0,0 +1,24 @@
+"""Size-checked access to ZIP archive members."""
+
+import zipfile
+
+from app.exceptions import ProcessingError
+
+# Refuse to inflate archive members or PDF streams beyond this size (zip bomb guard)
+MAX_UNCOMPRESSED_BYTES = 256 * 1024 * 1024
+
+
+def read_member(archive: zipfile.ZipFile, name: str) -> bytes:
+    """
+    Read an archive member, enforcing the uncompressed size limit.
+
+    Raises:
+        ProcessingError: If the member is larger than ``MAX_UNCOMPRESSED_BYTES``
+    """
+    info = archive.getinfo(name)
+    if info.file_size > MAX_UNCOMPRESSED_BYTES:
+        raise ProcessingError(
+            "Archive member exceeds maximum uncompressed size",
+            details={"member": name, "size": info.file_size, "max_size": MAX_UNCOMPRESSED_BYTES},
+        )
+    return archive.read(name)
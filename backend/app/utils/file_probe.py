@@ -0,0 +1,214 @@
+"""Cheap metadata probes for uploaded files.
+
+Probes read only headers, trailers and ZIP directories (plus a few small,
+size-checked archive members), never the document body, so they can run at
+upload time and give schedulers and clients page, word, row and sheet counts
+before any expensive extraction starts.
+"""
+
+import io
+import re
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from app.utils.archive import read_member
+from app.utils.file_validation import get_file_extension
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Rough averages used where the file format does not record exact counts
+WORDS_PER_PDF_PAGE = 350
+BYTES_PER_CSV_WORD = 6
+XML_BYTES_PER_WORD = 40
+
+# Bytes at each end of a PDF searched for page trees when the cross-reference table cannot be followed
+PDF_SCAN_BYTES = 64 * 1024
+
+_LINEARIZED = re.compile(rb"/Linearized\b[^>]*?/N\s+(\d+)")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_ROOT = re.compile(rb"/Root\s+(\d+)\s+\d+\s+R")
+_PAGES_REF = re.compile(rb"/Pages\s+(\d+)\s+\d+\s+R")
+_COUNT = re.compile(rb"/Count\s+(\d+)")
+_PAGES_TREE = re.compile(rb"/Type\s*/Pages\b")
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_EXTENDED = "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}"
+
+
+@dataclass
+class SheetDimensions:
+    """Size of a worksheet as recorded in its dimension element."""
+
+    name: str
+    rows: int
+    columns: int
+
+
+@dataclass
+class FileMetadata:
+    """Metadata gathered by a probe; fields stay None when unknown."""
+
+    page_count: Optional[int] = None
+    word_count: Optional[int] = None
+    row_count: Optional[int] = None
+    sheets: List[SheetDimensions] = field(default_factory=list)
+
+
+def _column_number(letters: str) -> int:
+    """Convert column letters such as ``AB`` to a one-based column number."""
+    number = 0
+    for char in letters:
+        number = number * 26 + (ord(char) - ord("A") + 1)
+    return number
+
+
+def _pdf_object_at(content: bytes, offsets: Dict[int, int], number: int) -> bytes:
+    """Return the start of an object located through the xref table."""
+    offset = offsets.get(number)
+    if offset is None:
+        return b""
+    end = content.find(b"endobj", offset)
+    return content[offset : end if end >= 0 else offset + 4096]
+
+
+def _pdf_xref_offsets(content: bytes, start: int) -> Tuple[Dict[int, int], bytes]:
+    """Parse a classic cross-reference table and return object offsets and the trailer."""
+    offsets: Dict[int, int] = {}
+    if not content.startswith(b"xref", start):
+        return offsets, b""
+    trailer_at = content.find(b"trailer", start)
+    if trailer_at < 0:
+        return offsets, b""
+    lines = content[start + 4 : trailer_at].split(b"\n")
+    number = 0
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 2:
+            number = int(fields[0])
+        elif len(fields) == 3 and fields[2] in (b"n", b"f"):
+            if fields[2] == b"n":
+                offsets[number] = int(fields[0])
+            number += 1
+    return offsets, content[trailer_at : trailer_at + 2048]
+
+
+def probe_pdf(content: bytes) -> FileMetadata:
+    """Read the page count from the linearization header or the trailer's page tree."""
+    page_count: Optional[int] = None
+
+    # Linearized files announce the page count in the first object
+    linearized = _LINEARIZED.search(content[:2048])
+    if linearized:
+        page_count = int(linearized.group(1))
+
+    if page_count is None:
+        startxref = None
+        for startxref in _STARTXREF.finditer(content[-2048:]):
+            pass
+        if startxref is not None:
+            offsets, trailer = _pdf_xref_offsets(content, int(startxref.group(1)))
+            root = _ROOT.search(trailer)
+            if root:
+                pages = _PAGES_REF.search(_pdf_object_at(content, offsets, int(root.group(1))))
+                if pages:
+                    count = _COUNT.search(_pdf_object_at(content, offsets, int(pages.group(1))))
+                    page_count = int(count.group(1)) if count else None
+
+    if page_count is None:
+        # Cross-reference streams: fall back to the largest page tree count near either end of the file
+        windows = (
+            [content] if len(content) <= 2 * PDF_SCAN_BYTES else [content[:PDF_SCAN_BYTES], content[-PDF_SCAN_BYTES:]]
+        )
+        counts = [
+            int(count.group(1))
+            for window in windows
+            for tree in _PAGES_TREE.finditer(window)
+            if (count := _COUNT.search(window, tree.start(), tree.start() + 512))
+        ]
+        page_count = max(counts) if counts else None
+
+    word_count = page_count * WORDS_PER_PDF_PAGE if page_count is not None else None
+    return FileMetadata(page_count=page_count, word_count=word_count)
+
+
+def probe_docx(archive: zipfile.ZipFile) -> FileMetadata:
+    """Read page and word counts from the extended properties, or estimate them from the directory."""
+    metadata = FileMetadata()
+    if "docProps/app.xml" in archive.namelist():
+        properties = ElementTree.fromstring(read_member(archive, "docProps/app.xml"))
+        pages = properties.findtext(f"{_EXTENDED}Pages")
+        words = properties.findtext(f"{_EXTENDED}Words")
+        metadata.page_count = int(pages) if pages and pages.isdigit() else None
+        metadata.word_count = int(words) if words and words.isdigit() else None
+
+    if metadata.word_count is None and "word/document.xml" in archive.namelist():
+        metadata.word_count = archive.getinfo("word/document.xml").file_size // XML_BYTES_PER_WORD
+    return metadata
+
+
+def probe_xlsx(archive: zipfile.ZipFile) -> FileMetadata:
+    """Read each worksheet's dimension element from the first bytes of the sheet."""
+    workbook = ElementTree.fromstring(read_member(archive, "xl/workbook.xml"))
+    rels = ElementTree.fromstring(read_member(archive, "xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target", "") for rel in rels.iter(f"{_PKG_REL}Relationship")}
+
+    sheets: List[SheetDimensions] = []
+    for sheet in workbook.iter(f"{_S}sheet"):
+        target = targets.get(sheet.get(f"{_R}id"), "")
+        member = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+        if member not in archive.namelist():
+            continue
+        with archive.open(member) as handle:
+            head = handle.read(4096)
+        dimension = _DIMENSION.search(head)
+        rows = columns = 0
+        if dimension:
+            first_col, first_row, last_col, last_row = dimension.groups()
+            last_col = last_col or first_col
+            last_row = last_row or first_row
+            rows = int(last_row) - int(first_row) + 1
+            columns = _column_number(last_col.decode()) - _column_number(first_col.decode()) + 1
+        sheets.append(SheetDimensions(name=sheet.get("name", ""), rows=rows, columns=columns))
+
+    row_count = sum(sheet.rows for sheet in sheets)
+    word_count = sum(sheet.rows * sheet.columns for sheet in sheets)
+    return FileMetadata(page_count=len(sheets), word_count=word_count, row_count=row_count, sheets=sheets)
+
+
+def probe_csv(content: bytes) -> FileMetadata:
+    """Count rows by line breaks and estimate words from the byte size."""
+    rows = content.count(b"\n")
+    if content and not content.endswith(b"\n"):
+        rows += 1
+    return FileMetadata(row_count=rows, word_count=len(content) // BYTES_PER_CSV_WORD)
+
+
+def probe_file(filename: str, content: bytes) -> FileMetadata:
+    """
+    Probe an uploaded file for cheap metadata.
+
+    Probing never fails an upload: malformed files simply yield empty metadata. The
+    probe is synchronous; callers on the event loop run it in a thread.
+
+    Args:
+        filename: Original filename, used to pick the probe
+        content: File content
+    """
+    extension = get_file_extension(filename)
+    try:
+        if extension == ".pdf":
+            return probe_pdf(content)
+        if extension == ".csv":
+            return probe_csv(content)
+        if extension in (".docx", ".xlsx"):
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                return probe_docx(archive) if extension == ".docx" else probe_xlsx(archive)
+    except Exception as e:
+        logger.debug("Metadata probe failed", extra={"upload_filename": filename, "error": str(e)})
+    return FileMetadata()
@@ -0,0 +1,138 @@
+"""Tests for the artifact store and the result download endpoint."""
+
+import gzip
+import hashlib
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from app.config import settings
+from app.main import app
+from app.schemas.generate_schema import GenerationStatus
+from app.services.artifact_store import ArtifactStore, choose_encoding, etag_matches
+from app.services.document_processor import document_processor
+from app.services.result_cache import result_key
+
+
+def test_documents_are_stored_once_by_content_with_gzip_variants(tmp_path: Path):
+    """Identical documents share a file; large text documents get a gzip variant, small ones do not."""
+    store = ArtifactStore(tmp_path, compress_min_bytes=100)
+    text = "# Report\n\n" + "Revenue grew in every region. " * 20
+
+    first = store.put_text("req-1", text)
+    second = store.put_text("req-2", text)
+    small = store.put_text("req-3", "# Short\n")
+
+    assert first.digest == second.digest == hashlib.sha256(text.encode()).hexdigest()
+    assert store.get("req-2") is not None and store.get("req-2").etag == f'"{first.digest}"'
+    assert store.path(first).read_text(encoding="utf-8") == text
+    assert gzip.decompress(store.path(first, "gzip").read_bytes()).decode() == text
+    assert first.variant_etag("gzip") != first.etag
+    assert small.encodings == []
+    assert store.get("unknown") is None
+    assert len(list((tmp_path / "blobs").iterdir())) == 3
+
+
+def test_content_negotiation_and_conditional_helpers():
+    """Encodings refused with q=0 are not served, and If-None-Match matches listed, weak or wildcard tags."""
+    assert choose_encoding("gzip, deflate, br", ["gzip"]) == "gzip"
+    assert choose_encoding("br;q=1.0, gzip;q=0", ["gzip"]) is None
+    assert choose_encoding("*", ["gzip"]) == "gzip"
+    assert choose_encoding("", ["gzip"]) is None
+    assert choose_encoding("gzip", []) is None
+
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+@pytest.mark.asyncio
+async def test_result_download_supports_etags_ranges_and_gzip(auth_headers: dict):
+    """The document of a completed request downloads with revalidation, ranges and a precompressed variant."""
+    content = b"name,value\ndownload,3\n"
+    description = "Summarise the downloadable figures"
+    document = "# Downloadable figures\n\n" + "".join(f"- Figure {i} rose.\n" for i in range(200))
+    key = result_key(
+        [hashlib.sha256(content).hexdigest()],
+        description,
+        "markdown",
+        document_processor._templates.get(settings.DEFAULT_PROMPT_TEMPLATE).key,
+        settings.AZURE_FOUNDRY_DEPLOYMENT,
+    )
+    document_processor._result_cache.put(key, document)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/generate",
+            files=[("files", ("data.csv", content, "text/csv"))],
+            data={"description": description},
+            headers=auth_headers,
+        )
+        url = f"/api/v1/generate/{response.json()['request_id']}/result"
+        plain = await client.get(url, headers={**auth_headers, "Accept-Encoding": "identity"})
+        etag = plain.headers["etag"]
+        revalidated = await client.get(
+            url, headers={**auth_headers, "Accept-Encoding": "identity", "If-None-Match": etag}
+        )
+        partial = await client.get(
+            url, headers={**auth_headers, "Accept-Encoding": "identity", "Range": "bytes=0-21", "If-Range": etag}
+        )
+        compressed = await client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip"})
+        missing = await client.get(f"/api/v1/generate/{uuid.uuid4()}/result", headers=auth_headers)
+
+    assert plain.status_code == status.HTTP_200_OK
+    assert plain.text == document
+    assert etag == f'"{hashlib.sha256(document.encode()).hexdigest()}"'
+    assert plain.headers["content-type"].startswith("text/markdown")
+    assert "content-encoding" not in plain.headers
+    assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+    assert revalidated.content == b""
+    assert partial.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert partial.text == "# Downloadable figures"
+    assert partial.headers["content-range"] == f"bytes 0-21/{len(document.encode())}"
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] != etag
+    assert int(compressed.headers["content-length"]) < len(document.encode())
+    assert compressed.text == document
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_result_of_running_request_is_a_conflict(auth_headers: dict):
+    """Asking for the document of a request that is still running is answered with 409."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/generate",
+            files=[("files", ("data.csv", f"name,value\nrunning,{uuid.uuid4()}\n".encode(), "text/csv"))],
+            data={"description": "Summarise the running figures"},
+            headers=auth_headers,
+        )
+        result = await client.get(f"/api/v1/generate/{response.json()['request_id']}/result", headers=auth_headers)
+
+    assert result.status_code == status.HTTP_409_CONFLICT
+    assert result.json()["error"]["details"]["status"] == "processing"
+
+
+@pytest.mark.asyncio
+async def test_result_of_failed_request_is_not_found_with_its_reason(auth_headers: dict):
+    """A failed request never gets a document, so its result is a 404 carrying the failure rather than a 409."""
+    request_id = str(uuid.uuid4())
+    document_processor._active_requests[request_id] = GenerationStatus(
+        request_id=uuid.UUID(request_id), status="failed", error="Model service unavailable"
+    )
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            result = await client.get(f"/api/v1/generate/{request_id}/result", headers=auth_headers)
+    finally:
+        del document_processor._active_requests[request_id]
+
+    assert result.status_code == status.HTTP_404_NOT_FOUND
+    error = result.json()["error"]
+    assert "Model service unavailable" in error["message"]
+    assert error["details"]["status"] == "failed"
+    assert error["details"]["error"] == "Model service unavailable"
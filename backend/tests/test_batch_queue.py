@@ -0,0 +1,147 @@
+"""Tests for batching non-interactive model calls."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+
+from app.exceptions import ExternalServiceError
+from app.services.batch_queue import BatchQueue
+from app.services.chunking import Chunk
+from app.services.document_processor import DocumentProcessor, PipelineContext
+from app.services.metrics import metrics
+from app.services.model_client import ModelClient
+from app.services.model_stand_in import create_stand_in_app
+
+
+class RecordingClient(ModelClient):
+    """Client against the stand-in that records the batches it submits."""
+
+    def __init__(self, batch_delay: float = 0.0) -> None:
+        super().__init__(
+            endpoint="http://model",
+            api_key="key",
+            deployment="gpt-4o",
+            api_version="2024-10-21",
+            transport=httpx.ASGITransport(app=create_stand_in_app(batch_delay=batch_delay)),
+        )
+        self.batches: list[list[str]] = []
+        self.polls = 0
+
+    async def submit_batch(self, requests: Any, temperature: float = 0.2, deployment: str | None = None) -> str:
+        self.batches.append([custom_id for custom_id, _, _ in requests])
+        return await super().submit_batch(requests, temperature, deployment)
+
+    async def get_batch(self, batch_id: str) -> dict[str, Any]:
+        self.polls += 1
+        return await super().get_batch(batch_id)
+
+
+def messages(task: str) -> list[dict[str, str]]:
+    """Build a prompt the stand-in answers with a document titled after the task."""
+    return [{"role": "user", "content": f"Task: {task}\n\nSources:\n\n### a.pdf (part 1)\nCredit risk rose."}]
+
+
+@pytest.mark.asyncio
+async def test_calls_share_a_batch_and_get_their_own_results():
+    """Calls queued together are submitted as one batch, polled until done and fanned back out."""
+    client = RecordingClient(batch_delay=0.05)
+    queue = BatchQueue(lambda: client, max_requests=3, max_wait=10.0, poll_interval=0.02)
+    try:
+        results = await asyncio.gather(*(queue.complete(f"req-{i}", messages(f"Report {i}"), 256) for i in range(3)))
+    finally:
+        await client.aclose()
+
+    assert len(client.batches) == 1
+    assert len(client.batches[0]) == 3
+    assert client.polls > 1
+    assert [result.splitlines()[0] for result in results] == ["# Report 0", "# Report 1", "# Report 2"]
+    assert queue.stats() == {"queued": 0, "batches": 0, "requests": 0}
+
+
+@pytest.mark.asyncio
+async def test_partial_batches_are_submitted_after_the_wait_and_failures_reach_their_caller():
+    """A batch below the size threshold is sent once the oldest call waited; a missing result fails only its call."""
+    client = RecordingClient()
+    queue = BatchQueue(lambda: client, max_requests=100, max_wait=0.02, poll_interval=0.01)
+    original = client.batch_results
+
+    async def drop_first(output_file_id: str) -> dict[str, str]:
+        results = await original(output_file_id)
+        results.pop(client.batches[0][0])
+        return results
+
+    client.batch_results = drop_first  # type: ignore[method-assign]
+    try:
+        results = await asyncio.gather(
+            queue.complete("req-a", messages("First"), 256),
+            queue.complete("req-b", messages("Second"), 256),
+            return_exceptions=True,
+        )
+    finally:
+        await client.aclose()
+
+    assert len(client.batches) == 1
+    assert isinstance(results[0], ExternalServiceError)
+    assert isinstance(results[1], str) and results[1].startswith("# Second")
+
+
+@pytest.mark.asyncio
+async def test_non_interactive_generation_goes_through_a_batch():
+    """Documents of non-interactive requests are generated by a batch job rather than a streamed call."""
+    processor = DocumentProcessor()
+    processor._batch_queue.max_wait = 0.01
+    processor._batch_queue.poll_interval = 0.01
+    chunk = Chunk(chunk_id="c0", document="a.pdf", index=0, text="Credit risk rose.")
+    context = PipelineContext(
+        request_id="req-batch",
+        description="Summarise risks",
+        output_format="markdown",
+        files=[],
+        packed=[chunk],
+        interactive=False,
+    )
+    submitted = metrics.snapshot().get("batch.submitted", 0)
+
+    try:
+        await processor._generate_document(context)
+    finally:
+        await processor.shutdown()
+
+    assert context.output.startswith("# Summarise risks")
+    assert "Credit risk rose." in context.output
+    assert metrics.snapshot()["batch.submitted"] == submitted + 1
+    assert processor._deployments.stats()[processor._deployments.deployments[0].name]["latency"] == 0
+
+
+@pytest.mark.asyncio
+async def test_inputs_are_released_before_generation_waits_for_a_batch():
+    """Extracted text and uploaded files are dropped once the model input is packed, not when the batch ends."""
+    processor = DocumentProcessor()
+    request_id = "req-release"
+    directory = Path(tempfile.gettempdir()) / "md-decision-maker" / request_id
+    directory.mkdir(parents=True, exist_ok=True)
+    upload = directory / "figures.csv"
+    upload.write_text("region,revenue\nnorth,12\nsouth,9\n", encoding="utf-8")
+    processor._request_files[request_id] = [upload]
+    context = PipelineContext(
+        request_id=request_id,
+        description="Summarise revenue",
+        output_format="markdown",
+        files=[upload],
+        interactive=False,
+    )
+
+    try:
+        await processor._extract_documents(context, (".csv",))
+        await processor._prepare_and_release(context)
+    finally:
+        await processor.shutdown()
+
+    assert context.packed
+    assert context.documents == {}
+    assert not upload.exists() and not directory.exists()
+    assert request_id not in processor._request_files
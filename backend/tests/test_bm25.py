@@ -0,0 +1,44 @@
+"""Tests for BM25 relevance ranking."""
+
+import time
+
+from app.services.bm25 import BM25Index, score_chunks
+from app.services.chunking import Chunk
+
+TEXTS = [
+    "Revenue grew in every region and gross margin improved on lower freight costs",
+    "Liquidity risk is managed through committed credit facilities and cash pooling",
+    "The remuneration committee met four times during the year",
+    "Credit risk arises from trade receivables; credit limits are reviewed quarterly for each customer",
+]
+
+
+def test_ranks_matching_texts_first():
+    """Texts sharing rare query terms outrank texts with no overlap."""
+    index = BM25Index(TEXTS)
+
+    scores = index.score("Summarise the credit risk exposures")
+
+    assert scores.index(max(scores)) == 3
+    assert scores[1] > 0
+    assert scores[0] == scores[2] == 0
+    assert index.idf("committee") > index.idf("risk")
+
+
+def test_score_chunks_keys_by_chunk_id():
+    """Chunk scores are keyed by chunk identity."""
+    chunks = [Chunk(chunk_id=f"c{i}", document="a.pdf", index=i, text=text) for i, text in enumerate(TEXTS)]
+
+    scores = score_chunks(chunks, "revenue and margin")
+
+    assert max(scores, key=scores.__getitem__) == "c0"
+
+
+def test_indexing_hundreds_of_pages_is_fast():
+    """An index over a few hundred pages of text builds and scores in well under a second."""
+    pages = [" ".join(TEXTS[(page + offset) % len(TEXTS)] for offset in range(8)) for page in range(400)]
+
+    started = time.perf_counter()
+    BM25Index(pages).score("credit risk and liquidity")
+
+    assert time.perf_counter() - started < 1.0
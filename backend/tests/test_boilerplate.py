@@ -0,0 +1,85 @@
+"""Tests for page boilerplate detection."""
+
+from app.services.boilerplate import find_boilerplate
+from app.services.text_store import TextStore, TextStoreBuilder
+
+
+def build_report(pages: int) -> TextStore:
+    """Build a document with a running header, page numbers and unique body text."""
+    builder = TextStoreBuilder()
+    for page in range(pages):
+        builder.start_page()
+        builder.add_paragraph("ACME Corp — Annual Report 2024")
+        builder.add_paragraph(f"Body text unique to page {page} about topic {chr(65 + page)}")
+        builder.add_paragraph(f"Page {page + 1} of {pages}")
+    return builder.build()
+
+
+def test_running_header_and_page_numbers_are_detected():
+    """Lines repeating on every page edge are flagged, body text is kept."""
+    store = build_report(pages=6)
+
+    report = find_boilerplate(store, edge_lines=1)
+
+    flagged = {store.paragraph(index) for index in report.paragraphs}
+    assert "ACME Corp — Annual Report 2024" in flagged
+    assert "Page 3 of 6" in flagged
+    assert not any(text.startswith("Body text") for text in flagged)
+    assert report.bytes_removed > 0
+
+
+def test_short_documents_are_left_untouched():
+    """Documents below the page minimum are never stripped."""
+    store = build_report(pages=2)
+
+    report = find_boilerplate(store)
+
+    assert report.paragraphs == frozenset()
+    assert report.bytes_removed == 0
+
+
+def test_repeated_table_headers_are_kept():
+    """Table rows such as repeated column headers are not treated as boilerplate."""
+    builder = TextStoreBuilder()
+    for sheet in range(4):
+        builder.start_page()
+        builder.add_table_row(["Date", "Amount"], table=sheet, row=0)
+        builder.add_table_row([f"2024-0{sheet + 1}-01", str(sheet)], table=sheet, row=1)
+    store = builder.build()
+
+    report = find_boilerplate(store)
+
+    assert report.paragraphs == frozenset()
+
+
+def test_default_sheet_titles_are_kept_and_headers_above_tables_are_not():
+    """Sheet names recorded as titles survive although they only differ in their number; other headers do not."""
+    builder = TextStoreBuilder()
+    for sheet in range(4):
+        builder.start_page()
+        builder.add_paragraph("Confidential — internal use only")
+        builder.add_title(f"Sheet{sheet + 1}")
+        for row in range(6):
+            builder.add_table_row([f"Region {row}", str(sheet * row)], table=sheet, row=row)
+    store = builder.build()
+
+    report = find_boilerplate(store)
+
+    assert {store.paragraph(index) for index in report.paragraphs} == {"Confidential — internal use only"}
+
+
+def test_short_pages_of_numeric_body_text_are_kept():
+    """Body lines that differ only in their figures are not folded into a running header, even on short pages."""
+    builder = TextStoreBuilder()
+    for page in range(6):
+        builder.start_page()
+        builder.add_paragraph("Regional results")
+        for region in range(3):
+            builder.add_paragraph(f"Revenue in region {region + 1} grew by {page * 3 + region} percent this quarter.")
+        builder.add_paragraph(f"Page {page + 1} of 6")
+    store = builder.build()
+
+    assert find_boilerplate(store).paragraphs == frozenset()
+
+    flagged = {store.paragraph(index) for index in find_boilerplate(store, edge_lines=2).paragraphs}
+    assert flagged == {"Regional results", *(f"Page {page + 1} of 6" for page in range(6))}
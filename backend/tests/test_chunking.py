@@ -0,0 +1,86 @@
+"""Tests for content-defined chunking and the per-chunk cache."""
+
+import random
+
+from app.services.chunk_cache import ChunkCache
+from app.services.chunking import chunk_boundaries, chunk_documents
+from app.services.text_store import TextStore, TextStoreBuilder
+
+WORDS = ["revenue", "margin", "growth", "risk", "capital", "market", "forecast", "supply", "customer", "region"]
+
+
+def build_document(paragraph_count: int, seed: int = 7) -> list[str]:
+    """Generate deterministic pseudo-prose paragraphs."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) for _ in range(paragraph_count)]
+
+
+def to_store(paragraphs: list[str]) -> TextStore:
+    """Build a text store from paragraphs."""
+    builder = TextStoreBuilder()
+    for paragraph in paragraphs:
+        builder.add_paragraph(paragraph)
+    return builder.build()
+
+
+def test_boundaries_respect_size_limits():
+    """Every chunk except the last lies between the minimum and maximum size."""
+    data = "\n".join(build_document(200)).encode()
+
+    cuts = chunk_boundaries(data, min_size=256, avg_size=1024, max_size=4096)
+
+    sizes = [end - start for start, end in zip([0, *cuts], cuts)]
+    assert cuts[-1] == len(data)
+    assert all(256 <= size <= 4096 for size in sizes[:-1])
+    assert len(cuts) > 5
+
+
+def test_chunk_identities_survive_local_edit():
+    """Editing one paragraph only changes the chunks around it."""
+    original = build_document(200)
+    revised = list(original)
+    revised[100] = "An entirely rewritten paragraph that replaces the old wording."
+
+    before = chunk_documents({"report.pdf": to_store(original)})
+    after = chunk_documents({"report.pdf": to_store(revised)})
+
+    before_ids = {chunk.chunk_id for chunk in before}
+    after_ids = {chunk.chunk_id for chunk in after}
+    assert len(before_ids & after_ids) >= len(before_ids) - 3
+
+
+def test_excluded_paragraphs_are_left_out():
+    """Excluded paragraphs never appear in chunk text."""
+    store = to_store(["Keep this paragraph", "CONFIDENTIAL FOOTER", "And keep this one"])
+
+    chunks = chunk_documents({"a.docx": store}, excluded={"a.docx": {1}})
+
+    assert len(chunks) == 1
+    assert "CONFIDENTIAL" not in chunks[0].text
+
+
+def test_reprocessing_reuses_cached_chunk_work():
+    """Chunks seen in an earlier version are served from the cache."""
+    cache = ChunkCache()
+    paragraphs = build_document(100)
+
+    chunk_documents({"v1.docx": to_store(paragraphs)}, cache=cache)
+    first_misses = cache.misses
+    chunk_documents({"v2.docx": to_store(paragraphs + ["A new closing paragraph."])}, cache=cache)
+
+    assert cache.hits >= first_misses - 1
+
+
+def test_kinds_with_their_own_limit_are_not_evicted_by_cheap_entries():
+    """A flood of token counts evicts older token counts, never the separately bounded map notes."""
+    cache = ChunkCache(max_entries=10, kind_limits={"map": 2})
+    cache.put("map", "group-1", "notes 1")
+    for index in range(100):
+        cache.get_or_compute("tokens", f"chunk-{index}", lambda index=index: index)
+
+    assert cache.get("map", "group-1") == "notes 1"
+    assert cache.get("tokens", "chunk-0") is None
+    cache.put("map", "group-2", "notes 2")
+    cache.put("map", "group-3", "notes 3")
+    assert cache.get("map", "group-1") is None
+    assert cache.stats()["entries"] == 12
@@ -0,0 +1,70 @@
+"""Tests for the model endpoint circuit breaker."""
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from app.exceptions import ExternalServiceError
+from app.main import app
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.document_processor import document_processor
+
+
+def open_breaker(open_seconds: float) -> CircuitBreaker:
+    breaker = CircuitBreaker("model", failure_rate=0.5, window=4, min_calls=4, open_seconds=open_seconds)
+    for failed in (False, True, False, True):
+        breaker.record(failed, breaker.before_call())
+    return breaker
+
+
+def test_opens_on_failure_rate_and_closes_after_successful_probe():
+    """The circuit opens at the failure rate and a successful probe closes it."""
+    breaker = CircuitBreaker("model", failure_rate=0.5, window=4, min_calls=4)
+    for _ in range(3):
+        breaker.record(True, breaker.before_call())
+    assert breaker.state == "closed"
+
+    breaker = open_breaker(open_seconds=60)
+    assert breaker.state == "open"
+    with pytest.raises(ExternalServiceError):
+        breaker.check()
+
+    breaker.open_seconds = 0
+    assert breaker.state == "half_open"
+    probe = breaker.before_call()
+    assert probe
+    with pytest.raises(ExternalServiceError):
+        breaker.before_call()
+    breaker.record(False, probe)
+    assert breaker.state == "closed"
+    assert breaker.stats() == {"state": "closed", "recent_calls": 0, "recent_failures": 0, "times_opened": 1}
+
+
+def test_failed_probe_reopens_and_late_results_are_ignored():
+    """A failed probe starts a new cooldown; calls admitted earlier cannot close the circuit."""
+    breaker = open_breaker(open_seconds=0)
+    breaker.record(False)
+    assert breaker.state == "half_open"
+
+    breaker.record(True, breaker.before_call())
+    breaker.open_seconds = 60
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_rejects_new_requests(auth_headers: dict, monkeypatch: pytest.MonkeyPatch):
+    """While open, new generation requests fail fast and health reports the state."""
+    monkeypatch.setattr(document_processor, "_model_breaker", open_breaker(open_seconds=60))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/generate",
+            files=[("files", ("data.csv", b"name,value\noutage,1\n", "text/csv"))],
+            data={"description": "Summarise during the outage"},
+            headers=auth_headers,
+        )
+        health = await client.get("/health")
+
+    assert response.status_code == status.HTTP_502_BAD_GATEWAY
+    assert response.json()["error"]["details"]["circuit"] == "open"
+    assert health.json()["model_circuit"] == "open"
@@ -0,0 +1,81 @@
+"""Tests for the adaptive model concurrency limiter."""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from app.services.concurrency import AdaptiveLimiter
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_additively_and_shrinks_multiplicatively():
+    """Fast calls raise the limit slowly; throttling or slow calls halve it."""
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=8, latency_target=1.0)
+    for _ in range(4):
+        await limiter.acquire()
+        limiter.release(latency=0.1)
+    assert limiter.limit == 3
+
+    await limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 1
+
+    await limiter.acquire()
+    limiter.release(latency=5.0)
+    assert limiter.limit == 1
+    assert limiter.stats() == {"limit": 1, "in_flight": 0, "queued": 0}
+
+
+@pytest.mark.asyncio
+async def test_waiters_start_in_order_and_see_their_position():
+    """Queued callers start first-in first-out and are told when they move up."""
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    await limiter.acquire()
+    positions: dict = {"a": [], "b": []}
+    started: List[str] = []
+
+    async def wait(name: str) -> None:
+        async def report(position: int) -> None:
+            positions[name].append(position)
+
+        await limiter.acquire(report)
+        started.append(name)
+
+    waiters = [asyncio.create_task(wait("a")), asyncio.create_task(wait("b"))]
+    await asyncio.sleep(0)
+    assert limiter.stats()["queued"] == 2
+
+    limiter.release(latency=0.1)
+    await asyncio.sleep(0)
+    limiter.release(latency=0.1)
+    await asyncio.gather(*waiters)
+
+    assert started == ["a", "b"]
+    assert positions == {"a": [1], "b": [2, 1]}
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_new_calls():
+    """New calls wait until the provider's Retry-After has passed."""
+    limiter = AdaptiveLimiter(initial_limit=4)
+    limiter.pause(0.05)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    await limiter.acquire()
+
+    assert loop.time() - started >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_try_acquire_never_waits_or_jumps_the_queue():
+    """Slots are taken without waiting only while one is free and nobody is queued or paused."""
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+
+    limiter.pause(5.0)
+    assert not limiter.try_acquire()
+    assert limiter.stats() == {"limit": 1, "in_flight": 0, "queued": 0}
@@ -0,0 +1,67 @@
+"""Tests for near-duplicate paragraph elimination."""
+
+from app.services.deduplication import MinHasher, ParagraphRef, estimate_similarity, find_near_duplicates
+from app.services.text_store import TextStore, TextStoreBuilder
+
+SHARED = (
+    "The board approved the revised capital allocation framework which prioritises debt reduction "
+    "and sustained investment in the core manufacturing business over the next three years"
+)
+
+
+def build(*paragraphs: str) -> TextStore:
+    """Build a single-page document from paragraphs."""
+    builder = TextStoreBuilder()
+    for paragraph in paragraphs:
+        builder.add_paragraph(paragraph)
+    return builder.build()
+
+
+def test_signature_similarity_tracks_jaccard():
+    """Near-identical texts have similar signatures, unrelated texts do not."""
+    hasher = MinHasher(num_perm=128)
+    base = hasher.signature(SHARED)
+    edited = hasher.signature(SHARED.replace("three years", "three financial years"))
+    other = hasher.signature("Quarterly revenue increased in every region except the northern territories this period")
+
+    assert base is not None and edited is not None and other is not None
+    assert estimate_similarity(base, edited) > 0.7
+    assert estimate_similarity(base, other) < 0.2
+
+
+def test_duplicates_across_files_keep_first_copy():
+    """A near-identical paragraph in a later draft points at the canonical copy."""
+    documents = {
+        "draft_v1.docx": build("Introduction to the report and its purpose for readers", SHARED),
+        "draft_v2.docx": build(SHARED + ".", "A completely new closing section discussing next quarter targets"),
+    }
+
+    records = find_near_duplicates(documents, threshold=0.8)
+
+    assert len(records) == 1
+    assert records[0].duplicate == ParagraphRef("draft_v2.docx", 0)
+    assert records[0].canonical == ParagraphRef("draft_v1.docx", 1)
+    assert records[0].similarity >= 0.8
+
+
+def test_excluded_and_short_paragraphs_are_ignored():
+    """Already excluded paragraphs and short lines never participate."""
+    documents = {
+        "a.pdf": build(SHARED, "Page 1"),
+        "b.pdf": build(SHARED, "Page 1"),
+    }
+
+    records = find_near_duplicates(documents, excluded={"a.pdf": {0}})
+
+    assert records == []
+
+
+def test_near_identical_table_rows_are_kept():
+    """Rows of a sheet that differ in a couple of figures are distinct records, not duplicates."""
+    builder = TextStoreBuilder()
+    header = ["north", "retail", "eur", "q3", "audited", "group", "segment", "plan", "final", "yes"]
+    for row in range(30):
+        builder.add_table_row([*header, str(1000 + row), str(50 + row * 7)], table=0, row=row)
+    store = builder.build()
+
+    assert find_near_duplicates({"figures.csv": store}, threshold=0.8) == []
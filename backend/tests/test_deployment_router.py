@@ -0,0 +1,62 @@
+"""Tests for routing model calls across deployments."""
+
+import pytest
+
+from app.services.deployment_router import Deployment, DeploymentRouter, parse_deployments
+
+FAST = Deployment(name="gpt-4o-mini", context_tokens=32000)
+LONG = Deployment(name="gpt-4.1", context_tokens=1000000)
+
+
+def test_parse_deployments():
+    """Sizes are optional and an empty list falls back to the default deployment."""
+    assert parse_deployments(" gpt-4o-mini=32000, gpt-4.1=1000000 ,", "gpt-4o", 128000) == [FAST, LONG]
+    assert parse_deployments("gpt-4o-mini", "gpt-4o", 128000) == [Deployment("gpt-4o-mini", 128000)]
+    assert parse_deployments("", "gpt-4o", 128000) == [Deployment("gpt-4o", 128000)]
+    with pytest.raises(ValueError):
+        parse_deployments("gpt-4o=0", "gpt-4o", 128000)
+
+
+def test_large_calls_need_long_context_and_small_calls_avoid_busy_deployments():
+    """Only the long-context deployment fits large calls; small calls go where they are answered sooner."""
+    router = DeploymentRouter([FAST, LONG])
+    router.finished(_started(router, FAST), 1000, latency=0.2)
+    router.finished(_started(router, LONG), 1000, latency=0.2)
+
+    large = router.choose(input_tokens=100000, output_tokens=4096)
+    assert large == LONG
+    router.started(large)
+
+    assert router.choose(input_tokens=500, output_tokens=1024) == FAST
+    assert router.choose(input_tokens=2000000, output_tokens=1024) == LONG
+
+
+def test_latency_is_smoothed_and_normalized_by_size():
+    """Averages follow new samples gradually; a slow deployment loses small calls."""
+    router = DeploymentRouter([FAST, LONG], smoothing=0.5)
+    router.finished(_started(router, FAST), 0, latency=1.0)
+    router.finished(_started(router, FAST), 0, latency=3.0)
+    router.finished(_started(router, LONG), 9000, latency=5.0)
+
+    stats = router.stats()
+    assert stats["gpt-4o-mini"] == {"context_tokens": 32000, "latency": 2.0, "in_flight": 0}
+    assert stats["gpt-4.1"]["latency"] == 0.5
+    assert router.choose(input_tokens=500, output_tokens=1024) == LONG
+
+
+def test_failures_are_penalized_and_context_is_the_largest_window():
+    """A deployment that only fails stops attracting calls; the packing budget is the largest window."""
+    router = DeploymentRouter([FAST, LONG], failure_penalty=30.0)
+    router.finished(_started(router, LONG), 1000, latency=0.5)
+    router.finished(_started(router, FAST), 1000, latency=None, failed=True)
+
+    assert router.stats()["gpt-4o-mini"]["latency"] == 30.0
+    assert router.choose(input_tokens=500, output_tokens=1024) == LONG
+    router.finished(_started(router, LONG), 1000, latency=None)
+    assert router.stats()["gpt-4.1"]["latency"] == 0.25
+    assert router.context_tokens == LONG.context_tokens
+
+
+def _started(router: DeploymentRouter, deployment: Deployment) -> Deployment:
+    router.started(deployment)
+    return deployment
@@ -0,0 +1,176 @@
+"""Tests for the document processing pipeline."""
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+import pytest
+
+from app.config import settings
+from app.exceptions import RateLimitError
+from app.services.chunking import Chunk
+from app.services.document_processor import DocumentProcessor, PipelineContext
+
+
+class SlowModel:
+    """Model client stand-in that streams one token every few milliseconds."""
+
+    def __init__(self, tokens: list[str], delay: float) -> None:
+        self.tokens = tokens
+        self.delay = delay
+
+    async def stream(
+        self, messages: list[dict[str, str]], max_tokens: int = 4096, deployment: str | None = None
+    ) -> AsyncIterator[str]:
+        for token in self.tokens:
+            await asyncio.sleep(self.delay)
+            yield token
+
+    async def aclose(self) -> None:
+        pass
+
+
+def make_context(request_id: str = "req-1") -> PipelineContext:
+    """Create a context with a single packed chunk."""
+    chunk = Chunk(chunk_id="c0", document="a.pdf", index=0, text="Credit risk rose.")
+    return PipelineContext(
+        request_id=request_id, description="Summarise risks", output_format="markdown", files=[], packed=[chunk]
+    )
+
+
+@pytest.mark.asyncio
+async def test_generation_streams_batched_delta_events(monkeypatch: pytest.MonkeyPatch):
+    """Tokens reach subscribers in order, batched into fewer delta events."""
+    monkeypatch.setattr(settings, "STREAM_DELTA_INTERVAL", 0.02)
+    processor = DocumentProcessor()
+    tokens = [f"token{i} " for i in range(40)]
+    await processor._model_client.aclose()
+    processor._model_client = SlowModel(tokens, delay=0.002)  # type: ignore[assignment]
+    queue: asyncio.Queue = asyncio.Queue()
+    processor._subscribers["req-1"] = [queue]
+    context = make_context()
+
+    try:
+        await processor._generate_document(context)
+    finally:
+        await processor.shutdown()
+
+    events = [json.loads(queue.get_nowait()["data"]) for _ in range(queue.qsize())]
+    assert context.output == "".join(tokens)
+    assert "".join(event["text"] for event in events) == context.output
+    assert [event["sequence"] for event in events] == list(range(len(events)))
+    assert 1 < len(events) < len(tokens)
+
+
+@pytest.mark.asyncio
+async def test_generation_uses_stand_in_without_endpoint():
+    """Without a configured endpoint, the in-process stand-in produces the document."""
+    processor = DocumentProcessor()
+    context = make_context()
+
+    try:
+        await processor._generate_document(context)
+    finally:
+        await processor.shutdown()
+
+    assert context.output.startswith("# Summarise risks")
+    assert "Credit risk rose." in context.output
+
+
+class ThrottledModel(SlowModel):
+    """Model client stand-in that rejects the first call with a rate limit."""
+
+    def __init__(self, tokens: list[str]) -> None:
+        super().__init__(tokens, delay=0)
+        self.calls = 0
+
+    async def stream(
+        self, messages: list[dict[str, str]], max_tokens: int = 4096, deployment: str | None = None
+    ) -> AsyncIterator[str]:
+        self.calls += 1
+        if self.calls == 1:
+            raise RateLimitError(retry_after=0)
+        async for token in super().stream(messages, max_tokens):
+            yield token
+
+
+@pytest.mark.asyncio
+async def test_throttled_call_is_retried_with_a_lower_limit():
+    """A 429 before any output is retried and halves the concurrency limit."""
+    processor = DocumentProcessor()
+    await processor._model_client.aclose()
+    model = ThrottledModel(["# Report\n", "Done."])
+    processor._model_client = model  # type: ignore[assignment]
+    limit = processor._model_limiter.limit
+    context = make_context()
+
+    try:
+        await processor._generate_document(context)
+    finally:
+        await processor.shutdown()
+
+    assert model.calls == 2
+    assert context.output == "# Report\nDone."
+    assert processor._model_limiter.limit == max(limit // 2, 1)
+    assert processor._model_limiter.stats()["in_flight"] == 0
+
+
+class PausingModel(SlowModel):
+    """Model client stand-in that pauses after its first token until released."""
+
+    def __init__(self) -> None:
+        super().__init__([], delay=0)
+        self.resume = asyncio.Event()
+
+    async def stream(
+        self, messages: list[dict[str, str]], max_tokens: int = 4096, deployment: str | None = None
+    ) -> AsyncIterator[str]:
+        yield "# Report\n"
+        await self.resume.wait()
+        yield "Done."
+
+
+@pytest.mark.asyncio
+async def test_pending_text_is_flushed_while_the_model_pauses(monkeypatch: pytest.MonkeyPatch):
+    """Text written before a pause reaches subscribers without waiting for the next token."""
+    monkeypatch.setattr(settings, "STREAM_DELTA_INTERVAL", 0.01)
+    processor = DocumentProcessor()
+    await processor._model_client.aclose()
+    model = PausingModel()
+    processor._model_client = model  # type: ignore[assignment]
+    queue: asyncio.Queue = asyncio.Queue()
+    processor._subscribers["req-1"] = [queue]
+    context = make_context()
+
+    try:
+        generation = asyncio.create_task(processor._generate_document(context))
+        first = json.loads((await asyncio.wait_for(queue.get(), timeout=1.0))["data"])
+        model.resume.set()
+        await generation
+    finally:
+        await processor.shutdown()
+
+    assert first == {"sequence": 0, "text": "# Report\n"}
+    assert context.output == "# Report\nDone."
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected_instead_of_stalling_generation(monkeypatch: pytest.MonkeyPatch):
+    """A subscriber that stops reading gets an overflow event; generation finishes and frees its model slot."""
+    monkeypatch.setattr(settings, "STREAM_DELTA_INTERVAL", 0.001)
+    processor = DocumentProcessor()
+    await processor._model_client.aclose()
+    processor._model_client = SlowModel([f"token{i} " for i in range(50)], delay=0.002)  # type: ignore[assignment]
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+    processor._subscribers["req-1"] = [queue]
+    context = make_context()
+
+    try:
+        await asyncio.wait_for(processor._generate_document(context), timeout=5.0)
+    finally:
+        await processor.shutdown()
+
+    assert queue.qsize() == 1
+    assert queue.get_nowait()["event"] == "overflow"
+    assert "req-1" not in processor._subscribers
+    assert processor._model_limiter.stats()["in_flight"] == 0
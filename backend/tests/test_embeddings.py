@@ -0,0 +1,76 @@
+"""Tests for local hashed embeddings and their persistence."""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.services.chunk_cache import ChunkCache
+from app.services.chunking import Chunk
+from app.services.embeddings import EmbeddingMatrix, EmbeddingStore, HashingEmbedder
+
+TEXTS = {
+    "credit": "Credit risk arises from customer receivables and lending exposures",
+    "revenue": "Revenue growth was driven by new customers in the northern region",
+    "board": "The board of directors met eight times during the financial year",
+}
+
+
+def test_embeddings_are_normalized_and_stem_aware():
+    """Vectors have unit length and texts sharing word stems are closer than unrelated ones."""
+    embedder = HashingEmbedder(dimensions=128)
+    query = embedder.embed("receivable credit exposure")
+    credit = embedder.embed(TEXTS["credit"])
+    board = embedder.embed(TEXTS["board"])
+
+    assert math.isclose(math.sumprod(credit, credit), 1.0, rel_tol=1e-5)
+    assert math.sumprod(query, credit) > math.sumprod(query, board) + 0.2
+    assert embedder.embed("") == HashingEmbedder(dimensions=128).embed("")
+
+
+def test_matrix_top_k_for_batched_queries():
+    """Each query returns its best matches in descending similarity."""
+    embedder = HashingEmbedder(dimensions=128)
+    matrix = EmbeddingMatrix(128)
+    for key, text in TEXTS.items():
+        matrix.add(key, embedder.embed(text))
+
+    results = matrix.top_k([embedder.embed("credit risk"), embedder.embed("directors of the board")], k=2)
+
+    assert [key for key, _ in results[0]][0] == "credit"
+    assert [key for key, _ in results[1]][0] == "board"
+    assert results[0][0][1] >= results[0][1][1]
+
+
+def test_store_persists_vectors_per_file_hash(tmp_path: Path):
+    """Vectors are written once per file hash and reloaded by a fresh store."""
+    chunks = [Chunk(chunk_id=key, document="a.pdf", index=i, text=text) for i, (key, text) in enumerate(TEXTS.items())]
+    store = EmbeddingStore(tmp_path, HashingEmbedder(dimensions=64))
+    vectors = store.embed_file("abc123", chunks)
+
+    cache = ChunkCache()
+    reloaded = EmbeddingStore(tmp_path, HashingEmbedder(dimensions=64), cache=cache).embed_file("abc123", chunks)
+
+    assert reloaded == vectors
+    assert cache.stats()["misses"] == 0
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_store_is_bounded_and_safe_under_concurrent_saves(tmp_path: Path):
+    """Concurrent misses on one file never collide on a temp file, and old vectors beyond the cap are dropped."""
+    store = EmbeddingStore(tmp_path, HashingEmbedder(dimensions=16), max_vectors_per_file=8)
+
+    def embed(worker: int) -> None:
+        for call in range(50):
+            chunk = Chunk(chunk_id=f"w{worker}-{call}", document="a.pdf", index=call, text=f"chunk {worker} {call}")
+            store.embed_file("shared", [chunk])
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(embed, range(4)))
+
+    latest = [Chunk(chunk_id=f"new-{i}", document="a.pdf", index=i, text=f"new chunk {i}") for i in range(3)]
+    store.embed_file("shared", latest)
+    stored = store._load(store._path("shared"))
+
+    assert [path.suffix for path in tmp_path.iterdir()] == [".vec"]
+    assert len(stored) == 8
+    assert list(stored)[-3:] == ["new-0", "new-1", "new-2"]
@@ -0,0 +1,107 @@
+"""Tests for upload-time metadata probes."""
+
+import io
+import zipfile
+
+import pytest
+
+from app.utils import archive as archive_module
+from app.utils.file_probe import PDF_SCAN_BYTES, WORDS_PER_PDF_PAGE, probe_file
+
+S = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def build_pdf_with_xref(page_count: int) -> bytes:
+    """Build a PDF with a classic cross-reference table and an empty page tree body."""
+    kids = " ".join(f"{3 + i} 0 R" for i in range(page_count))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode(),
+        *(b"<< /Type /Page /Parent 2 0 R >>" for _ in range(page_count)),
+    ]
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += str(number).encode() + b" 0 obj\n" + obj + b"\nendobj\n"
+    xref_at = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    return body + f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF".encode()
+
+
+def zip_bytes(members: dict[str, str]) -> bytes:
+    """Pack members into an in-memory ZIP archive."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_probe_pdf_reads_page_count():
+    """Page counts come from the trailer's page tree or the linearization header."""
+    metadata = probe_file("report.pdf", build_pdf_with_xref(7))
+    assert metadata.page_count == 7
+    assert metadata.word_count == 7 * WORDS_PER_PDF_PAGE
+
+    linearized = b"%PDF-1.5\n1 0 obj\n<< /Linearized 1 /L 9000 /N 42 /T 8000 >>\nendobj\n"
+    assert probe_file("big.pdf", linearized).page_count == 42
+
+
+def test_probe_pdf_fallback_scans_only_the_ends_of_the_file():
+    """Without a usable trailer, page trees are looked for near the start and end of the file only."""
+    filler = b"%" + b"x" * PDF_SCAN_BYTES + b"\n"
+    near_end = b"%PDF-1.7\n" + filler + b"2 0 obj\n<< /Type /Pages /Count 9 >>\nendobj\n"
+    in_middle = b"%PDF-1.7\n" + filler + b"2 0 obj\n<< /Type /Pages /Count 9 >>\nendobj\n" + filler
+
+    assert probe_file("stream.pdf", near_end).page_count == 9
+    assert probe_file("stream.pdf", in_middle).page_count is None
+
+
+def test_probe_office_documents():
+    """DOCX counts come from extended properties and XLSX sizes from sheet dimensions."""
+    docx = zip_bytes(
+        {
+            "word/document.xml": "<w:document/>",
+            "docProps/app.xml": '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/'
+            'extended-properties"><Pages>3</Pages><Words>1234</Words></Properties>',
+        }
+    )
+    metadata = probe_file("memo.docx", docx)
+    assert (metadata.page_count, metadata.word_count) == (3, 1234)
+
+    xlsx = zip_bytes(
+        {
+            "xl/workbook.xml": f'<workbook {S} {R}><sheets><sheet name="Q3" r:id="rId1"/>'
+            '<sheet name="Q4" r:id="rId2"/></sheets></workbook>',
+            "xl/_rels/workbook.xml.rels": '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+            'relationships"><Relationship Id="rId1" Target="worksheets/sheet1.xml"/>'
+            '<Relationship Id="rId2" Target="worksheets/sheet2.xml"/></Relationships>',
+            "xl/worksheets/sheet1.xml": f'<worksheet {S}><dimension ref="A1:D20"/><sheetData/></worksheet>',
+            "xl/worksheets/sheet2.xml": f'<worksheet {S}><dimension ref="B2"/><sheetData/></worksheet>',
+        }
+    )
+    metadata = probe_file("figures.xlsx", xlsx)
+    assert [(sheet.name, sheet.rows, sheet.columns) for sheet in metadata.sheets] == [("Q3", 20, 4), ("Q4", 1, 1)]
+    assert metadata.row_count == 21
+
+
+def test_probe_skips_oversized_archive_members(monkeypatch: pytest.MonkeyPatch):
+    """Members above the uncompressed size limit are never inflated, so the probe yields empty metadata."""
+    properties = (
+        '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+        "<Pages>3</Pages><Words>1234</Words></Properties>"
+    )
+    docx = zip_bytes({"docProps/app.xml": properties})
+    assert probe_file("memo.docx", docx).page_count == 3
+
+    monkeypatch.setattr(archive_module, "MAX_UNCOMPRESSED_BYTES", 64)
+    assert probe_file("memo.docx", docx).page_count is None
+
+
+def test_probe_csv_and_malformed_files():
+    """CSV rows are counted by line breaks; unreadable files yield empty metadata."""
+    assert probe_file("data.csv", b"a,b\n1,2\n3,4").row_count == 3
+    assert probe_file("broken.docx", b"not a zip").page_count is None
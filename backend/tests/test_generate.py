@@ -43,6 +43,7 @@ async def test_generate_document_success(auth_headers: dict):
         csv_info = next(f for f in result["files_received"] if f["filename"] == "data.csv")
         assert csv_info["content_type"] == "text/csv"
         assert csv_info["size"] == len(csv_content)
+        assert csv_info["row_count"] == 2
 
 
 @pytest.mark.asyncio
@@ -32,4 +32,5 @@ def test_health_endpoint_structure(client: TestClient) -> None:
 
     data = response.json()
     # Ensure only the required fields are present
-    assert set(data.keys()) == {"status", "version"}
+    assert set(data.keys()) == {"status", "version", "model_circuit"}
+    assert data["model_circuit"] == "closed"
@@ -0,0 +1,122 @@
+"""Tests for hedged model calls."""
+
+import asyncio
+from typing import AsyncIterator, List
+
+import pytest
+
+from app.services.hedging import HedgeBudget, LatencyBuckets, LatencyTracker, hedged
+
+
+def test_percentiles_and_budget():
+    """Percentiles need enough samples; the budget caps hedges per call."""
+    tracker = LatencyTracker(min_samples=3)
+    tracker.record(0.1)
+    tracker.record(0.2)
+    assert tracker.percentile(95) is None
+    tracker.record(5.0)
+    assert tracker.percentile(50) == 0.2
+    assert tracker.percentile(95) == 5.0
+
+    budget = HedgeBudget(ratio=0.5)
+    budget.record_call()
+    assert not budget.try_spend()
+    budget.record_call()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+def test_budget_burst_is_bounded_and_latency_is_bucketed():
+    """A long quiet period saves up only the burst; percentiles are kept per deployment and prompt size."""
+    budget = HedgeBudget(ratio=0.05, burst=3.0)
+    for _ in range(10_000):
+        budget.record_call()
+    assert sum(budget.try_spend() for _ in range(100)) == 3
+
+    buckets = LatencyBuckets(min_samples=1, bucket_tokens=1000)
+    buckets.record("gpt-4o", 500, 0.5)
+    buckets.record("gpt-4o", 50_000, 8.0)
+    assert buckets.percentile("gpt-4o", 900, 95) == 0.5
+    assert buckets.percentile("gpt-4o", 60_000, 95) == 8.0
+    assert buckets.percentile("gpt-4o-mini", 900, 95) is None
+
+
+class Calls:
+    """Start streams whose first item arrives after the next configured delay."""
+
+    def __init__(self, delays: List[float]) -> None:
+        self.delays = delays
+        self.started = 0
+        self.closed: List[int] = []
+
+    def start(self) -> AsyncIterator[str]:
+        number = self.started
+        self.started += 1
+        return self._stream(number, self.delays[number])
+
+    async def _stream(self, number: int, delay: float) -> AsyncIterator[str]:
+        try:
+            await asyncio.sleep(delay)
+            yield f"call{number}:"
+            yield "done"
+        finally:
+            self.closed.append(number)
+
+
+def generous_budget() -> HedgeBudget:
+    return HedgeBudget(ratio=1.0)
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_cancelled():
+    """The hedge answers first; the slow call is cancelled."""
+    calls = Calls([5.0, 0.01])
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    items = [item async for item in hedged(calls.start, 0.02, generous_budget())]
+
+    assert items == ["call1:", "done"]
+    assert loop.time() - started < 1.0
+    assert sorted(calls.closed) == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_budget_or_before_deadline():
+    """Calls are not duplicated when the budget is spent or the first item arrives in time."""
+    exhausted = Calls([0.05, 0.0])
+    assert [item async for item in hedged(exhausted.start, 0.01, HedgeBudget(ratio=0.0))] == ["call0:", "done"]
+    assert exhausted.started == 1
+
+    fast = Calls([0.0, 0.0])
+    assert [item async for item in hedged(fast.start, 1.0, generous_budget())] == ["call0:", "done"]
+    assert fast.started == 1
+
+
+@pytest.mark.asyncio
+async def test_hedges_need_admission_and_release_it():
+    """A hedge without capacity is not started; an admitted hedge releases its capacity when it ends."""
+    released: List[str] = []
+
+    async def refuse() -> None:
+        return None
+
+    async def accept():
+        async def release() -> None:
+            released.append("hedge")
+
+        return release
+
+    refused = Calls([0.05, 0.0])
+    assert [item async for item in hedged(refused.start, 0.01, generous_budget(), refuse)] == ["call0:", "done"]
+    assert refused.started == 1
+
+    lost = Calls([0.0, 5.0])
+    won = Calls([5.0, 0.0])
+    slow_primary = Calls([0.05, 5.0])
+    assert [item async for item in hedged(won.start, 0.01, generous_budget(), accept)] == ["call1:", "done"]
+    assert released == ["hedge"]
+    assert [item async for item in hedged(slow_primary.start, 0.01, generous_budget(), accept)][0] == "call0:"
+    assert released == ["hedge", "hedge"]
+    assert [item async for item in hedged(lost.start, 1.0, generous_budget(), accept)] == ["call0:", "done"]
+    assert released == ["hedge", "hedge"]
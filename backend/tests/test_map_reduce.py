@@ -0,0 +1,140 @@
+"""Tests for map-reduce generation of oversized inputs."""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+
+from app.config import settings
+from app.services.chunking import Chunk
+from app.services.document_processor import DocumentProcessor, PipelineContext
+from app.services.map_reduce import group_chunks, group_key
+from app.services.text_store import TextStoreBuilder
+
+
+def make_chunks() -> list[Chunk]:
+    """Three chunks of one document and one of another, 25 tokens each."""
+    text = "x" * 100
+    return [
+        Chunk(chunk_id="a0", document="a.pdf", index=0, text=text),
+        Chunk(chunk_id="a1", document="a.pdf", index=1, text=text),
+        Chunk(chunk_id="a2", document="a.pdf", index=2, text=text),
+        Chunk(chunk_id="b0", document="b.pdf", index=0, text=text),
+    ]
+
+
+class RecordingModel:
+    """Model client stand-in that answers every call with the name of its first source."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def stream(
+        self, messages: list[dict[str, str]], max_tokens: int = 4096, deployment: str | None = None
+    ) -> AsyncIterator[str]:
+        prompt = messages[-1]["content"]
+        self.calls.append(prompt.splitlines()[0])
+        yield "notes on " + prompt.split("### ", 1)[1].splitlines()[0]
+
+    async def aclose(self) -> None:
+        pass
+
+
+def test_groups_respect_documents_and_token_limit():
+    """Groups hold consecutive chunks of one document up to the token limit."""
+    groups = group_chunks(make_chunks(), max_tokens=50)
+
+    assert [[chunk.chunk_id for chunk in group] for group in groups] == [["a0", "a1"], ["a2"], ["b0"]]
+    assert group_key(groups[0], "1") != group_key(groups[0], "2")
+
+
+@pytest.mark.asyncio
+async def test_map_outputs_are_reduced_and_reused(monkeypatch: pytest.MonkeyPatch):
+    """Groups are condensed once, reported over SSE and reused by later jobs."""
+    monkeypatch.setattr(settings, "MAP_MAX_PARALLEL", 2)
+    processor = DocumentProcessor()
+    await processor._model_client.aclose()
+    model = RecordingModel()
+    processor._model_client = model  # type: ignore[assignment]
+    queue: asyncio.Queue = asyncio.Queue()
+    processor._subscribers["req-1"] = [queue]
+
+    def make_context() -> PipelineContext:
+        return PipelineContext(
+            request_id="req-1",
+            description="Summarise",
+            output_format="markdown",
+            files=[],
+            map_groups=group_chunks(make_chunks(), max_tokens=50),
+        )
+
+    first, second = make_context(), make_context()
+    try:
+        await processor._generate_document(first)
+        await processor._generate_document(second)
+    finally:
+        await processor.shutdown()
+
+    events = [queue.get_nowait() for _ in range(queue.qsize())]
+    maps = [json.loads(event["data"]) for event in events if event["event"] == "map"]
+    assert [event["completed"] for event in maps] == [1, 2, 3, 1, 2, 3]
+    assert [event["cached"] for event in maps] == [False] * 3 + [True] * 3
+    assert sorted(model.calls).count("Task: Condense the excerpts into notes") == 3
+    assert len(model.calls) == 5
+    assert [chunk.text for chunk in second.packed] == [
+        "notes on a.pdf (part 1)",
+        "notes on a.pdf (part 3)",
+        "notes on b.pdf (part 1)",
+    ]
+    assert second.output == "notes on a.pdf (part 1)"
+
+
+@pytest.mark.asyncio
+async def test_oversized_content_is_mapped_and_only_packing_that_drops_chunks_is_ranked(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+):
+    """Map-reduce takes oversized content unranked; scores are computed only when the packer must leave chunks out."""
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", str(tmp_path))
+    processor = DocumentProcessor()
+    scored: list[str] = []
+    score_chunks = processor._score_chunks
+
+    def record(context: PipelineContext) -> dict[str, float]:
+        scored.append(context.request_id)
+        return score_chunks(context)
+
+    monkeypatch.setattr(processor, "_score_chunks", record)
+    builder = TextStoreBuilder()
+    for index in range(40):
+        builder.add_paragraph(f"Paragraph {index} reports that credit exposure in segment {index} changed. " * 8)
+    store = builder.build()
+
+    def make_context(request_id: str) -> PipelineContext:
+        return PipelineContext(
+            request_id=request_id,
+            description="Summarise credit exposure",
+            output_format="markdown",
+            files=[],
+            file_hashes={"a.txt": request_id},
+            documents={"a.txt": store},
+        )
+
+    fits, mapped, packed = make_context("fits"), make_context("mapped"), make_context("packed")
+    try:
+        await processor._prepare_content(fits)
+        prompt_tokens = processor._template(fits).prompt_tokens(fits.description)
+        monkeypatch.setattr(
+            settings, "MODEL_OUTPUT_RESERVE_TOKENS", processor._deployments.context_tokens - prompt_tokens - 500
+        )
+        await processor._prepare_content(mapped)
+        monkeypatch.setattr(settings, "MAP_REDUCE_ENABLED", False)
+        await processor._prepare_content(packed)
+    finally:
+        await processor.shutdown()
+
+    assert fits.packed == fits.chunks and not fits.map_groups
+    assert mapped.map_groups and not mapped.packed
+    assert packed.scores and 0 < len(packed.packed) < len(packed.chunks)
+    assert scored == ["packed"]
@@ -0,0 +1,125 @@
+"""Tests for the pooled model client against the local stand-in."""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.exceptions import ConfigurationError, ExternalServiceError, RateLimitError
+from app.services.document_processor import DocumentProcessor
+from app.services.model_client import ModelClient, is_outage, parse_retry_after
+from app.services.model_stand_in import create_stand_in_app
+
+MESSAGES = [
+    {"role": "system", "content": "Write documents."},
+    {
+        "role": "user",
+        "content": "Task: Summarise risks\n\nSources:\n\n### a.pdf (part 1)\nCredit risk rose. Other text.",
+    },
+]
+
+
+def make_client(transport: httpx.AsyncBaseTransport) -> ModelClient:
+    """Create a client for the given transport."""
+    return ModelClient(
+        endpoint="http://model", api_key="key", deployment="gpt-4o", api_version="2024-10-21", transport=transport
+    )
+
+
+@pytest.mark.asyncio
+async def test_complete_and_stream_agree():
+    """Streamed deltas add up to the non-streaming completion."""
+    client = make_client(httpx.ASGITransport(app=create_stand_in_app()))
+    try:
+        text = await client.complete(MESSAGES)
+        deltas = [delta async for delta in client.stream(MESSAGES)]
+    finally:
+        await client.aclose()
+
+    assert text.startswith("# Summarise risks")
+    assert "**a.pdf (part 1)**: Credit risk rose." in text
+    assert len(deltas) > 5
+    assert "".join(deltas) == text
+
+
+@pytest.mark.asyncio
+async def test_error_responses_map_to_api_exceptions():
+    """Throttling carries Retry-After; other failures become external service errors."""
+    responses = iter([httpx.Response(429, headers={"retry-after": "7"}), httpx.Response(500)])
+    client = make_client(httpx.MockTransport(lambda request: next(responses)))
+    try:
+        with pytest.raises(RateLimitError) as throttled:
+            await client.complete(MESSAGES)
+        with pytest.raises(ExternalServiceError):
+            [delta async for delta in client.stream(MESSAGES)]
+    finally:
+        await client.aclose()
+
+    assert throttled.value.details == {"retry_after": 7}
+
+
+@pytest.mark.asyncio
+async def test_only_server_and_transport_errors_are_outages():
+    """Client errors come from a working endpoint; 5xx responses and connection failures do not."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/offline/chat/completions"):
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(int(request.url.path.split("/")[3]))
+
+    client = make_client(httpx.MockTransport(handler))
+    outages = {}
+    try:
+        for deployment in ["400", "401", "404", "500", "503", "offline"]:
+            with pytest.raises(ExternalServiceError) as error:
+                await client.complete(MESSAGES, deployment=deployment)
+            outages[deployment] = is_outage(error.value)
+    finally:
+        await client.aclose()
+
+    assert outages == {"400": False, "401": False, "404": False, "500": True, "503": True, "offline": True}
+
+
+@pytest.mark.asyncio
+async def test_calls_can_target_another_deployment():
+    """A per-call deployment replaces the default one in the request path."""
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    client = make_client(httpx.MockTransport(handler))
+    try:
+        await client.complete(MESSAGES)
+        await client.complete(MESSAGES, deployment="gpt-4.1")
+    finally:
+        await client.aclose()
+
+    assert paths == [
+        "/openai/deployments/gpt-4o/chat/completions",
+        "/openai/deployments/gpt-4.1/chat/completions",
+    ]
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    """Retry-After may be a number of seconds or an HTTP date; anything else is ignored."""
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+
+    assert parse_retry_after("7") == 7
+    assert parse_retry_after("1.5") == 2
+    assert 55 <= parse_retry_after(in_a_minute) <= 60
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_stand_in_is_refused_outside_development(monkeypatch: pytest.MonkeyPatch):
+    """Without an endpoint, production refuses to start instead of answering from the stand-in."""
+    monkeypatch.setattr(settings, "AZURE_FOUNDRY_ENDPOINT", "")
+    monkeypatch.setattr(settings, "APP_ENV", "production")
+
+    with pytest.raises(ConfigurationError):
+        DocumentProcessor._create_model_client()
@@ -0,0 +1,96 @@
+"""Tests for the model call budget shared across worker processes."""
+
+import asyncio
+import fcntl
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.config import settings
+from app.main import app
+from app.services.document_processor import DocumentProcessor
+from app.services.node_budget import NodeBudget
+
+
+def test_slots_are_shared_through_the_state_file(tmp_path: Path):
+    """Budgets of different workers pointing at one file share the same slots."""
+    path = tmp_path / "budget.json"
+    first, second = NodeBudget(path, max_concurrency=2), NodeBudget(path, max_concurrency=2)
+
+    lease = first.try_acquire()
+    assert lease is not None
+    assert second.try_acquire() is not None
+    assert first.try_acquire() is None
+
+    first.release(lease)
+    assert second.try_acquire() is not None
+    assert second.snapshot()["in_use"] == 2
+
+
+def test_token_bucket_limits_requested_tokens(tmp_path: Path):
+    """Calls wait once the bucket is drained; oversized requests are capped at the bucket size."""
+    budget = NodeBudget(tmp_path / "budget.json", max_concurrency=0, tokens_per_minute=6000)
+
+    assert budget.try_acquire(tokens=5000) is not None
+    assert budget.try_acquire(tokens=2000) is None
+    assert budget.snapshot()["tokens_available"] < 2000
+
+    full = NodeBudget(tmp_path / "other.json", max_concurrency=0, tokens_per_minute=6000)
+    lease = full.try_acquire(tokens=50000)
+    assert lease is not None and lease.tokens == 6000
+
+
+def test_slots_of_exited_workers_are_reclaimed(tmp_path: Path):
+    """Leases held by a process that no longer exists do not count against the budget."""
+    path = tmp_path / "budget.json"
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    lease = {"pid": int(exited.stdout), "tokens": 0, "acquired_at": 1e12}
+    path.write_text(json.dumps({"leases": {"stale": lease}}))
+
+    budget = NodeBudget(path, max_concurrency=1)
+
+    assert budget.try_acquire() is not None
+
+
+@pytest.mark.asyncio
+async def test_model_budget_endpoint(auth_headers: dict):
+    """The debug endpoint reports the node budget."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/v1/metrics/model-budget", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["max_concurrency"] == settings.MODEL_NODE_MAX_CONCURRENCY
+    assert response.json()["in_use"] == len(response.json()["leases"])
+
+
+@pytest.mark.asyncio
+async def test_locked_state_file_does_not_block_the_event_loop(tmp_path: Path):
+    """While another worker holds the lock, reading the budget waits in a thread and the loop keeps running."""
+    processor = DocumentProcessor()
+    processor._node_budget = NodeBudget(tmp_path / "budget.json")
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        with open(tmp_path / "budget.json", "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            snapshot = asyncio.create_task(processor.model_budget_snapshot())
+            await asyncio.sleep(0.1)
+            assert not snapshot.done()
+            fcntl.flock(f, fcntl.LOCK_UN)
+        assert (await snapshot)["in_use"] == 0
+    finally:
+        ticker.cancel()
+        await processor.shutdown()
+
+    assert ticks > 5
@@ -0,0 +1,35 @@
+"""Tests for outline-driven extraction planning."""
+
+from app.services.outline import build_sections, extract_within_budget, plan_extraction
+
+
+def test_sections_cover_their_subsections():
+    """A section ends at the next entry of the same or a higher level."""
+    sections = build_sections([("Risks", 0, 2), ("Credit", 1, 3), ("Appendix", 0, 8)], unit_count=10)
+
+    assert [(section.title, section.start, section.end) for section in sections] == [
+        ("Risks", 2, 8),
+        ("Credit", 3, 8),
+        ("Appendix", 8, 10),
+    ]
+
+
+def test_unmatched_description_extracts_everything():
+    """Without a matching section title there is no plan and the document is read in full."""
+    sections = build_sections([("Overview", 0, 0), ("Appendix", 0, 5)], unit_count=10)
+
+    assert plan_extraction(sections, 10, "Summarize the document") is None
+
+
+def test_plan_selects_matching_sections_and_budget_fills_the_rest():
+    """Matching sections are mandatory; other spans are taken while the budget allows."""
+    sections = build_sections([("Overview", 0, 0), ("Risk factors", 0, 4), ("Appendix", 0, 8)], unit_count=10)
+
+    plan = plan_extraction(sections, 10, "summarize the key risks")
+
+    assert plan is not None
+    assert plan.relevant == frozenset(range(4, 8))
+    assert plan.optional == (range(0, 4), range(8, 10))
+
+    extracted = extract_within_budget(plan, extract_unit=lambda unit: unit, unit_tokens=lambda _: 100, token_budget=650)
+    assert sorted(extracted) == [4, 5, 6, 7, 8, 9]
@@ -0,0 +1,117 @@
+"""Tests for the prompt template registry."""
+
+import os
+from pathlib import Path
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.services.prompt_templates import DEFAULT_TEMPLATE_DIR, TemplateRegistry, compile_template
+
+BRIEF = """
+name = "brief"
+version = {version}
+system = "You write briefs."
+instructions = "{instructions}"
+"""
+
+
+def write_template(path: Path, version: int, instructions: str, mtime: int) -> None:
+    """Write a template file with a fixed modification time."""
+    path.write_text(BRIEF.format(version=version, instructions=instructions), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_bundled_templates_compile_with_static_prefix_first():
+    """Every shipped template compiles, and rendered prompts put the static text before the request."""
+    registry = TemplateRegistry(DEFAULT_TEMPLATE_DIR)
+    assert {"default", "executive-brief"} <= set(registry.names())
+
+    template = registry.get("default")
+    messages = template.render("Summarise risks", "markdown", "### a.pdf (part 1)\nCredit risk rose.")
+    content = messages[1]["content"]
+
+    assert messages[0] == {"role": "system", "content": template.system}
+    assert content.startswith(template.instructions)
+    assert content.index("Credit risk rose.") < content.index("Task: Summarise risks")
+    assert template.key == f"default@{template.version}+{template.digest}"
+    assert template.prompt_tokens("Summarise risks") > template.prefix_tokens
+
+
+@pytest.mark.asyncio
+async def test_edited_templates_reload_and_broken_edits_keep_previous_version(tmp_path: Path):
+    """Changed files are picked up without a restart; a file that fails to compile keeps the loaded version."""
+    path = tmp_path / "brief.toml"
+    write_template(path, 1, "Be short.", mtime=1_000_000_000)
+    registry = TemplateRegistry(tmp_path, reload_interval=0)
+    first = registry.get("brief").key
+    assert first.startswith("brief@1+")
+
+    write_template(path, 2, "Be very short.", mtime=2_000_000_000)
+    await registry.refresh()
+    second = registry.get("brief").key
+    assert second.startswith("brief@2+")
+    assert registry.get("brief").instructions == "Be very short."
+
+    path.write_text('name = "brief"\nversion = "three"\n', encoding="utf-8")
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+    with pytest.raises(ValueError):
+        compile_template(path)
+    await registry.refresh()
+    assert registry.get("brief").key == second
+
+    path.unlink()
+    await registry.refresh()
+    with pytest.raises(KeyError):
+        registry.get("brief")
+
+
+@pytest.mark.asyncio
+async def test_edits_without_a_version_bump_change_the_key(tmp_path: Path):
+    """Hot-reloaded text changes the cache identity even when the version number stays the same."""
+    path = tmp_path / "brief.toml"
+    write_template(path, 1, "Be short.", mtime=1_000_000_000)
+    registry = TemplateRegistry(tmp_path, reload_interval=0)
+    before = registry.get("brief").key
+
+    write_template(path, 1, "Be very short.", mtime=2_000_000_000)
+    await registry.refresh()
+    after = registry.get("brief").key
+
+    assert before != after
+    assert before.startswith("brief@1+") and after.startswith("brief@1+")
+
+
+@pytest.mark.asyncio
+async def test_unknown_template_is_rejected(auth_headers: dict):
+    """Requests naming a template that does not exist fail validation and list the available ones."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/generate",
+            data={"description": "Summarise the figures", "template": "missing"},
+            files=[("files", ("figures.csv", b"name,value\na,1\n", "text/csv"))],
+            headers=auth_headers,
+        )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    details = response.json()["error"]["details"]
+    assert details["template"] == "missing"
+    assert "default" in details["available"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_rescans_after_the_interval(tmp_path: Path):
+    """Lookups never touch the file system, and refreshes within the interval do not rescan the directory."""
+    path = tmp_path / "brief.toml"
+    write_template(path, 1, "Be short.", mtime=1_000_000_000)
+    registry = TemplateRegistry(tmp_path, reload_interval=3600)
+
+    write_template(path, 2, "Be very short.", mtime=2_000_000_000)
+    await registry.refresh()
+    assert registry.get("brief").version == 1
+
+    registry.reload_interval = 0
+    await registry.refresh()
+    assert registry.get("brief").version == 2
@@ -0,0 +1,169 @@
+"""Tests for the generation result cache."""
+
+import hashlib
+import json
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from app.config import settings
+from app.main import app
+from app.services.document_processor import document_processor
+from app.services.embeddings import HashingEmbedder
+from app.services.result_cache import (
+    ResultCache,
+    description_words,
+    embed_description,
+    normalize_description,
+    result_key,
+    scope_key,
+)
+
+
+def test_key_ignores_formatting_and_file_order():
+    """Whitespace, case, trailing punctuation and file order do not change the key."""
+    first = result_key(["b", "a"], "Summarise  the Q3 report.", "markdown", "1", "gpt-4o")
+    second = result_key(["a", "b"], "summarise the q3 report", "markdown", "1", "gpt-4o")
+
+    assert normalize_description("  Summarise\nthe Q3 report!! ") == "summarise the q3 report"
+    assert first == second
+    assert first != result_key(["a", "b"], "summarise the q3 report", "pdf", "1", "gpt-4o")
+    assert first != result_key(["a", "b"], "summarise the q3 report", "markdown", "2", "gpt-4o")
+
+
+def test_cache_evicts_least_recently_used_and_expired():
+    """The cache is bounded and stops serving stale entries."""
+    cache = ResultCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert ResultCache(ttl_seconds=-1).get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_identical_request_completes_from_cache(auth_headers: dict):
+    """A cached request completes immediately and its stream ends with a complete event."""
+    content = b"name,value\ncached,1\n"
+    description = "Summarise the cached figures"
+    key = result_key(
+        [hashlib.sha256(content).hexdigest()],
+        description,
+        "markdown",
+        document_processor._templates.get(settings.DEFAULT_PROMPT_TEMPLATE).key,
+        settings.AZURE_FOUNDRY_DEPLOYMENT,
+    )
+    document_processor._result_cache.put(key, "# Cached figures\n")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        before = (await client.get("/api/v1/metrics", headers=auth_headers)).json()["counters"]
+        response = await client.post(
+            "/api/v1/generate",
+            files=[("files", ("data.csv", content, "text/csv"))],
+            data={"description": description.upper(), "output_format": "markdown"},
+            headers=auth_headers,
+        )
+        request_id = response.json()["request_id"]
+        status_response = await client.get(f"/api/v1/generate/{request_id}/status", headers=auth_headers)
+        after = (await client.get("/api/v1/metrics", headers=auth_headers)).json()["counters"]
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert status_response.json()["status"] == "completed"
+    assert status_response.json()["cache_status"] == "hit"
+    assert after["result_cache.hits"] == before.get("result_cache.hits", 0) + 1
+
+    events = [event async for event in document_processor.subscribe_to_request(request_id)]
+    assert [event["event"] for event in events] == ["status", "complete"]
+    assert json.loads(events[1]["data"])["cache_status"] == "hit"
+
+
+def test_similar_descriptions_share_results_within_scope():
+    """Paraphrases match; added or changed words, numbers, negations, other scopes or dissimilar asks do not."""
+    embedder = HashingEmbedder(dimensions=256, tokenize=description_words)
+    cache = ResultCache()
+    cache.put("k1", "# Q3 summary", scope="files-a", description=embed_description(embedder, "Summarize Q3 report"))
+
+    def lookup(description: str, scope: str = "files-a"):
+        return cache.find_similar(scope, embed_description(embedder, description), threshold=0.9)
+
+    match = lookup("Give me a summary of the Q3 report")
+    assert match is not None and match[0].output == "# Q3 summary"
+    assert lookup("Summarize Q4 report") is None
+    assert lookup("List the key risks in the Q3 report") is None
+    assert lookup("Summarize Q3 report", scope="files-b") is None
+
+    long = "Write an executive summary of the quarterly results, covering revenue, margins, churn and guidance"
+    cache.put("k2", "# Executive summary", scope="files-a", description=embed_description(embedder, long))
+    assert lookup(long.replace("Write an", "Please write an")) is not None
+    assert lookup(long + ", in French") is None
+    assert lookup(long.replace("executive", "technical")) is None
+    assert lookup("Do not " + long[0].lower() + long[1:]) is None
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_can_be_disabled_per_request(auth_headers: dict):
+    """A near-identical description is served from cache unless the request opts out."""
+    content = b"name,value\nsemantic,2\n"
+    file_hashes = [hashlib.sha256(content).hexdigest()]
+    deployment = settings.AZURE_FOUNDRY_DEPLOYMENT
+    prompt_key = document_processor._templates.get(settings.DEFAULT_PROMPT_TEMPLATE).key
+    document_processor._result_cache.put(
+        result_key(file_hashes, "Summarize the semantic figures", "markdown", prompt_key, deployment),
+        "# Semantic figures\n",
+        scope=scope_key(file_hashes, "markdown", prompt_key, deployment),
+        description=embed_description(document_processor._description_embedder, "Summarize the semantic figures"),
+    )
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = []
+        for semantic_cache in ("true", "false"):
+            response = await client.post(
+                "/api/v1/generate",
+                files=[("files", ("data.csv", content, "text/csv"))],
+                data={"description": "Give me a summary of the semantic figures", "semantic_cache": semantic_cache},
+                headers=auth_headers,
+            )
+            request_id = response.json()["request_id"]
+            status_response = await client.get(f"/api/v1/generate/{request_id}/status", headers=auth_headers)
+            statuses.append(status_response.json()["cache_status"])
+
+    assert statuses == ["semantic_hit", "miss"]
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_pipeline(auth_headers: dict):
+    """A request identical to one in flight mirrors the running pipeline instead of starting another."""
+    content = b"name,value\ncoalesced,3\n"
+    request = {
+        "files": [("files", ("data.csv", content, "text/csv"))],
+        "data": {"description": "Summarise the coalesced figures"},
+        "headers": auth_headers,
+    }
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        before = (await client.get("/api/v1/metrics", headers=auth_headers)).json()["counters"]
+        leader_id = (await client.post("/api/v1/generate", **request)).json()["request_id"]
+        follower_id = (await client.post("/api/v1/generate", **request)).json()["request_id"]
+        after = (await client.get("/api/v1/metrics", headers=auth_headers)).json()["counters"]
+
+    assert leader_id != follower_id
+    assert document_processor._followers[leader_id] == [follower_id]
+    assert after["requests.coalesced"] == before.get("requests.coalesced", 0) + 1
+    assert after.get("result_cache.misses") == before.get("result_cache.misses", 0) + 1
+
+    events = document_processor.subscribe_to_request(follower_id)
+    assert (await anext(events))["event"] == "status"
+    progress = await anext(events)
+    await events.aclose()
+
+    leader = await document_processor.get_request_status(leader_id)
+    follower = await document_processor.get_request_status(follower_id)
+    assert progress["event"] == "progress"
+    assert follower is not None and leader is not None
+    assert follower.cache_status == "coalesced"
+    assert follower.current_step == leader.current_step >= json.loads(progress["data"])["step"]
+    assert str(follower.request_id) == follower_id
@@ -0,0 +1,120 @@
+"""Tests for section-parallel document generation."""
+
+import asyncio
+import re
+from typing import AsyncIterator
+
+import pytest
+
+from app.config import settings
+from app.services.chunking import Chunk
+from app.services.document_processor import DocumentProcessor, PipelineContext
+from app.services.prompt_templates import DEFAULT_TEMPLATE_DIR, TemplateRegistry
+from app.services.sections import Outline, parse_outline, section_messages, section_sources
+
+DELAYS = {"Alpha": 0.06, "Beta": 0.01, "Gamma": 0.03}
+
+
+class SectionModel:
+    """Model client stand-in whose sections take different times to write."""
+
+    async def stream(
+        self, messages: list[dict[str, str]], max_tokens: int = 4096, deployment: str | None = None
+    ) -> AsyncIterator[str]:
+        step = re.search(r"^Step: (?:outline|section \d+ of \d+: (.+))$", messages[-1]["content"], re.MULTILINE)
+        assert step is not None
+        if step.group(1) is None:
+            yield "# Report\n1. Alpha\n2. Beta\n3. Gamma\n"
+            return
+        section = step.group(1)
+        for token in [f"## {section}\n", "written ", f"slowly in {DELAYS[section]}s"]:
+            await asyncio.sleep(DELAYS[section])
+            yield token
+
+    async def aclose(self) -> None:
+        pass
+
+
+def make_context() -> PipelineContext:
+    chunks = [
+        Chunk(chunk_id="a0", document="a.pdf", index=0, text="Revenue grew 8%."),
+        Chunk(chunk_id="b0", document="b.pdf", index=0, text="Churn fell to 2%."),
+    ]
+    return PipelineContext(
+        request_id="req-1", description="Summarise results", output_format="markdown", files=[], packed=chunks
+    )
+
+
+def test_outline_parsing_strips_markup_and_duplicates():
+    """Titles, list markers and repeated sections are handled."""
+    outline = parse_outline("# Q3 review\n\n1. Summary\n- **Risks**\n## Outlook\n2) Summary\n", max_sections=2)
+
+    assert outline.title == "Q3 review"
+    assert outline.sections == ["Summary", "Risks"]
+
+
+def test_sections_get_their_relevant_sources_and_the_template_prompt():
+    """Sections get the chunks ranking highest for their title within the budget, under the template prompt."""
+    chunks = [
+        Chunk(chunk_id="a0", document="a.pdf", index=0, text="Revenue grew 8% on strong retail revenue."),
+        Chunk(chunk_id="b0", document="b.pdf", index=0, text="Churn fell to 2% after the loyalty programme."),
+        Chunk(chunk_id="c0", document="c.pdf", index=0, text="Hiring slowed in every region."),
+    ]
+    outline = Outline(title="Results", sections=["Revenue", "Churn", "Weather"])
+
+    sources = section_sources(chunks, outline, "Summarise hiring results", 10, lambda chunk: 10)
+    assert [[chunk.chunk_id for chunk in section] for section in sources] == [["a0"], ["b0"], ["c0"]]
+    everything = section_sources(chunks, outline, "Summarise results", 1000, lambda chunk: 10)
+    assert all(section == chunks for section in everything)
+
+    messages = section_messages("Summarise", "markdown", "", outline, 0, system="You write briefs.")
+    assert messages[0]["content"].startswith("You write briefs.\n\n")
+
+
+def test_short_templates_are_not_written_by_section():
+    """The executive brief stays a single call however long its sources are."""
+    registry = TemplateRegistry(DEFAULT_TEMPLATE_DIR)
+    assert registry.get("default").sectioned
+    assert not registry.get("executive-brief").sectioned
+
+
+@pytest.mark.asyncio
+async def test_sections_are_written_concurrently_and_streamed_in_order(monkeypatch: pytest.MonkeyPatch):
+    """The report takes about as long as its slowest section and keeps the outline order."""
+    monkeypatch.setattr(settings, "SECTION_MIN_INPUT_TOKENS", 0)
+    processor = DocumentProcessor()
+    await processor._model_client.aclose()
+    processor._model_client = SectionModel()  # type: ignore[assignment]
+    context = make_context()
+    loop = asyncio.get_running_loop()
+
+    started = loop.time()
+    try:
+        await processor._generate_document(context)
+    finally:
+        await processor.shutdown()
+    elapsed = loop.time() - started
+
+    assert context.output == (
+        "# Report\n\n## Alpha\nwritten slowly in 0.06s\n\n## Beta\nwritten slowly in 0.01s\n\n"
+        "## Gamma\nwritten slowly in 0.03s"
+    )
+    # Written one after another, the three tokens of every section would take 0.3s
+    assert elapsed < 3 * sum(DELAYS.values())
+
+
+@pytest.mark.asyncio
+async def test_stand_in_answers_outline_and_section_steps(monkeypatch: pytest.MonkeyPatch):
+    """The local stand-in supports section-parallel generation end to end."""
+    monkeypatch.setattr(settings, "SECTION_MIN_INPUT_TOKENS", 0)
+    processor = DocumentProcessor()
+    context = make_context()
+
+    try:
+        await processor._generate_document(context)
+    finally:
+        await processor.shutdown()
+
+    headings = [line for line in context.output.splitlines() if line.startswith("#")]
+    assert headings == ["# Summarise results", "## Overview", "## a.pdf", "## b.pdf"]
+    assert "- **b.pdf (part 1)**: Churn fell to 2%." in context.output
@@ -0,0 +1,65 @@
+"""Tests for extractive TextRank compression."""
+
+from app.services.chunking import Chunk
+from app.services.summarizer import compress_chunks, split_sentences, textrank
+
+SENTENCES = [
+    "Credit risk on customer receivables increased during the year.",
+    "Receivables overdue by more than ninety days doubled.",
+    "Management raised the credit loss allowance on overdue receivables.",
+    "The office canteen was renovated in spring.",
+    "Credit insurance now covers most customer receivables.",
+]
+
+
+def test_split_sentences():
+    """Sentences end at terminal punctuation followed by a capital, or at line breaks."""
+    assert split_sentences("Revenue rose 4.5% in Q3. Margins fell! Why?\nOutlook") == [
+        "Revenue rose 4.5% in Q3.",
+        "Margins fell!",
+        "Why?",
+        "Outlook",
+    ]
+
+
+def test_split_sentences_rejoins_wrapped_pdf_lines():
+    """Lines wrapped at the page width form one sentence; headings and list items keep their own lines."""
+    text = (
+        "Credit risk on customer receivables increased during\n"
+        "the year as overdue balances grew. Manage-\n"
+        "ment raised the allowance.\n"
+        "Outlook\n"
+        "- Insurance covers most receivables\n"
+        "- Collections improve"
+    )
+
+    assert split_sentences(text) == [
+        "Credit risk on customer receivables increased during the year as overdue balances grew.",
+        "Management raised the allowance.",
+        "Outlook",
+        "- Insurance covers most receivables",
+        "- Collections improve",
+    ]
+
+
+def test_textrank_prefers_central_sentences():
+    """Sentences connected to many others outrank isolated ones."""
+    scores = textrank(SENTENCES, max_term_share=1.0)
+
+    assert abs(sum(scores) - 1) < 1e-6
+    assert scores[3] == min(scores)
+    assert textrank([]) == []
+
+
+def test_compress_keeps_ratio_in_original_order():
+    """Each chunk keeps its best sentences, in order, under a new content identity."""
+    chunk = Chunk(chunk_id="orig", document="a.pdf", index=0, text=" ".join(SENTENCES))
+
+    (compressed,) = compress_chunks([chunk], ratio=0.4)
+
+    kept = split_sentences(compressed.text)
+    assert len(kept) == 2
+    assert SENTENCES[3] not in kept
+    assert kept == [sentence for sentence in SENTENCES if sentence in kept]
+    assert compressed.chunk_id != "orig"
+    assert compress_chunks([chunk], ratio=1.0) == [chunk]
@@ -0,0 +1,270 @@
+"""Tests for the text store and document extractors."""
+
+import asyncio
+import os
+import zipfile
+import zlib
+from pathlib import Path
+
+import pytest
+
+from app.exceptions import ProcessingError
+from app.services.text_extraction import ExtractionPool, extract_text
+from app.services.text_store import TextStore, TextStoreBuilder
+
+
+def build_pdf(pages: list[bytes], outline: list[tuple[str, int]] | None = None) -> bytes:
+    """Build a small PDF with one Flate-compressed content stream per page and optional bookmarks."""
+    outline = outline or []
+    outline_root = 3 + 2 * len(pages)
+    catalog = b"<< /Type /Catalog /Pages 2 0 R"
+    if outline:
+        catalog += b" /Outlines " + str(outline_root).encode() + b" 0 R"
+    objects = [catalog + b" >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))).encode()
+    objects.append(b"<< /Type /Pages /Kids [" + kids + b"] /Count " + str(len(pages)).encode() + b" >>")
+    for index, content in enumerate(pages):
+        stream = zlib.compress(content)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /Contents " + str(4 + 2 * index).encode() + b" 0 R >>")
+        objects.append(
+            b"<< /Length " + str(len(stream)).encode() + b" /Filter /FlateDecode >>\nstream\n" + stream + b"\nendstream"
+        )
+    if outline:
+        objects.append(f"<< /Type /Outlines /First {outline_root + 1} 0 R >>".encode())
+        for index, (title, page) in enumerate(outline):
+            following = f" /Next {outline_root + 2 + index} 0 R" if index + 1 < len(outline) else ""
+            objects.append(f"<< /Title ({title}) /Dest [{3 + 2 * page} 0 R /Fit]{following} >>".encode())
+    body = b"%PDF-1.4\n"
+    for number, obj in enumerate(objects, start=1):
+        body += str(number).encode() + b" 0 obj\n" + obj + b"\nendobj\n"
+    return body + b"trailer\n<< /Root 1 0 R >>\n%%EOF"
+
+
+def build_filing(page_count: int) -> bytes:
+    """Build a filing whose bookmarks split it into overview, risk and appendix sections."""
+    pages = [f"BT (Page {index} body text) Tj ET".encode() for index in range(page_count)]
+    return build_pdf(pages, outline=[("Overview", 0), ("Risk Factors", 2), ("Appendix", 4)])
+
+
+def build_docx(path: Path) -> None:
+    """Write a minimal DOCX with two paragraphs, a page break and a table."""
+    w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    document = (
+        f"<w:document {w}><w:body>"
+        "<w:p><w:r><w:t>Introduction</w:t></w:r></w:p>"
+        '<w:p><w:r><w:br w:type="page"/><w:t>Second page</w:t></w:r></w:p>'
+        "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>a</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p><w:r><w:t>b</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+        "</w:body></w:document>"
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", document)
+
+
+def build_xlsx(path: Path) -> None:
+    """Write a minimal XLSX with one sheet using shared and inline strings."""
+    s = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    r = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "xl/workbook.xml", f'<workbook {s} {r}><sheets><sheet name="Q3" r:id="rId1"/></sheets></workbook>'
+        )
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/></Relationships>',
+        )
+        archive.writestr("xl/sharedStrings.xml", f"<sst {s}><si><t>Revenue</t></si></sst>")
+        archive.writestr(
+            "xl/worksheets/sheet1.xml",
+            f'<worksheet {s}><sheetData><row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1"><v>42</v></c></row>'
+            '<row r="2"><c r="B2" t="inlineStr"><is><t>note</t></is></c></row></sheetData></worksheet>',
+        )
+
+
+def test_builder_round_trip():
+    """Paragraphs, pages and cells are resolved from the offset tables."""
+    builder = TextStoreBuilder()
+    builder.start_page()
+    builder.add_paragraph("First paragraph")
+    builder.add_paragraph("Zweiter Absatz – ünïcode")
+    builder.start_page()
+    builder.add_table_row(["name", "value"], table=0, row=0)
+
+    store = builder.build()
+
+    assert store.paragraph_count == 3
+    assert store.page_count == 2
+    assert store.paragraph(1) == "Zweiter Absatz – ünïcode"
+    assert store.page(1) == "name | value"
+    assert store.page_of(2) == 1
+    assert store.cell(1).text == "value"
+    assert (store.cell(1).row, store.cell(1).column) == (0, 1)
+    assert store.text() == "First paragraph\nZweiter Absatz – ünïcode\nname | value"
+
+
+def test_shared_memory_round_trip():
+    """A store published in shared memory can be attached without copying."""
+    builder = TextStoreBuilder()
+    builder.add_title("Sheet1")
+    builder.add_paragraph("shared text")
+    builder.add_table_row(["x", "y"], table=0, row=3)
+    handle = builder.build().to_shared_memory()
+
+    attached = TextStore.attach(handle)
+    try:
+        assert attached.paragraph(1) == "shared text"
+        assert attached.title_paragraphs() == {0}
+        assert attached.cell(0).row == 3
+        assert attached.text() == "Sheet1\nshared text\nx | y"
+    finally:
+        attached.release()
+
+
+def test_extract_pdf(tmp_path: Path):
+    """Text operators of each page become paragraphs on separate pages."""
+    path = tmp_path / "report.pdf"
+    path.write_bytes(
+        build_pdf(
+            [
+                b"BT /F1 12 Tf 72 720 Td (Quarterly report) Tj 0 -14 Td (Revenue grew \\(10%\\)) Tj ET",
+                b"BT [(Risk) -300 (factors)] TJ ET",
+            ]
+        )
+    )
+
+    store = extract_text(path)
+
+    assert store.page_count == 2
+    assert list(store.iter_paragraphs()) == ["Quarterly report", "Revenue grew (10%)", "Risk factors"]
+
+
+def test_extract_docx(tmp_path: Path):
+    """Page breaks start new pages and tables become rows with cells."""
+    path = tmp_path / "doc.docx"
+    build_docx(path)
+
+    store = extract_text(path)
+
+    assert store.page_count == 2
+    assert store.page(0) == "Introduction"
+    assert store.cell(0).text == "a"
+    assert "a | b" in store.text()
+
+
+def test_extract_xlsx(tmp_path: Path):
+    """Shared and inline strings are resolved into sheet rows."""
+    path = tmp_path / "book.xlsx"
+    build_xlsx(path)
+
+    store = extract_text(path)
+
+    assert store.paragraph(0) == "Q3"
+    assert store.title_paragraphs() == {0}
+    assert store.paragraph(1) == "Revenue |  | 42"
+    assert store.paragraph(2) == " | note"
+
+
+def test_extract_csv(tmp_path: Path):
+    """CSV rows become table rows on a single page."""
+    path = tmp_path / "data.csv"
+    path.write_text("name;age\nAda;36\n")
+
+    store = extract_text(path)
+
+    assert store.paragraph_count == 2
+    assert store.cell(3).text == "36"
+
+
+def test_extract_malformed_docx(tmp_path: Path):
+    """Malformed archives surface as processing errors."""
+    path = tmp_path / "broken.docx"
+    path.write_bytes(b"PK\x03\x04 not really a zip")
+
+    with pytest.raises(ProcessingError):
+        extract_text(path)
+
+
+@pytest.mark.asyncio
+async def test_extraction_pool_uses_shared_memory(tmp_path: Path):
+    """Worker processes hand results back through shared memory."""
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    pool = ExtractionPool(max_workers=1)
+    try:
+        store = await pool.extract(path)
+        assert store.text() == "a | b\n1 | 2"
+        store.release()
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="shared memory blocks are not listed in /dev/shm")
+async def test_cancelled_extraction_unlinks_its_shared_memory(tmp_path: Path):
+    """A block published after the caller was cancelled is unlinked instead of leaking."""
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    pool = ExtractionPool(max_workers=1)
+    before = set(os.listdir("/dev/shm"))
+    task = asyncio.create_task(pool.extract(path))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    try:
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Wait for the worker to finish publishing, then for the done callback to run on the loop
+        executor = pool._get_executor()
+        await asyncio.to_thread(executor.shutdown, True)
+        await asyncio.sleep(0.05)
+    finally:
+        pool.shutdown()
+
+    assert set(os.listdir("/dev/shm")) - before == set()
+
+
+def test_pdf_outline_limits_extraction_to_relevant_section(tmp_path: Path):
+    """Only the pages of the matching bookmark are parsed when the budget is exhausted."""
+    path = tmp_path / "filing.pdf"
+    path.write_bytes(build_filing(page_count=6))
+
+    store = extract_text(path, description="Summarize the risk section", token_budget=0)
+
+    assert list(store.iter_paragraphs()) == ["Page 2 body text", "Page 3 body text"]
+
+
+def test_pdf_outline_pulls_in_other_sections_within_budget(tmp_path: Path):
+    """Other sections are added in document order while the budget allows."""
+    path = tmp_path / "filing.pdf"
+    path.write_bytes(build_filing(page_count=6))
+
+    store = extract_text(path, description="Summarize the risk section", token_budget=100_000)
+
+    assert store.page_count == 6
+
+
+def test_docx_headings_drive_lazy_extraction(tmp_path: Path):
+    """Heading styles form the section index of Word documents."""
+    w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+    def heading(text: str) -> str:
+        return f'<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>{text}</w:t></w:r></w:p>'
+
+    def body(text: str) -> str:
+        return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+    document = (
+        f"<w:document {w}><w:body>"
+        + heading("Market Overview")
+        + body("Demand was stable.")
+        + heading("Liquidity Risks")
+        + body("Cash covers twelve months.")
+        + "</w:body></w:document>"
+    )
+    path = tmp_path / "memo.docx"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", document)
+
+    store = extract_text(path, description="What are the liquidity risks?", token_budget=0)
+
+    assert list(store.iter_paragraphs()) == ["Liquidity Risks", "Cash covers twelve months."]
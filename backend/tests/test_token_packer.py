@@ -0,0 +1,50 @@
+"""Tests for packing chunks into the context window."""
+
+from app.services.chunk_cache import ChunkCache
+from app.services.chunking import Chunk
+from app.services.token_packer import count_tokens, pack_chunks
+
+
+def make_chunks(document: str, count: int, words: int = 40) -> list[Chunk]:
+    """Create chunks of ``words`` four-letter words each."""
+    return [
+        Chunk(chunk_id=f"{document}-{index}", document=document, index=index, text=" ".join(["word"] * words))
+        for index in range(count)
+    ]
+
+
+def test_count_tokens_estimates_word_pieces():
+    """Words cost a token per four characters and punctuation a token each."""
+    assert count_tokens("word") == 1
+    assert count_tokens("internationalization, ok.") == 5 + 1 + 1 + 1
+    assert count_tokens("") == 0
+
+
+def test_pack_respects_budget_and_minimum_quota():
+    """A large file cannot crowd out a small one and the output reserve stays free."""
+    chunks = make_chunks("large.pdf", 20) + make_chunks("small.pdf", 4)
+    scores = {chunk.chunk_id: 1.0 for chunk in chunks if chunk.document == "large.pdf"}
+    cache = ChunkCache()
+
+    result = pack_chunks(chunks, context_tokens=500, output_reserve=100, scores=scores, min_file_share=0.5, cache=cache)
+
+    assert result.stats.budget == 400
+    assert result.stats.used_tokens <= 400
+    assert any(chunk.document == "small.pdf" for chunk in result.chunks)
+    assert result.stats.dropped_tokens == 24 * 40 - result.stats.used_tokens
+    assert 0 < result.stats.coverage["small.pdf"] < 1
+    positions = [chunks.index(chunk) for chunk in result.chunks]
+    assert positions == sorted(positions)
+    assert cache.stats()["misses"] == 24
+
+
+def test_pack_prefers_high_scores():
+    """With no quota, the best scoring chunks win over document order."""
+    chunks = make_chunks("a.docx", 5)
+
+    result = pack_chunks(
+        chunks, context_tokens=80, output_reserve=0, scores={"a.docx-3": 2.0, "a.docx-1": 1.0}, min_file_share=0
+    )
+
+    assert [chunk.index for chunk in result.chunks] == [1, 3]
+    assert result.stats.dropped_chunks == 3